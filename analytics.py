@@ -0,0 +1,170 @@
+from flask import Blueprint, request
+from src.responses import success_response, error_response
+from src.rollups import db, ServiceAreaDailyStats, UNASSIGNED
+from src.schemas import ValidationError, parse_date
+from sqlalchemy import func
+from datetime import datetime, timedelta
+
+analytics_bp = Blueprint('analytics', __name__)
+
+MAX_RANGE_DAYS = 366
+
+def _date_range():
+    """Parse from/to (YYYY-MM-DD, inclusive); defaults to the last 30 days"""
+    errors = []
+    bounds = {}
+    for name in ('from', 'to'):
+        try:
+            bounds[name] = parse_date(request.args[name]) if request.args.get(name) else None
+        except ValueError as e:
+            errors.append({'field': name, 'code': 'INVALID_FORMAT', 'message': f'Field {name} {e}'})
+    if errors:
+        raise ValidationError(errors)
+    end = bounds['to'] or datetime.utcnow().date()
+    start = bounds['from'] or end - timedelta(days=29)
+    return start, end
+
+def _rates(totals):
+    quotes = totals['quotes']
+    return {
+        'leadResponseRate': round(quotes / totals['requests'], 4) if totals['requests'] else None,
+        'quoteWinRate': round(totals['bookings'] / quotes, 4) if quotes else None,
+        'completionRate': round(totals['completed'] / totals['bookings'], 4) if totals['bookings'] else None
+    }
+
+def _totals(row):
+    totals = {
+        'requests': row.requests or 0,
+        'quotes': row.quotes or 0,
+        'bookings': row.bookings or 0,
+        'completed': row.completed or 0,
+        'cancelled': row.cancelled or 0,
+        'revenue': float(row.revenue or 0)
+    }
+    totals.update(_rates(totals))
+    return totals
+
+def _sums():
+    return [
+        func.sum(ServiceAreaDailyStats.requests).label('requests'),
+        func.sum(ServiceAreaDailyStats.quotes).label('quotes'),
+        func.sum(ServiceAreaDailyStats.bookings).label('bookings'),
+        func.sum(ServiceAreaDailyStats.completed).label('completed'),
+        func.sum(ServiceAreaDailyStats.cancelled).label('cancelled'),
+        func.sum(ServiceAreaDailyStats.revenue).label('revenue')
+    ]
+
+@analytics_bp.route('/businesses/<business_id>/analytics/service-areas', methods=['GET'])
+def get_service_area_performance(business_id):
+    """Per service area and category totals for a business over a date range"""
+    try:
+        start, end = _date_range()
+        if start > end or (end - start).days >= MAX_RANGE_DAYS:
+            return error_response('INVALID_DATE_RANGE', f'Date range must be ascending and at most {MAX_RANGE_DAYS} days', 400)
+
+        query = db.session.query(
+            ServiceAreaDailyStats.service_area_id,
+            ServiceAreaDailyStats.service_category,
+            *_sums()
+        ).filter(
+            ServiceAreaDailyStats.business_id == business_id,
+            ServiceAreaDailyStats.day.between(start, end)
+        )
+        if request.args.get('serviceCategory'):
+            query = query.filter(ServiceAreaDailyStats.service_category == request.args['serviceCategory'])
+        rows = query.group_by(
+            ServiceAreaDailyStats.service_area_id,
+            ServiceAreaDailyStats.service_category
+        ).all()
+
+        areas = {}
+        for row in rows:
+            area_id = row.service_area_id or None
+            area = areas.setdefault(area_id, {'serviceAreaId': area_id, 'categories': []})
+            area['categories'].append(dict(_totals(row), serviceCategory=row.service_category))
+
+        for area in areas.values():
+            totals = {name: sum(c[name] for c in area['categories'])
+                      for name in ('requests', 'quotes', 'bookings', 'completed', 'cancelled', 'revenue')}
+            totals.update(_rates(totals))
+            area['totals'] = totals
+
+        return success_response({
+            'businessId': business_id,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'serviceAreas': sorted(areas.values(), key=lambda a: a['totals']['revenue'], reverse=True)
+        })
+
+    except ValidationError as e:
+        return error_response('INVALID_DATE_FORMAT', str(e), 400, details={'errors': e.errors})
+    except Exception as e:
+        return error_response('INTERNAL_ERROR', str(e), 500)
+
+@analytics_bp.route('/businesses/<business_id>/analytics/daily', methods=['GET'])
+def get_daily_performance(business_id):
+    """Daily totals for a business, optionally narrowed to one service area or category"""
+    try:
+        start, end = _date_range()
+        if start > end or (end - start).days >= MAX_RANGE_DAYS:
+            return error_response('INVALID_DATE_RANGE', f'Date range must be ascending and at most {MAX_RANGE_DAYS} days', 400)
+
+        query = db.session.query(ServiceAreaDailyStats.day, *_sums()).filter(
+            ServiceAreaDailyStats.business_id == business_id,
+            ServiceAreaDailyStats.day.between(start, end)
+        )
+        if 'serviceAreaId' in request.args:
+            query = query.filter(ServiceAreaDailyStats.service_area_id == (request.args['serviceAreaId'] or UNASSIGNED))
+        if request.args.get('serviceCategory'):
+            query = query.filter(ServiceAreaDailyStats.service_category == request.args['serviceCategory'])
+        rows = query.group_by(ServiceAreaDailyStats.day).order_by(ServiceAreaDailyStats.day).all()
+
+        return success_response({
+            'businessId': business_id,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'days': [dict(_totals(row), day=row.day) for row in rows]
+        })
+
+    except ValidationError as e:
+        return error_response('INVALID_DATE_FORMAT', str(e), 400, details={'errors': e.errors})
+    except Exception as e:
+        return error_response('INTERNAL_ERROR', str(e), 500)
+
+@analytics_bp.route('/analytics/demand', methods=['GET'])
+def get_area_demand():
+    """New service requests per service area and category over a date range"""
+    try:
+        start, end = _date_range()
+        if start > end or (end - start).days >= MAX_RANGE_DAYS:
+            return error_response('INVALID_DATE_RANGE', f'Date range must be ascending and at most {MAX_RANGE_DAYS} days', 400)
+
+        rows = db.session.query(
+            ServiceAreaDailyStats.service_area_id,
+            ServiceAreaDailyStats.service_category,
+            func.sum(ServiceAreaDailyStats.requests).label('requests')
+        ).filter(
+            ServiceAreaDailyStats.business_id == UNASSIGNED,
+            ServiceAreaDailyStats.day.between(start, end)
+        ).group_by(
+            ServiceAreaDailyStats.service_area_id,
+            ServiceAreaDailyStats.service_category
+        ).all()
+
+        return success_response({
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'demand': [
+                {
+                    'serviceAreaId': row.service_area_id or None,
+                    'serviceCategory': row.service_category,
+                    'requests': row.requests or 0
+                }
+                for row in rows
+            ]
+        })
+
+    except ValidationError as e:
+        return error_response('INVALID_DATE_FORMAT', str(e), 400, details={'errors': e.errors})
+    except Exception as e:
+        return error_response('INTERNAL_ERROR', str(e), 500)
@@ -0,0 +1,127 @@
+from flask import Blueprint, request, current_app
+from src.responses import success_response, error_response
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import threading
+
+batch_bp = Blueprint('batch', __name__)
+
+READ_ONLY_METHODS = {'GET', 'HEAD'}
+ALLOWED_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE'}
+# Headers copied from the outer request onto every sub-request
+FORWARDED_HEADERS = ('Authorization', 'Accept-Language', 'User-Agent')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool(max_workers):
+    """Thread pool shared by every batch in this worker, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch')
+        return _pool
+
+@atexit.register
+def _shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def _dispatch(app, item, headers, remote_addr):
+    """Run one sub-request through the full request pipeline in its own context.
+
+    A sub-request that raises is reported as a 500 item; the rest of the batch still runs.
+    """
+    try:
+        # A fresh app context keeps g, the DB session and timing state per sub-request
+        with app.app_context():
+            with app.test_request_context(
+                item['path'],
+                method=item['method'],
+                json=item.get('body'),
+                headers=headers,
+                environ_base={'REMOTE_ADDR': remote_addr}
+            ):
+                response = app.full_dispatch_request()
+    except Exception as e:
+        app.logger.exception('Batch item %s %s failed', item['method'], item['path'])
+        return {
+            'id': item.get('id'),
+            'status': 500,
+            'error': {'code': 'INTERNAL_ERROR', 'message': str(e)}
+        }
+
+    result = {
+        'id': item.get('id'),
+        'status': response.status_code
+    }
+    if response.is_streamed:
+        result['body'] = None
+    elif response.is_json:
+        result['body'] = response.get_json(silent=True)
+    else:
+        result['body'] = response.get_data(as_text=True)
+    return result
+
+def _validate(item, index):
+    if not isinstance(item, dict):
+        return f'Item {index} must be an object'
+    method = str(item.get('method', 'GET')).upper()
+    path = item.get('path')
+    if method not in ALLOWED_METHODS:
+        return f'Item {index} has unsupported method {method}'
+    if not isinstance(path, str) or not path.startswith('/api/'):
+        return f'Item {index} path must start with /api/'
+    if path.split('?', 1)[0].rstrip('/') == '/api/batch':
+        return f'Item {index} cannot call /api/batch'
+    item['method'] = method
+    return None
+
+@batch_bp.route('/batch', methods=['POST'])
+def batch_requests():
+    """Execute several API calls in one HTTP request"""
+    try:
+        data = request.get_json()
+
+        if not data or not isinstance(data.get('requests'), list):
+            return error_response('INVALID_JSON', 'Request body must be valid JSON with a requests list', 400)
+
+        items = data['requests']
+        max_items = current_app.config.get('BATCH_MAX_REQUESTS', 20)
+        if len(items) > max_items:
+            return error_response('TOO_MANY_ITEMS', f'At most {max_items} requests per batch', 400)
+
+        for index, item in enumerate(items):
+            message = _validate(item, index)
+            if message:
+                return error_response('INVALID_BATCH_ITEM', message, 400)
+
+        app = current_app._get_current_object()
+        headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+        remote_addr = request.remote_addr
+        pool = _get_pool(current_app.config.get('BATCH_MAX_WORKERS', 4))
+
+        # Consecutive read-only calls run concurrently; a write is a barrier so
+        # later calls observe its effects, matching sequential semantics.
+        results = [None] * len(items)
+        pending = []
+        for index, item in enumerate(items):
+            if item['method'] in READ_ONLY_METHODS:
+                pending.append((index, pool.submit(_dispatch, app, item, headers, remote_addr)))
+                continue
+            for pending_index, future in pending:
+                results[pending_index] = future.result()
+            pending = []
+            results[index] = _dispatch(app, item, headers, remote_addr)
+        for pending_index, future in pending:
+            results[pending_index] = future.result()
+
+        return success_response({
+            'responses': results
+        })
+
+    except Exception as e:
+        return error_response('INTERNAL_ERROR', str(e), 500)
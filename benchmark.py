@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the Bulk Pickup Service API
+
+Seeds a throwaway database, drives concurrent workloads against each endpoint
+through the Flask test client (or a locally spawned HTTP server) and reports
+throughput and p50/p95/p99 latency as JSON. With --baseline, exits non-zero when
+any workload regresses beyond --max-regression, so releases can be gated on it.
+
+    python benchmark.py --requests 500 --concurrency 8 --output bench.json
+    python benchmark.py --server --baseline bench.json --max-regression 0.15
+"""
+
+import os
+import sys
+# Same import root as main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import http.client
+import json
+import math
+import random
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from time import perf_counter
+
+# name -> (method, path factory, body factory, expected status)
+WORKLOADS = {
+    'schedule_lookup': (
+        'GET', lambda rnd, ctx: f"/api/schedules/lookup?zipCode={rnd.choice(ctx['zip_codes'])}",
+        None, 200
+    ),
+    'schedule_list': (
+        'GET', lambda rnd, ctx: '/api/schedules',
+        None, 200
+    ),
+    'business_search': (
+        'GET', lambda rnd, ctx: f'/api/businesses/search?lat={39.78 + rnd.uniform(-0.2, 0.2):.4f}'
+                                f'&lng={-89.65 + rnd.uniform(-0.2, 0.2):.4f}&radius=10',
+        None, 200
+    ),
+    'business_reviews': (
+        'GET', lambda rnd, ctx: f"/api/businesses/{rnd.choice(ctx['business_ids'])}/reviews?limit=10",
+        None, 200
+    ),
+    'request_create': (
+        'POST', lambda rnd, ctx: '/api/bookings/requests',
+        lambda rnd, ctx: {
+            'addressId': f'addr_{rnd.randint(1, 10000)}',
+            'serviceCategory': rnd.choice(ctx['categories']),
+            'description': 'Benchmark pickup request',
+            'preferredDate': (date.today() + timedelta(days=rnd.randint(1, 30))).isoformat(),
+            'preferredTimeStart': '10:00'
+        }, 201
+    ),
+    'booking_create': (
+        'POST', lambda rnd, ctx: f'/api/bookings/quotes/quote_{rnd.randint(1, 10 ** 9)}/accept',
+        lambda rnd, ctx: {
+            'scheduledDate': (date.today() + timedelta(days=rnd.randint(1, 30))).isoformat(),
+            'scheduledTimeStart': f'{rnd.randint(8, 16):02d}:00'
+        }, 201
+    ),
+    'booking_history': (
+        'GET', lambda rnd, ctx: '/api/bookings/history?limit=20',
+        None, 200
+    ),
+    'dashboard_batch': (
+        'POST', lambda rnd, ctx: '/api/batch',
+        lambda rnd, ctx: {'requests': [
+            {'id': 'schedules', 'method': 'GET', 'path': f"/api/schedules/lookup?zipCode={rnd.choice(ctx['zip_codes'])}"},
+            {'id': 'subscriptions', 'method': 'GET', 'path': '/api/schedules/subscriptions'},
+            {'id': 'history', 'method': 'GET', 'path': '/api/bookings/history?limit=5'},
+            {'id': 'providers', 'method': 'GET', 'path': '/api/businesses/search?lat=39.78&lng=-89.65&radius=10'}
+        ]}, 200
+    ),
+}
+
+def seed_database(app, businesses=200, service_requests=3000, seed=42):
+    """Insert a small-scale synthetic dataset and return lookup context for the workloads"""
+    from src.seed_data import Generator, CATEGORIES, seed as seed_data
+
+    with app.app_context():
+        seed_data('small', seed=seed, businesses=businesses, service_requests=service_requests)
+
+    generator = Generator(seed, date.today())
+    return {
+        'business_ids': [generator.id('business', n) for n in range(businesses)],
+        'categories': CATEGORIES,
+        'zip_codes': [f'627{n:02d}' for n in range(1, 40)]
+    }
+
+class TestClientTransport:
+    """Sends requests through the in-process Flask test client"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body)
+        return response.status_code
+
+class HTTPTransport:
+    """Sends requests over HTTP to a spawned or external server"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._local = threading.local()
+
+    def request(self, method, path, body):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            return response.status
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self._local.conn = None
+            raise
+
+def spawn_server(app):
+    """Serve the app from a background thread on an ephemeral port"""
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def run_workload(transport, name, context, total_requests, concurrency, seed):
+    method, path_factory, body_factory, expected_status = WORKLOADS[name]
+    per_worker = [total_requests // concurrency + (1 if i < total_requests % concurrency else 0)
+                  for i in range(concurrency)]
+
+    def worker(index):
+        rnd = random.Random(seed * 1000 + index)
+        latencies = []
+        errors = 0
+        for _ in range(per_worker[index]):
+            path = path_factory(rnd, context)
+            body = body_factory(rnd, context) if body_factory else None
+            start = perf_counter()
+            try:
+                status = transport.request(method, path, body)
+            except Exception:
+                status = None
+            latencies.append(perf_counter() - start)
+            if status != expected_status:
+                errors += 1
+        return latencies, errors
+
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(concurrency)))
+    elapsed = perf_counter() - started
+
+    latencies = sorted(l for worker_latencies, _ in results for l in worker_latencies)
+    errors = sum(e for _, e in results)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'durationSeconds': round(elapsed, 4),
+        'throughputRps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latencyMs': {
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            'p50': round(percentile(latencies, 50) * 1000, 3),
+            'p95': round(percentile(latencies, 95) * 1000, 3),
+            'p99': round(percentile(latencies, 99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3) if latencies else 0.0
+        }
+    }
+
+def compare_to_baseline(report, baseline, max_regression):
+    """Return a list of human-readable regressions against a previous report"""
+    regressions = []
+    for name, current in report['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        for pct in ('p95', 'p99'):
+            before = previous['latencyMs'][pct]
+            after = current['latencyMs'][pct]
+            if before and after > before * (1 + max_regression):
+                regressions.append(f'{name} {pct} {before}ms -> {after}ms')
+        before = previous['throughputRps']
+        after = current['throughputRps']
+        if before and after < before * (1 - max_regression):
+            regressions.append(f'{name} throughput {before} -> {after} req/s')
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Bulk Pickup Service API')
+    parser.add_argument('--workloads', default=','.join(WORKLOADS), help='Comma-separated workload names')
+    parser.add_argument('--requests', type=int, default=300, help='Requests per workload')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients per workload')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per workload')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for data and request generation')
+    parser.add_argument('--businesses', type=int, default=200, help='Businesses to seed')
+    parser.add_argument('--service-requests', type=int, default=3000, help='Service requests to seed (about 60%% become bookings)')
+    parser.add_argument('--server', action='store_true', help='Spawn a local HTTP server instead of using the test client')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--baseline', help='Previous JSON report to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.10, help='Allowed fractional regression vs baseline')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [n for n in args.workloads.split(',') if n]
+    unknown = [n for n in names if n not in WORKLOADS]
+    if unknown:
+        print(f'Unknown workloads: {", ".join(unknown)}', file=sys.stderr)
+        return 2
+
+    from src.main import create_app, create_schema
+
+    workdir = tempfile.mkdtemp(prefix='bulk-pickup-bench-')
+    database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'SERVER_TIMING_ENABLED': False,
+        'RATE_LIMIT_ENABLED': False
+    })
+    with app.app_context():
+        create_schema()
+    context = seed_database(app, businesses=args.businesses, service_requests=args.service_requests, seed=args.seed)
+
+    server = None
+    if args.server:
+        server = spawn_server(app)
+        transport = HTTPTransport('127.0.0.1', server.server_port)
+    else:
+        transport = TestClientTransport(app)
+
+    report = {
+        'config': {
+            'mode': 'server' if args.server else 'test_client',
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+            'businesses': args.businesses,
+            'serviceRequests': args.service_requests
+        },
+        'results': {}
+    }
+    try:
+        for name in names:
+            if args.warmup:
+                run_workload(transport, name, context, args.warmup, min(args.concurrency, args.warmup), args.seed)
+            report['results'][name] = run_workload(
+                transport, name, context, args.requests, args.concurrency, args.seed
+            )
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+
+    failed = any(result['errors'] for result in report['results'].values())
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.max_regression)
+        for regression in regressions:
+            print(f'REGRESSION: {regression}', file=sys.stderr)
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
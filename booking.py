@@ -1,9 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, current_app, Response
+from src.responses import success_response, error_response
 from src.models.booking import db, ServiceRequest, ServiceQuote, Booking, Payment
+from src.models.business import Business
+from src.jobs import task, enqueue
+from src.pubsub import get_broker, get_stream_slots, publish
+from src.fieldsets import InvalidFieldsError, requested_fields, pick
+from src.coverage import route_lead
+from src.pricing import get_price_table
+from src.schemas import Schema, ValidationError, String, Number, Date, Time, Object, List
 from datetime import datetime, date, timedelta
 import json
 import random
 import string
+import time
 
 booking_bp = Blueprint('booking', __name__)
 
@@ -13,6 +22,102 @@ def generate_booking_reference():
     random_part = ''.join(random.choices(string.digits, k=6))
     return f'BK-{year}-{random_part}'
 
+# Allowed provider-driven status transitions for bulk updates
+BOOKING_TRANSITIONS = {
+    'confirmed': {'in_progress', 'cancelled', 'rescheduled'},
+    'rescheduled': {'confirmed', 'in_progress', 'cancelled'},
+    'in_progress': {'completed', 'cancelled'},
+    'completed': set(),
+    'cancelled': set()
+}
+
+MAX_BULK_TRANSITIONS = 500
+
+LOCATION_SCHEMA = Schema({
+    'lat': Number(required=True, minimum=-90, maximum=90),
+    'lng': Number(required=True, minimum=-180, maximum=180)
+})
+
+SERVICE_REQUEST_SCHEMA = Schema({
+    'addressId': String(required=True),
+    'serviceCategory': String(required=True),
+    'description': String(required=True),
+    'preferredDate': Date(),
+    'preferredTimeStart': Time(),
+    'preferredTimeEnd': Time(),
+    'urgencyLevel': String(choices=('low', 'normal', 'high', 'emergency'), default='normal'),
+    'estimatedBudget': Number(minimum=0),
+    'specialInstructions': String(),
+    'photos': List(default=[]),
+    'location': Object(schema=LOCATION_SCHEMA, default={}),
+    'zipCode': String()
+})
+
+ACCEPT_QUOTE_SCHEMA = Schema({
+    'scheduledDate': Date(required=True),
+    'scheduledTimeStart': Time(required=True),
+    'scheduledTimeEnd': Time()
+})
+
+CANCEL_BOOKING_SCHEMA = Schema({
+    'reason': String(default='Customer requested cancellation')
+})
+
+COMPLETE_BOOKING_SCHEMA = Schema({
+    'completionNotes': String(),
+    'afterPhotos': List(default=[]),
+    'customerSignature': String()
+})
+
+BOOKING_TRANSITION_SCHEMA = Schema({
+    'bookingId': String(required=True),
+    'status': String(required=True, choices=('confirmed', 'in_progress', 'rescheduled', 'completed', 'cancelled')),
+    'completionNotes': String(),
+    'afterPhotos': List(default=[]),
+    'customerSignature': String(),
+    'reason': String(default='Provider cancelled')
+})
+
+def apply_booking_transition(booking, status, data, now):
+    """Apply a validated status transition and its completion data to a booking"""
+    booking.booking_status = status
+    if status == 'in_progress':
+        booking.actual_start_time = now
+    elif status == 'completed':
+        booking.actual_end_time = now
+        booking.completed_at = now
+        booking.completion_notes = data.get('completionNotes')
+        booking.after_photos = data.get('afterPhotos', [])
+        booking.customer_signature = data.get('customerSignature')
+    elif status == 'cancelled':
+        booking.cancellation_reason = data.get('reason', 'Provider cancelled')
+    booking.updated_at = now
+
+def booking_channel(user_id):
+    return f'user:{user_id}:bookings'
+
+def publish_booking_status(booking):
+    """Push a booking's current status to its customer's event stream"""
+    publish(booking_channel(booking.customer_user_id), 'booking.status', {
+        'bookingId': booking.id,
+        'reference': booking.booking_reference,
+        'status': booking.booking_status,
+        'paymentStatus': booking.payment_status,
+        'updatedAt': booking.updated_at.isoformat() + 'Z' if booking.updated_at else None
+    })
+
+@task('bookings.expire_request')
+def expire_service_request(payload):
+    """Close a service request that reached its expiry without being booked"""
+    service_request = ServiceRequest.query.filter_by(id=payload['requestId']).first()
+    if not service_request or service_request.status not in ('open', 'quoted'):
+        return
+    if service_request.expires_at and service_request.expires_at > datetime.utcnow():
+        return
+    service_request.status = 'cancelled'
+    service_request.updated_at = datetime.utcnow()
+    db.session.commit()
+
 @booking_bp.route('/bookings/requests', methods=['POST'])
 def create_service_request():
     """Create a new service request"""
@@ -20,90 +125,66 @@ def create_service_request():
         data = request.get_json()
         
         if not data:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'INVALID_JSON',
-                    'message': 'Request body must be valid JSON'
-                }
-            }), 400
+            return error_response('INVALID_JSON', 'Request body must be valid JSON', 400)
         
-        required_fields = ['addressId', 'serviceCategory', 'description']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'MISSING_FIELD',
-                        'message': f'Field {field} is required'
-                    }
-                }), 400
+        values = SERVICE_REQUEST_SCHEMA.load(data)
         
         # Mock user ID - in real implementation, get from JWT token
         customer_user_id = 'user_123'
         
-        # Parse dates and times
-        preferred_date = None
-        if data.get('preferredDate'):
-            preferred_date = datetime.strptime(data['preferredDate'], '%Y-%m-%d').date()
-        
-        preferred_time_start = None
-        if data.get('preferredTimeStart'):
-            preferred_time_start = datetime.strptime(data['preferredTimeStart'], '%H:%M').time()
-        
-        preferred_time_end = None
-        if data.get('preferredTimeEnd'):
-            preferred_time_end = datetime.strptime(data['preferredTimeEnd'], '%H:%M').time()
-        
         # Set expiration date (7 days from now)
         expires_at = datetime.utcnow() + timedelta(days=7)
         
         service_request = ServiceRequest(
             customer_user_id=customer_user_id,
-            customer_address_id=data['addressId'],
-            service_category=data['serviceCategory'],
-            service_description=data['description'],
-            preferred_date=preferred_date,
-            preferred_time_start=preferred_time_start,
-            preferred_time_end=preferred_time_end,
-            urgency_level=data.get('urgencyLevel', 'normal'),
-            estimated_budget=data.get('estimatedBudget'),
-            special_instructions=data.get('specialInstructions'),
-            photos=data.get('photos', []),
+            customer_address_id=values['addressId'],
+            service_category=values['serviceCategory'],
+            service_description=values['description'],
+            preferred_date=values['preferredDate'],
+            preferred_time_start=values['preferredTimeStart'],
+            preferred_time_end=values['preferredTimeEnd'],
+            urgency_level=values['urgencyLevel'],
+            estimated_budget=values['estimatedBudget'],
+            special_instructions=values['specialInstructions'],
+            photos=values['photos'],
             expires_at=expires_at
         )
         
         db.session.add(service_request)
+        db.session.flush()
+        
+        # Route the lead to every business whose service areas cover the location
+        location = values['location']
+        leads = route_lead(service_request, location.get('lat'), location.get('lng'), values['zipCode'])
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'request': service_request.to_dict()
-            },
-            'message': 'Service request created successfully',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
-        }), 201
-        
-    except ValueError as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INVALID_DATE_FORMAT',
-                'message': 'Date must be in YYYY-MM-DD format, time in HH:MM format'
-            }
-        }), 400
+        try:
+            enqueue('bookings.expire_request', {'requestId': service_request.id}, delay=(expires_at - datetime.utcnow()).total_seconds())
+        except Exception:
+            # The request is already saved; it just won't expire on its own
+            current_app.logger.exception('Could not queue expiry for service request %s', service_request.id)
+        
+        # Price estimates for every routed business in one pass over the compiled price table
+        estimates = get_price_table().price_ranges(
+            [lead.business_id for lead in leads],
+            service_request.service_category,
+            areas={lead.business_id: lead.service_area_id for lead in leads}
+        )
+        
+        return success_response({
+            'request': service_request.to_dict(),
+            'routedBusinessCount': len(leads),
+            'priceEstimates': [
+                dict(estimate, businessId=business_id)
+                for business_id, estimate in estimates.items() if estimate
+            ]
+        }, message='Service request created successfully', status=201)
+        
+    except ValidationError as e:
+        return error_response('VALIDATION_ERROR', str(e), 400, details={'errors': e.errors})
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @booking_bp.route('/bookings/requests/<request_id>/quotes', methods=['GET'])
 def get_request_quotes(request_id):
@@ -148,24 +229,12 @@ def get_request_quotes(request_id):
             }
         ]
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'quotes': mock_quotes
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
+        return success_response({
+            'quotes': mock_quotes
         })
         
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @booking_bp.route('/bookings/quotes/<quote_id>/accept', methods=['POST'])
 def accept_quote(quote_id):
@@ -174,35 +243,13 @@ def accept_quote(quote_id):
         data = request.get_json()
         
         if not data:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'INVALID_JSON',
-                    'message': 'Request body must be valid JSON'
-                }
-            }), 400
+            return error_response('INVALID_JSON', 'Request body must be valid JSON', 400)
         
-        required_fields = ['scheduledDate', 'scheduledTimeStart']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'MISSING_FIELD',
-                        'message': f'Field {field} is required'
-                    }
-                }), 400
+        values = ACCEPT_QUOTE_SCHEMA.load(data)
         
         # Mock user ID - in real implementation, get from JWT token
         customer_user_id = 'user_123'
         
-        # Parse dates and times
-        scheduled_date = datetime.strptime(data['scheduledDate'], '%Y-%m-%d').date()
-        scheduled_time_start = datetime.strptime(data['scheduledTimeStart'], '%H:%M').time()
-        scheduled_time_end = None
-        if data.get('scheduledTimeEnd'):
-            scheduled_time_end = datetime.strptime(data['scheduledTimeEnd'], '%H:%M').time()
-        
         # Generate booking reference
         booking_reference = generate_booking_reference()
         
@@ -220,43 +267,26 @@ def accept_quote(quote_id):
             customer_user_id=customer_user_id,
             business_id=mock_quote['business_id'],
             booking_reference=booking_reference,
-            scheduled_date=scheduled_date,
-            scheduled_time_start=scheduled_time_start,
-            scheduled_time_end=scheduled_time_end,
+            scheduled_date=values['scheduledDate'],
+            scheduled_time_start=values['scheduledTimeStart'],
+            scheduled_time_end=values['scheduledTimeEnd'],
             final_amount=mock_quote['quote_amount']
         )
         
         db.session.add(booking)
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'booking': booking.to_dict()
-            },
-            'message': 'Quote accepted and booking created successfully',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
-        }), 201
-        
-    except ValueError as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INVALID_DATE_FORMAT',
-                'message': 'Date must be in YYYY-MM-DD format, time in HH:MM format'
-            }
-        }), 400
+        publish_booking_status(booking)
+        
+        return success_response({
+            'booking': booking.to_dict()
+        }, message='Quote accepted and booking created successfully', status=201)
+        
+    except ValidationError as e:
+        return error_response('VALIDATION_ERROR', str(e), 400, details={'errors': e.errors})
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @booking_bp.route('/bookings/history', methods=['GET'])
 def get_booking_history():
@@ -299,6 +329,8 @@ def get_booking_history():
             }
         ]
         
+        fields = requested_fields(mock_bookings[0].keys())
+        
         # Apply status filter
         if status:
             mock_bookings = [b for b in mock_bookings if b['status'] == status]
@@ -306,27 +338,17 @@ def get_booking_history():
         # Apply pagination
         paginated_bookings = mock_bookings[offset:offset + limit]
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'bookings': paginated_bookings,
-                'totalCount': len(mock_bookings),
-                'limit': limit,
-                'offset': offset
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
+        return success_response({
+            'bookings': [pick(b, fields) for b in paginated_bookings],
+            'totalCount': len(mock_bookings),
+            'limit': limit,
+            'offset': offset
         })
         
+    except InvalidFieldsError as e:
+        return error_response('INVALID_FIELDS', str(e), 400, details={'allowed': e.allowed})
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @booking_bp.route('/bookings/<booking_id>', methods=['GET'])
 def get_booking_details(booking_id):
@@ -358,30 +380,18 @@ def get_booking_details(booking_id):
             'completedAt': '2025-10-20T12:30:00Z'
         }
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'booking': mock_booking
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
+        return success_response({
+            'booking': mock_booking
         })
         
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @booking_bp.route('/bookings/<booking_id>/cancel', methods=['POST'])
 def cancel_booking(booking_id):
     """Cancel a booking"""
     try:
-        data = request.get_json()
+        values = CANCEL_BOOKING_SCHEMA.load(request.get_json(silent=True) or {})
         
         # Mock user ID - in real implementation, get from JWT token
         customer_user_id = 'user_123'
@@ -392,55 +402,34 @@ def cancel_booking(booking_id):
         ).first()
         
         if not booking:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'BOOKING_NOT_FOUND',
-                    'message': 'Booking not found'
-                }
-            }), 404
+            return error_response('BOOKING_NOT_FOUND', 'Booking not found', 404)
         
         if booking.booking_status in ['completed', 'cancelled']:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'BOOKING_CANNOT_BE_CANCELLED',
-                    'message': f'Booking with status {booking.booking_status} cannot be cancelled'
-                }
-            }), 400
+            return error_response('BOOKING_CANNOT_BE_CANCELLED', f'Booking with status {booking.booking_status} cannot be cancelled', 400)
         
         booking.booking_status = 'cancelled'
-        booking.cancellation_reason = data.get('reason', 'Customer requested cancellation')
+        booking.cancellation_reason = values['reason']
         booking.updated_at = datetime.utcnow()
         
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'booking': booking.to_dict()
-            },
-            'message': 'Booking cancelled successfully',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
-        })
+        publish_booking_status(booking)
         
+        return success_response({
+            'booking': booking.to_dict()
+        }, message='Booking cancelled successfully')
+        
+    except ValidationError as e:
+        return error_response('VALIDATION_ERROR', str(e), 400, details={'errors': e.errors})
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @booking_bp.route('/bookings/<booking_id>/complete', methods=['POST'])
 def complete_booking(booking_id):
     """Mark a booking as completed (business users only)"""
     try:
-        data = request.get_json()
+        values = COMPLETE_BOOKING_SCHEMA.load(request.get_json(silent=True) or {})
         
         # Mock business user ID - in real implementation, get from JWT token and verify business ownership
         business_user_id = 'business_user_123'
@@ -448,51 +437,159 @@ def complete_booking(booking_id):
         booking = Booking.query.filter_by(id=booking_id).first()
         
         if not booking:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'BOOKING_NOT_FOUND',
-                    'message': 'Booking not found'
-                }
-            }), 404
+            return error_response('BOOKING_NOT_FOUND', 'Booking not found', 404)
         
         if booking.booking_status != 'in_progress':
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'BOOKING_NOT_IN_PROGRESS',
-                    'message': 'Only bookings in progress can be completed'
-                }
-            }), 400
+            return error_response('BOOKING_NOT_IN_PROGRESS', 'Only bookings in progress can be completed', 400)
         
-        booking.booking_status = 'completed'
-        booking.actual_end_time = datetime.utcnow()
-        booking.completed_at = datetime.utcnow()
-        booking.completion_notes = data.get('completionNotes')
-        booking.after_photos = data.get('afterPhotos', [])
-        booking.customer_signature = data.get('customerSignature')
-        booking.updated_at = datetime.utcnow()
+        apply_booking_transition(booking, 'completed', values, datetime.utcnow())
         
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'booking': booking.to_dict()
-            },
-            'message': 'Booking completed successfully',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
+        publish_booking_status(booking)
+        
+        return success_response({
+            'booking': booking.to_dict()
+        }, message='Booking completed successfully')
+        
+    except ValidationError as e:
+        return error_response('VALIDATION_ERROR', str(e), 400, details={'errors': e.errors})
+    except Exception as e:
+        db.session.rollback()
+        return error_response('INTERNAL_ERROR', str(e), 500)
+
+@booking_bp.route('/bookings/bulk/transitions', methods=['POST'])
+def bulk_transition_bookings():
+    """Apply status transitions to many bookings in one transaction (business users only)"""
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('transitions'), list):
+            return error_response('INVALID_JSON', 'Request body must be valid JSON with a transitions list', 400)
+        
+        transitions = data['transitions']
+        if len(transitions) > MAX_BULK_TRANSITIONS:
+            return error_response('TOO_MANY_ITEMS', f'At most {MAX_BULK_TRANSITIONS} transitions per request', 400)
+        
+        # Mock business user ID - in real implementation, get from JWT token and verify business ownership
+        business_user_id = 'business_user_123'
+        
+        # Every item is validated up front in one pass; invalid items fail on their own
+        checked = BOOKING_TRANSITION_SCHEMA.validate_many(transitions)
+        booking_ids = [values['bookingId'] for values, _ in checked if values]
+        # Only the acting user's businesses' bookings are found; anyone else's read as missing
+        owned_businesses = db.session.query(Business.id).filter(Business.user_id == business_user_id)
+        bookings = {
+            booking.id: booking
+            for booking in Booking.query.filter(
+                Booking.id.in_(booking_ids),
+                Booking.business_id.in_(owned_businesses.scalar_subquery())
+            ).all()
+        } if booking_ids else {}
+        
+        now = datetime.utcnow()
+        results = []
+        seen = set()
+        applied = 0
+        for item, (values, errors) in zip(transitions, checked):
+            if errors:
+                results.append({
+                    'bookingId': item.get('bookingId') if isinstance(item, dict) else None,
+                    'success': False,
+                    'error': {
+                        'code': 'VALIDATION_ERROR',
+                        'message': '; '.join(error['message'] for error in errors),
+                        'details': {'errors': errors}
+                    }
+                })
+                continue
+            
+            booking_id = values['bookingId']
+            status = values['status']
+            booking = bookings.get(booking_id)
+            
+            if booking is None:
+                error = {'code': 'BOOKING_NOT_FOUND', 'message': 'Booking not found'}
+            elif booking_id in seen:
+                error = {'code': 'DUPLICATE_BOOKING', 'message': 'Booking appears more than once in this request'}
+            elif status not in BOOKING_TRANSITIONS.get(booking.booking_status, set()):
+                error = {
+                    'code': 'INVALID_TRANSITION',
+                    'message': f'Booking with status {booking.booking_status} cannot move to {status}'
+                }
+            else:
+                error = None
+            
+            if error:
+                results.append({'bookingId': booking_id, 'success': False, 'error': error})
+                continue
+            
+            seen.add(booking_id)
+            apply_booking_transition(booking, status, values, now)
+            applied += 1
+            results.append({
+                'bookingId': booking_id,
+                'success': True,
+                'status': status
+            })
+        
+        if applied:
+            db.session.commit()
+            # The commit expired the bookings; refresh them in one query instead of one each
+            for booking in Booking.query.filter(Booking.id.in_(seen)).all():
+                publish_booking_status(booking)
+        
+        return success_response({
+            'results': results,
+            'appliedCount': applied,
+            'failedCount': len(results) - applied
         })
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
+
+@booking_bp.route('/bookings/stream', methods=['GET'])
+def stream_booking_events():
+    """Server-Sent Events stream of the current user's booking status changes"""
+    # Mock user ID - in real implementation, get from JWT token
+    customer_user_id = 'user_123'
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId') or 0
+    try:
+        last_event_id = int(last_event_id)
+    except ValueError:
+        return error_response('INVALID_EVENT_ID', 'Last-Event-ID must be an integer', 400)
+    
+    # Each open stream holds a worker thread until it ends; refuse rather than starve other routes
+    slots = get_stream_slots()
+    if not slots.acquire(blocking=False):
+        response, status = error_response('TOO_MANY_STREAMS', 'Too many open event streams, retry shortly', 503)
+        response.headers['Retry-After'] = '5'
+        return response, status
 
+    broker = get_broker()
+    channel = booking_channel(customer_user_id)
+    heartbeat = current_app.config.get('SSE_HEARTBEAT_SECONDS', 15)
+    max_duration = current_app.config.get('SSE_MAX_STREAM_SECONDS', 300)
+    
+    def generate():
+        cursor = last_event_id
+        deadline = time.monotonic() + max_duration
+        yield 'retry: 3000\n\n'
+        # The stream ends after max_duration; the browser reconnects with Last-Event-ID
+        while time.monotonic() < deadline:
+            events = broker.wait_for(channel, cursor, timeout=heartbeat)
+            if not events:
+                yield ': keep-alive\n\n'
+                continue
+            for event in events:
+                cursor = event.id
+                yield event.to_sse()
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    # Runs once the server closes the response, even if the client left before the first event
+    response.call_on_close(slots.release)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,111 +1,110 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from src.responses import success_response, error_response
+from src.rate_limit import rate_limit
+from src.fieldsets import InvalidFieldsError, model_fieldset, requested_fields, select_fields, serialize, pick
 from src.models.business import db, Business, BusinessService, BusinessPhoto, BusinessReview
+from src.pricing import get_price_table
+from src.catalog import get_catalog
+from src.schemas import Schema, ValidationError, String, Integer, Number, List
 from datetime import datetime
 import json
 
 business_bp = Blueprint('business', __name__)
 
+# Searches are clamped to this radius so one request cannot scan the whole catalog
+MAX_SEARCH_RADIUS_MILES = 100
+
+SEARCH_FIELDS = (
+    'id', 'name', 'rating', 'ratingCount', 'distance', 'services', 'priceRange', 'priceTier',
+    'responseTime', 'isVerified', 'totalJobsCompleted'
+)
+
+BUSINESS_SERVICE_SCHEMA = Schema({
+    'category': String(required=True),
+    'name': String(required=True),
+    'description': String(),
+    'basePrice': Number(minimum=0),
+    'priceUnit': String(choices=('per_hour', 'per_item', 'per_load', 'flat_rate')),
+    'minimumCharge': Number(minimum=0)
+})
+
+BUSINESS_PROFILE_SCHEMA = Schema({
+    'businessName': String(required=True),
+    'businessType': String(required=True),
+    'description': String(),
+    'websiteUrl': String(),
+    'businessPhone': String(),
+    'businessEmail': String(),
+    'licenseNumber': String(),
+    'serviceRadiusMiles': Integer(minimum=1, default=25),
+    'services': List(schema=BUSINESS_SERVICE_SCHEMA)
+})
+
+REVIEW_SCHEMA = Schema({
+    'rating': Integer(required=True, minimum=1, maximum=5),
+    'bookingId': String(),
+    'reviewTitle': String(),
+    'reviewText': String()
+})
+
 @business_bp.route('/businesses/search', methods=['GET'])
+@rate_limit('business_search', default='120/minute;burst=30')
 def search_businesses():
     """Search for service businesses"""
     try:
         # Get query parameters
         lat = request.args.get('lat', type=float)
         lng = request.args.get('lng', type=float)
-        radius = request.args.get('radius', 10, type=int)
+        radius = min(max(request.args.get('radius', 10, type=int), 0), MAX_SEARCH_RADIUS_MILES)
         service_category = request.args.get('serviceCategory')
         min_rating = request.args.get('minRating', type=float)
         sort_by = request.args.get('sortBy', 'distance')
         page = request.args.get('page', 1, type=int)
         limit = request.args.get('limit', 10, type=int)
         
-        # Mock data for demonstration
-        mock_businesses = [
-            {
-                'id': 'business_123',
-                'name': 'Green Cleanup Services',
-                'rating': 4.8,
-                'ratingCount': 127,
-                'distance': 2.3,
-                'services': ['junk_removal', 'yard_cleanup'],
-                'priceRange': '$$',
-                'profileImageUrl': 'https://example.com/profile1.jpg',
-                'responseTime': 'within 2 hours',
-                'isVerified': True,
-                'totalJobsCompleted': 1250
-            },
-            {
-                'id': 'business_124',
-                'name': 'Rapid Trash Solutions',
-                'rating': 4.7,
-                'ratingCount': 89,
-                'distance': 3.1,
-                'services': ['furniture_removal', 'appliance_pickup'],
-                'priceRange': '$$$',
-                'profileImageUrl': 'https://example.com/profile2.jpg',
-                'responseTime': 'within 4 hours',
-                'isVerified': True,
-                'totalJobsCompleted': 856
-            },
-            {
-                'id': 'business_125',
-                'name': 'EcoWaste Pros',
-                'rating': 4.6,
-                'ratingCount': 156,
-                'distance': 4.2,
-                'services': ['recycling', 'hazardous_waste'],
-                'priceRange': '$',
-                'profileImageUrl': 'https://example.com/profile3.jpg',
-                'responseTime': 'same day',
-                'isVerified': False,
-                'totalJobsCompleted': 2100
-            }
-        ]
-        
-        # Apply filters
-        filtered_businesses = mock_businesses
-        
-        if service_category:
-            filtered_businesses = [b for b in filtered_businesses if service_category in b['services']]
-        
-        if min_rating:
-            filtered_businesses = [b for b in filtered_businesses if b['rating'] >= min_rating]
+        fields = requested_fields(SEARCH_FIELDS)
+        
+        # Filters run against the in-memory catalog; search does not query the database
+        catalog = get_catalog()
+        results = catalog.search(lat, lng, radius, service_category, min_rating)
+        ids = catalog.ids
+        
+        # Prices and the service area covering the customer come from the compiled
+        # table, so pricing and sorting by price need no queries either
+        price_table = get_price_table()
+        matched = [ids[row] for row, _ in results]
+        areas = price_table.areas_at(matched, lat, lng) if lat is not None and lng is not None else None
+        prices = price_table.price_ranges(matched, service_category, areas=areas)
         
         # Apply sorting
         if sort_by == 'distance':
-            filtered_businesses.sort(key=lambda x: x['distance'])
+            results.sort(key=lambda r: r[1] if r[1] is not None else float('inf'))
         elif sort_by == 'rating':
-            filtered_businesses.sort(key=lambda x: x['rating'], reverse=True)
+            results.sort(key=lambda r: catalog.rating[r[0]], reverse=True)
         elif sort_by == 'price':
-            price_order = {'$': 1, '$$': 2, '$$$': 3}
-            filtered_businesses.sort(key=lambda x: price_order.get(x['priceRange'], 2))
+            results.sort(key=lambda r: prices[ids[r[0]]]['min'] if prices[ids[r[0]]] else float('inf'))
         
         # Apply pagination
         start_idx = (page - 1) * limit
         end_idx = start_idx + limit
-        paginated_businesses = filtered_businesses[start_idx:end_idx]
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'businesses': paginated_businesses,
-                'totalCount': len(filtered_businesses),
-                'page': page,
-                'limit': limit
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
+        paginated_businesses = []
+        for row, distance in results[start_idx:end_idx]:
+            business = catalog.record(row)
+            business['distance'] = distance
+            business['priceRange'] = prices[business['id']]
+            paginated_businesses.append(business)
+        
+        return success_response({
+            'businesses': [pick(b, fields) for b in paginated_businesses],
+            'totalCount': len(results),
+            'page': page,
+            'limit': limit
         })
         
+    except InvalidFieldsError as e:
+        return error_response('INVALID_FIELDS', str(e), 400, details={'allowed': e.allowed})
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @business_bp.route('/businesses/<business_id>', methods=['GET'])
 def get_business_profile(business_id):
@@ -183,22 +182,10 @@ def get_business_profile(business_id):
             ]
         }
         
-        return jsonify({
-            'success': True,
-            'data': mock_business,
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
-        })
+        return success_response(mock_business)
         
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @business_bp.route('/businesses/profile', methods=['POST'])
 def create_business_profile():
@@ -207,24 +194,9 @@ def create_business_profile():
         data = request.get_json()
         
         if not data:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'INVALID_JSON',
-                    'message': 'Request body must be valid JSON'
-                }
-            }), 400
-        
-        required_fields = ['businessName', 'businessType']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'MISSING_FIELD',
-                        'message': f'Field {field} is required'
-                    }
-                }), 400
+            return error_response('INVALID_JSON', 'Request body must be valid JSON', 400)
+        
+        values = BUSINESS_PROFILE_SCHEMA.load(data)
         
         # Mock user ID - in real implementation, get from JWT token
         user_id = 'user_123'
@@ -234,14 +206,14 @@ def create_business_profile():
         
         if existing_business:
             # Update existing business
-            existing_business.business_name = data['businessName']
-            existing_business.business_type = data['businessType']
-            existing_business.description = data.get('description')
-            existing_business.website_url = data.get('websiteUrl')
-            existing_business.business_phone = data.get('businessPhone')
-            existing_business.business_email = data.get('businessEmail')
-            existing_business.license_number = data.get('licenseNumber')
-            existing_business.service_radius_miles = data.get('serviceRadiusMiles', 25)
+            existing_business.business_name = values['businessName']
+            existing_business.business_type = values['businessType']
+            existing_business.description = values['description']
+            existing_business.website_url = values['websiteUrl']
+            existing_business.business_phone = values['businessPhone']
+            existing_business.business_email = values['businessEmail']
+            existing_business.license_number = values['licenseNumber']
+            existing_business.service_radius_miles = values['serviceRadiusMiles']
             existing_business.updated_at = datetime.utcnow()
             
             business = existing_business
@@ -249,57 +221,46 @@ def create_business_profile():
             # Create new business
             business = Business(
                 user_id=user_id,
-                business_name=data['businessName'],
-                business_type=data['businessType'],
-                description=data.get('description'),
-                website_url=data.get('websiteUrl'),
-                business_phone=data.get('businessPhone'),
-                business_email=data.get('businessEmail'),
-                license_number=data.get('licenseNumber'),
-                service_radius_miles=data.get('serviceRadiusMiles', 25)
+                business_name=values['businessName'],
+                business_type=values['businessType'],
+                description=values['description'],
+                website_url=values['websiteUrl'],
+                business_phone=values['businessPhone'],
+                business_email=values['businessEmail'],
+                license_number=values['licenseNumber'],
+                service_radius_miles=values['serviceRadiusMiles']
             )
             db.session.add(business)
         
         # Handle services
-        if 'services' in data:
+        if values['services'] is not None:
             # Remove existing services
             BusinessService.query.filter_by(business_id=business.id).delete()
             
             # Add new services
-            for service_data in data['services']:
+            for service_data in values['services']:
                 service = BusinessService(
                     business_id=business.id,
                     service_category=service_data['category'],
                     service_name=service_data['name'],
-                    service_description=service_data.get('description'),
-                    base_price=service_data.get('basePrice'),
-                    price_unit=service_data.get('priceUnit'),
-                    minimum_charge=service_data.get('minimumCharge')
+                    service_description=service_data['description'],
+                    base_price=service_data['basePrice'],
+                    price_unit=service_data['priceUnit'],
+                    minimum_charge=service_data['minimumCharge']
                 )
                 db.session.add(service)
         
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'business': business.to_dict()
-            },
-            'message': 'Business profile updated successfully',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
-        })
+        return success_response({
+            'business': business.to_dict()
+        }, message='Business profile updated successfully')
         
+    except ValidationError as e:
+        return error_response('VALIDATION_ERROR', str(e), 400, details={'errors': e.errors})
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @business_bp.route('/businesses/profile', methods=['GET'])
 def get_business_profile_current():
@@ -311,32 +272,14 @@ def get_business_profile_current():
         business = Business.query.filter_by(user_id=user_id).first()
         
         if not business:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'BUSINESS_NOT_FOUND',
-                    'message': 'Business profile not found'
-                }
-            }), 404
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'business': business.to_dict()
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
+            return error_response('BUSINESS_NOT_FOUND', 'Business profile not found', 404)
+        
+        return success_response({
+            'business': business.to_dict()
         })
         
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @business_bp.route('/businesses/<business_id>/reviews', methods=['POST'])
 def create_business_review(business_id):
@@ -345,33 +288,9 @@ def create_business_review(business_id):
         data = request.get_json()
         
         if not data:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'INVALID_JSON',
-                    'message': 'Request body must be valid JSON'
-                }
-            }), 400
-        
-        required_fields = ['rating']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'MISSING_FIELD',
-                        'message': f'Field {field} is required'
-                    }
-                }), 400
-        
-        if not (1 <= data['rating'] <= 5):
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'INVALID_RATING',
-                    'message': 'Rating must be between 1 and 5'
-                }
-            }), 400
+            return error_response('INVALID_JSON', 'Request body must be valid JSON', 400)
+        
+        values = REVIEW_SCHEMA.load(data)
         
         # Mock user ID - in real implementation, get from JWT token
         reviewer_user_id = 'user_456'
@@ -379,35 +298,24 @@ def create_business_review(business_id):
         review = BusinessReview(
             business_id=business_id,
             reviewer_user_id=reviewer_user_id,
-            booking_id=data.get('bookingId'),
-            rating=data['rating'],
-            review_title=data.get('reviewTitle'),
-            review_text=data.get('reviewText')
+            booking_id=values['bookingId'],
+            rating=values['rating'],
+            review_title=values['reviewTitle'],
+            review_text=values['reviewText']
         )
         
         db.session.add(review)
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'review': review.to_dict()
-            },
-            'message': 'Review created successfully',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
-        }), 201
+        return success_response({
+            'review': review.to_dict()
+        }, message='Review created successfully', status=201)
         
+    except ValidationError as e:
+        return error_response('VALIDATION_ERROR', str(e), 400, details={'errors': e.errors})
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @business_bp.route('/businesses/<business_id>/reviews', methods=['GET'])
 def get_business_reviews(business_id):
@@ -416,34 +324,27 @@ def get_business_reviews(business_id):
         page = request.args.get('page', 1, type=int)
         limit = request.args.get('limit', 10, type=int)
         
-        reviews = BusinessReview.query.filter_by(
+        fields = model_fieldset(BusinessReview)
+        
+        query = BusinessReview.query.filter_by(
             business_id=business_id,
             is_public=True
-        ).order_by(BusinessReview.created_at.desc()).paginate(
-            page=page, per_page=limit, error_out=False
-        )
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'reviews': [review.to_dict() for review in reviews.items],
-                'totalCount': reviews.total,
-                'page': page,
-                'limit': limit,
-                'hasNext': reviews.has_next,
-                'hasPrev': reviews.has_prev
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
+        ).order_by(BusinessReview.created_at.desc())
+        if fields:
+            query = select_fields(query, BusinessReview, fields)
+        reviews = query.paginate(page=page, per_page=limit, error_out=False)
+        
+        return success_response({
+            'reviews': serialize(reviews.items, fields, BusinessReview),
+            'totalCount': reviews.total,
+            'page': page,
+            'limit': limit,
+            'hasNext': reviews.has_next,
+            'hasPrev': reviews.has_prev
         })
         
+    except InvalidFieldsError as e:
+        return error_response('INVALID_FIELDS', str(e), 400, details={'allowed': e.allowed})
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
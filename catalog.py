@@ -0,0 +1,370 @@
+"""Process-local catalog of the business fields search reads.
+
+Columns live in typed arrays indexed by row number rather than in ORM objects
+or dicts: about 250 bytes per business including ids and names, so 100k
+businesses fit in roughly 25 MB. Category bitmasks are plain ints, so any
+number of categories fits. A location search only visits the rows in the
+geohash cells under the search circle, unless the circle is so wide that one
+pass over every row is cheaper.
+
+The catalog loads on the first request and then stays current two ways.
+Commits in this process queue the businesses they touched, and a poll every
+CATALOG_REFRESH_SECONDS picks up rows other workers changed, by updated_at.
+Either way only those rows are reloaded, into a copy that then replaces the
+published catalog, so readers never see a half-applied refresh. The copy and
+reload run off the request path (see snapshot.py), and all edits queued while
+one runs are applied together by the next, so a burst of edits costs one copy.
+"""
+from src.models.business import Business, BusinessService
+from src.coverage import geohash_encode, cells_in_bbox, cell_size, haversine_miles
+from src.pricing import get_price_table, PRICE_TIERS
+from src.snapshot import Snapshot, refresh_in_background
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from array import array
+from datetime import datetime, timedelta
+import math
+import sys
+import threading
+
+# Geohash precision of the search index; 5 characters is a cell of about 4.9 x 4.9 km
+CELL_PRECISION = 5
+# Searches spanning more index cells than this scan every row instead
+MAX_SEARCH_CELLS = 1024
+# Overlap re-read on each poll, so rows committed out of updated_at order are not missed
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+VERIFIED = 1
+ACTIVE = 2
+
+class BusinessCatalog:
+    __slots__ = ('ids', 'index', 'names', 'lat', 'lng', 'radius', 'categories', 'rating', 'rating_count',
+                 'jobs', 'response_hours', 'tier', 'flags', 'category_bits', 'cells', 'watermark')
+
+    def __init__(self):
+        self.ids = []
+        self.index = {}
+        self.names = []
+        self.lat = array('d')
+        self.lng = array('d')
+        self.radius = array('f')
+        # Bitmask per row as a plain int, so the number of categories is unbounded
+        self.categories = []
+        self.rating = array('f')
+        self.rating_count = array('I')
+        self.jobs = array('I')
+        self.response_hours = array('H')
+        self.tier = array('b')
+        self.flags = array('B')
+        # category name -> bit in ``categories``
+        self.category_bits = {}
+        # geohash cell -> row numbers located in it
+        self.cells = {}
+        self.watermark = None
+
+    def __len__(self):
+        return sum(1 for flags in self.flags if flags & ACTIVE)
+
+    def copy(self):
+        """An independent copy to apply changes to before it replaces this one"""
+        other = BusinessCatalog()
+        other.ids = self.ids[:]
+        other.index = dict(self.index)
+        other.names = self.names[:]
+        for name in ('lat', 'lng', 'radius', 'categories', 'rating', 'rating_count', 'jobs',
+                     'response_hours', 'tier', 'flags'):
+            setattr(other, name, getattr(self, name)[:])
+        other.category_bits = dict(self.category_bits)
+        other.cells = {cell: rows[:] for cell, rows in self.cells.items()}
+        other.watermark = self.watermark
+        return other
+
+    def category_mask(self, names):
+        mask = 0
+        for name in names:
+            bit = self.category_bits.get(name)
+            if bit is None:
+                bit = self.category_bits[name] = len(self.category_bits)
+            mask |= 1 << bit
+        return mask
+
+    def _cell(self, row):
+        if math.isnan(self.lat[row]):
+            return None
+        return geohash_encode(self.lat[row], self.lng[row], CELL_PRECISION)
+
+    def upsert(self, business, categories, tier):
+        address = business.business_address if isinstance(business.business_address, dict) else {}
+        lat, lng = address.get('lat'), address.get('lng')
+        values = (
+            business.business_name or '',
+            float(lat) if lat is not None and lng is not None else math.nan,
+            float(lng) if lat is not None and lng is not None else math.nan,
+            float(business.service_radius_miles or 0),
+            self.category_mask(categories),
+            float(business.rating_average or 0),
+            business.rating_count or 0,
+            business.total_jobs_completed or 0,
+            min(business.response_time_hours or 0, 65535),
+            tier,
+            (VERIFIED if business.is_verified else 0) | (ACTIVE if business.is_active else 0)
+        )
+        columns = (self.names, self.lat, self.lng, self.radius, self.categories, self.rating, self.rating_count,
+                   self.jobs, self.response_hours, self.tier, self.flags)
+
+        row = self.index.get(business.id)
+        if row is None:
+            row = self.index[business.id] = len(self.ids)
+            self.ids.append(business.id)
+            for column, value in zip(columns, values):
+                column.append(value)
+        else:
+            self._unindex(row)
+            for column, value in zip(columns, values):
+                column[row] = value
+        cell = self._cell(row)
+        if cell is not None and self.flags[row] & ACTIVE:
+            self.cells.setdefault(cell, array('I')).append(row)
+
+    def _unindex(self, row):
+        rows = self.cells.get(self._cell(row))
+        if rows is not None and row in rows:
+            rows.remove(row)
+
+    def remove(self, business_id):
+        """Deleted rows keep their slot, inactive, until the next full load"""
+        row = self.index.get(business_id)
+        if row is None:
+            return
+        self._unindex(row)
+        self.flags[row] = 0
+
+    def search(self, lat=None, lng=None, radius=None, category=None, min_rating=None):
+        """[(row, distance)] of active businesses matching the filters; distance is None without a location"""
+        mask = 0
+        if category:
+            bit = self.category_bits.get(category)
+            if bit is None:
+                return []
+            mask = 1 << bit
+        min_rating = min_rating or 0
+        categories, rating, flags = self.categories, self.rating, self.flags
+
+        if lat is None or lng is None:
+            return [
+                (row, None) for row, (f, c, r) in enumerate(zip(flags, categories, rating))
+                if f & ACTIVE and (not mask or c & mask) and r >= min_rating
+            ]
+
+        d_lat = radius / 69.0
+        d_lng = radius / (69.0 * max(math.cos(math.radians(lat)), 0.01))
+        min_lat, max_lat = max(lat - d_lat, -90.0), min(lat + d_lat, 90.0)
+        boxes = _wrap_longitude(min_lat, lng - d_lng, max_lat, lng + d_lng)
+        lats, lngs = self.lat, self.lng
+
+        lat_step, lng_step = cell_size(CELL_PRECISION)
+        cell_count = sum(
+            (math.ceil((box[2] - box[0]) / lat_step) + 1) * (math.ceil((box[3] - box[1]) / lng_step) + 1)
+            for box in boxes
+        )
+        if cell_count > min(MAX_SEARCH_CELLS, len(self.ids)):
+            # A wide circle touches most cells anyway; one pass over the rows is cheaper
+            candidates = (row for row, f in enumerate(flags) if f & ACTIVE)
+        else:
+            candidates = (
+                row for box in boxes for cell in cells_in_bbox(*box, CELL_PRECISION) for row in self.cells.get(cell, ())
+            )
+
+        results = []
+        for row in candidates:
+            # Cheap bounding box and filter checks first; haversine only for the survivors
+            if not min_lat <= lats[row] <= max_lat:
+                continue
+            if not any(box[1] <= lngs[row] <= box[3] for box in boxes):
+                continue
+            if (mask and not categories[row] & mask) or rating[row] < min_rating:
+                continue
+            distance = haversine_miles(lat, lng, lats[row], lngs[row])
+            if distance <= radius:
+                results.append((row, round(distance, 1)))
+        return results
+
+    def record(self, row):
+        return {
+            'id': self.ids[row],
+            'name': self.names[row],
+            'rating': round(self.rating[row], 2),
+            'ratingCount': self.rating_count[row],
+            'services': [name for name, bit in self.category_bits.items() if self.categories[row] >> bit & 1],
+            'priceTier': PRICE_TIERS[self.tier[row]] if self.tier[row] >= 0 else None,
+            'responseTime': f'within {self.response_hours[row]} hours' if self.response_hours[row] else None,
+            'isVerified': bool(self.flags[row] & VERIFIED),
+            'totalJobsCompleted': self.jobs[row]
+        }
+
+    def memory_footprint(self):
+        """Approximate bytes held, per structure and in total"""
+        footprint = {}
+        for name in ('lat', 'lng', 'radius', 'rating', 'rating_count', 'jobs',
+                     'response_hours', 'tier', 'flags'):
+            column = getattr(self, name)
+            footprint[name] = column.buffer_info()[1] * column.itemsize
+        footprint['categories'] = sys.getsizeof(self.categories) + sum(sys.getsizeof(c) for c in self.categories)
+        footprint['ids'] = sys.getsizeof(self.ids) + sum(sys.getsizeof(i) for i in self.ids)
+        footprint['names'] = sys.getsizeof(self.names) + sum(sys.getsizeof(n) for n in self.names)
+        footprint['index'] = sys.getsizeof(self.index)
+        footprint['cells'] = sys.getsizeof(self.cells) + sum(
+            sys.getsizeof(cell) + rows.buffer_info()[1] * rows.itemsize for cell, rows in self.cells.items()
+        )
+        footprint['total'] = sum(footprint.values())
+        return footprint
+
+def _wrap_longitude(min_lat, min_lng, max_lat, max_lng):
+    """A bounding box as one or two boxes inside -180..180, split where it crosses the antimeridian"""
+    if max_lng - min_lng >= 360.0:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    if min_lng < -180.0:
+        return [(min_lat, min_lng + 360.0, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng)]
+    if max_lng > 180.0:
+        return [(min_lat, min_lng, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng - 360.0)]
+    return [(min_lat, min_lng, max_lat, max_lng)]
+
+def _business_columns():
+    return Business.query.with_entities(
+        Business.id, Business.business_name, Business.business_address, Business.service_radius_miles,
+        Business.rating_average, Business.rating_count, Business.total_jobs_completed,
+        Business.response_time_hours, Business.is_verified, Business.is_active, Business.updated_at
+    )
+
+def _apply(catalog, business_ids=None):
+    """Reload ``business_ids`` (all rows when None) from the database into ``catalog``"""
+    services = BusinessService.query.with_entities(BusinessService.business_id, BusinessService.service_category).filter(
+        BusinessService.is_available.is_(True)
+    )
+    query = _business_columns()
+    if business_ids is not None:
+        services = services.filter(BusinessService.business_id.in_(business_ids))
+        query = query.filter(Business.id.in_(business_ids))
+
+    categories = {}
+    for business_id, category in services:
+        categories.setdefault(business_id, []).append(category)
+
+    price_table = get_price_table()
+    found = set()
+    for business in query.yield_per(5000):
+        found.add(business.id)
+        catalog.upsert(business, categories.get(business.id, ()), price_table.tier(business.id))
+        if business.updated_at and (catalog.watermark is None or business.updated_at > catalog.watermark):
+            catalog.watermark = business.updated_at
+    for business_id in set(business_ids or ()) - found:
+        catalog.remove(business_id)
+
+def load_catalog():
+    catalog = BusinessCatalog()
+    _apply(catalog)
+    return catalog
+
+def _changed_since(watermark):
+    since = watermark - REFRESH_OVERLAP
+    ids = {row.id for row in Business.query.with_entities(Business.id).filter(Business.updated_at > since)}
+    ids.update(
+        row.business_id for row in BusinessService.query.with_entities(BusinessService.business_id).filter(
+            BusinessService.updated_at > since
+        )
+    )
+    return ids
+
+class CatalogState:
+    """Per-app published catalog and the business edits waiting for the next refresh"""
+
+    def __init__(self, app):
+        self.refresh_seconds = app.config.get('CATALOG_REFRESH_SECONDS', 30)
+        self.pending = set()
+        # Guards ``pending``, which commit hooks fill while a refresh may be running
+        self.pending_lock = threading.Lock()
+        self.checked_at = None
+        self.poll_requested = False
+        self.preloaded = False
+        self.snapshot = Snapshot(app, 'business catalog', self._build, refresh_in_background(app))
+
+    def queue(self, business_ids):
+        with self.pending_lock:
+            self.pending.update(business_ids)
+
+    def _build(self, catalog):
+        with self.pending_lock:
+            changed, self.pending = self.pending, set()
+        if catalog is None:
+            self.checked_at = datetime.utcnow()
+            return load_catalog()
+        if self.poll_requested and catalog.watermark is not None:
+            self.poll_requested = False
+            changed |= _changed_since(catalog.watermark)
+        if not changed:
+            return None
+        updated = catalog.copy()
+        _apply(updated, list(changed))
+        return updated
+
+def get_catalog():
+    """The published catalog. Queued local changes and, once per refresh interval,
+    other workers' changes start a refresh that replaces it when done.
+
+    The returned catalog is never modified afterwards; callers can read it without a lock.
+    """
+    state = current_app.extensions['business_catalog']
+    state.snapshot.get()
+    now = datetime.utcnow()
+    poll_due = state.checked_at is None or (now - state.checked_at).total_seconds() >= state.refresh_seconds
+    if poll_due:
+        state.checked_at = now
+        state.poll_requested = True
+    if poll_due or state.pending:
+        state.snapshot.refresh()
+    return state.snapshot.value
+
+def _touched_businesses(session, flush_context):
+    touched = session.info.setdefault('catalog_business_ids', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Business):
+            touched.add(obj.id)
+        elif isinstance(obj, BusinessService):
+            touched.add(obj.business_id)
+
+def _queue_committed(session):
+    touched = session.info.pop('catalog_business_ids', None)
+    if touched and has_app_context():
+        state = current_app.extensions.get('business_catalog')
+        if state is not None:
+            state.queue(touched)
+
+def _discard_rolled_back(session):
+    session.info.pop('catalog_business_ids', None)
+
+def _preload():
+    # Once per process, on its first request, so CLI commands never load the catalog
+    state = current_app.extensions['business_catalog']
+    if state.preloaded:
+        return
+    state.preloaded = True
+    try:
+        catalog = get_catalog()
+    except Exception:
+        # Schema not created yet; the first search loads it instead
+        current_app.logger.warning('Business catalog not preloaded', exc_info=True)
+        return
+    current_app.logger.info('Business catalog loaded: %d businesses, %d bytes',
+                            len(catalog), catalog.memory_footprint()['total'])
+
+def init_app(app):
+    """Track committed business edits and load the catalog on the first request (CATALOG_PRELOAD)"""
+    app.extensions['business_catalog'] = CatalogState(app)
+    for name, fn in (('after_flush', _touched_businesses), ('after_commit', _queue_committed),
+                     ('after_rollback', _discard_rolled_back)):
+        if not event.contains(Session, name, fn):
+            event.listen(Session, name, fn)
+
+    if app.config.get('CATALOG_PRELOAD'):
+        app.before_request(_preload)
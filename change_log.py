@@ -0,0 +1,98 @@
+from src.models.user import db
+from src.models.schedule import PickupSchedule, PickupEvent, UserScheduleSubscription
+from src.models.booking import Booking
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+
+class ChangeLog(db.Model):
+    """Append-only record of changes to synced entities.
+
+    ``seq`` only ever increases, so a client that remembers the last seq it saw
+    can ask for everything after it. Each change is written once per scope
+    (``user:<id>``, ``business:<id>``, ``schedule:<id>``) so a feed only scans
+    the rows its caller can see.
+    """
+    __tablename__ = 'change_log'
+    __table_args__ = (
+        db.Index('ix_change_log_scope_seq', 'scope', 'seq'),
+        {'sqlite_autoincrement': True}
+    )
+
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    scope = db.Column(db.String(64), nullable=False)
+    entity_type = db.Column(db.String(50), nullable=False)
+    entity_id = db.Column(db.String(36), nullable=False)
+    operation = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+# Synced models: model -> (entity type, scopes(obj))
+TRACKED = {
+    Booking: ('booking', lambda b: [f'user:{b.customer_user_id}', f'business:{b.business_id}']),
+    UserScheduleSubscription: ('subscription', lambda s: [f'user:{s.user_id}']),
+    PickupSchedule: ('schedule', lambda s: [f'schedule:{s.id}']),
+    PickupEvent: ('event', lambda e: [f'schedule:{e.schedule_id}']),
+}
+
+# entity type -> model, for loading current state in the feed
+ENTITY_MODELS = {entity_type: model for model, (entity_type, _) in TRACKED.items()}
+
+_settings = {
+    'enabled': False
+}
+
+def _record_changes(session, flush_context):
+    # session.new/dirty/deleted still hold the pre-flush sets here, and IDs are assigned
+    if not _settings['enabled']:
+        return
+    now = datetime.utcnow()
+    rows = []
+    for objects, operation in ((session.new, 'upsert'), (session.dirty, 'upsert'), (session.deleted, 'delete')):
+        for obj in objects:
+            tracked = TRACKED.get(type(obj))
+            if tracked is None:
+                continue
+            if objects is session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            entity_type, scopes = tracked
+            for scope in scopes(obj):
+                rows.append({
+                    'scope': scope,
+                    'entity_type': entity_type,
+                    'entity_id': obj.id,
+                    'operation': operation,
+                    'created_at': now
+                })
+    if rows:
+        session.connection().execute(ChangeLog.__table__.insert(), rows)
+
+def head_seq():
+    return db.session.query(func.max(ChangeLog.seq)).scalar() or 0
+
+def oldest_seq():
+    return db.session.query(func.min(ChangeLog.seq)).scalar()
+
+def prune(older_than_days=90):
+    """Delete log entries older than the retention window; clients behind it must resync"""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    deleted = ChangeLog.query.filter(ChangeLog.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+def expire_cursors():
+    """Drop the log after a bulk load that bypassed it, so every client cursor gets 410 and reloads.
+
+    Two markers in a scope no feed reads are left behind: the retained log then
+    starts two past the old head, which puts even a cursor at that head behind it.
+    """
+    markers = [{'scope': 'system', 'entity_type': 'reset', 'entity_id': '', 'operation': 'reset',
+                'created_at': datetime.utcnow()}] * 2
+    db.session.execute(ChangeLog.__table__.insert(), markers)
+    ChangeLog.query.filter(ChangeLog.seq < head_seq()).delete(synchronize_session=False)
+    db.session.commit()
+
+def init_app(app):
+    """Record changes to synced models on every flush (SYNC_CHANGE_LOG_ENABLED)"""
+    _settings['enabled'] = app.config.get('SYNC_CHANGE_LOG_ENABLED', True)
+    if not event.contains(Session, 'after_flush', _record_changes):
+        event.listen(Session, 'after_flush', _record_changes)
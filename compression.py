@@ -0,0 +1,103 @@
+from flask import request
+from src.static_assets import accepted_encodings
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+    'text/xml'
+}
+
+_settings = {
+    'min_size': 1024,
+    'gzip_level': 6,
+    'br_level': 4
+}
+
+def _choose_encoding(accept_encoding):
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+def _compressor(encoding):
+    """Return (compress, flush) callables for a streaming compressor"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=_settings['br_level'])
+        return compressor.process, compressor.finish
+    # wbits=31 selects the gzip container
+    compressor = zlib.compressobj(_settings['gzip_level'], zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+def compress_bytes(data, encoding):
+    compress, flush = _compressor(encoding)
+    return compress(data) + flush()
+
+def _compress_stream(chunks, encoding):
+    compress, flush = _compressor(encoding)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            out = compress(chunk)
+            if out:
+                yield out
+        yield flush()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+def _compress_response(response):
+    if (
+        response.direct_passthrough
+        or response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or request.method == 'HEAD'
+    ):
+        return response
+
+    encoding = _choose_encoding(request.headers.get('Accept-Encoding', ''))
+    response.vary.add('Accept-Encoding')
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        # Unknown length: compress incrementally as the body is produced
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < _settings['min_size']:
+            return response
+        response.set_data(compress_bytes(data, encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    if response.headers.get('ETag') and not response.headers['ETag'].startswith('W/'):
+        response.headers['ETag'] = 'W/' + response.headers['ETag']
+    return response
+
+def init_app(app):
+    """Negotiate gzip/brotli compression for API responses over COMPRESS_MIN_SIZE"""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+    _settings['min_size'] = app.config.get('COMPRESS_MIN_SIZE', 1024)
+    _settings['gzip_level'] = app.config.get('COMPRESS_LEVEL', 6)
+    _settings['br_level'] = app.config.get('COMPRESS_BR_LEVEL', 4)
+    app.after_request(_compress_response)
@@ -0,0 +1,159 @@
+import os
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+BASE_DIR = os.path.dirname(__file__)
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+def get_database_url():
+    """Resolve the database URL, defaulting to the bundled SQLite file"""
+    url = os.environ.get('DATABASE_URL')
+    if url:
+        # Heroku-style URLs use a scheme SQLAlchemy no longer accepts
+        if url.startswith('postgres://'):
+            url = 'postgresql://' + url[len('postgres://'):]
+        return url
+    return f"sqlite:///{os.path.join(BASE_DIR, 'database', 'app.db')}"
+
+def build_engine_options(url):
+    """Engine options for the given URL, tuned from environment variables"""
+    options = {
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True)
+    }
+    if url.startswith('sqlite'):
+        options['connect_args'] = {
+            # Seconds the driver waits on a locked database before raising
+            'timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000.0,
+            'check_same_thread': False
+        }
+        if ':memory:' not in url and url not in ('sqlite://', 'sqlite:///'):
+            options['pool_size'] = _env_int('DB_POOL_SIZE', 5)
+            options['max_overflow'] = _env_int('DB_MAX_OVERFLOW', 10)
+    else:
+        options['pool_size'] = _env_int('DB_POOL_SIZE', 10)
+        options['max_overflow'] = _env_int('DB_MAX_OVERFLOW', 20)
+        options['pool_timeout'] = _env_int('DB_POOL_TIMEOUT', 30)
+        options['pool_recycle'] = _env_int('DB_POOL_RECYCLE', 1800)
+    return options
+
+def configure_database(config):
+    """Derive engine options from the final database URL, once every override is applied.
+
+    Options set explicitly in SQLALCHEMY_ENGINE_OPTIONS win over the derived ones.
+    The directory of an absolute SQLite database path is created here rather than
+    at import; Flask-SQLAlchemy already resolves relative paths into the instance folder.
+    """
+    url = config['SQLALCHEMY_DATABASE_URI']
+    options = build_engine_options(url)
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    database = make_url(url).database
+    if url.startswith('sqlite') and database and os.path.isabs(database):
+        os.makedirs(os.path.dirname(database), exist_ok=True)
+
+# SQLite pragmas applied to every new connection. WAL lets readers run alongside a
+# writer, and synchronous=NORMAL is durable across application crashes in WAL mode.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+    # Negative cache_size is in KiB
+    'cache_size': -_env_int('SQLITE_CACHE_SIZE_KB', 64000),
+    'mmap_size': _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+    'temp_store': 'MEMORY'
+}
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply SQLITE_PRAGMAS to each new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+class Config:
+    """Default application configuration, overridable through the environment"""
+
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
+    # Engine options are derived from the final URI in create_app (see configure_database)
+    SQLALCHEMY_DATABASE_URI = get_database_url()
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Schema is created explicitly with `flask init-db` unless this is set
+    AUTO_CREATE_SCHEMA = _env_bool('AUTO_CREATE_SCHEMA', False)
+    # Per-endpoint latency histograms, Server-Timing headers and /metrics
+    METRICS_ENABLED = _env_bool('METRICS_ENABLED', True)
+    SERVER_TIMING_ENABLED = _env_bool('SERVER_TIMING_ENABLED', True)
+    # SQL profiler: slow-query threshold, N+1 repeat threshold and production sampling.
+    # With TESTING set every request is profiled and N+1 patterns raise.
+    QUERY_PROFILER_ENABLED = _env_bool('QUERY_PROFILER_ENABLED', True)
+    SLOW_QUERY_MS = _env_int('SLOW_QUERY_MS', 100)
+    N_PLUS_ONE_THRESHOLD = _env_int('N_PLUS_ONE_THRESHOLD', 10)
+    QUERY_PROFILER_SAMPLE_RATE = float(os.environ.get('QUERY_PROFILER_SAMPLE_RATE', '0.05'))
+    # Negotiated gzip/brotli compression for API responses
+    COMPRESS_ENABLED = _env_bool('COMPRESS_ENABLED', True)
+    COMPRESS_MIN_SIZE = _env_int('COMPRESS_MIN_SIZE', 1024)
+    COMPRESS_LEVEL = _env_int('COMPRESS_LEVEL', 6)
+    COMPRESS_BR_LEVEL = _env_int('COMPRESS_BR_LEVEL', 4)
+    # Local durable job queue (separate SQLite file, no broker needed)
+    JOBS_DATABASE_PATH = os.environ.get('JOBS_DATABASE_PATH', os.path.join(BASE_DIR, 'database', 'jobs.db'))
+    JOBS_BACKOFF_BASE = float(os.environ.get('JOBS_BACKOFF_BASE', '5'))
+    JOBS_BACKOFF_MAX = float(os.environ.get('JOBS_BACKOFF_MAX', '3600'))
+    # Token-bucket rate limiting. Use RATE_LIMIT_STORAGE=sqlite with several workers;
+    # a path on /dev/shm keeps the shared buckets in memory.
+    RATE_LIMIT_ENABLED = _env_bool('RATE_LIMIT_ENABLED', True)
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'memory')
+    RATE_LIMIT_STORAGE_PATH = os.environ.get('RATE_LIMIT_STORAGE_PATH', os.path.join(BASE_DIR, 'database', 'ratelimit.db'))
+    RATE_LIMIT_TRUST_PROXY = _env_bool('RATE_LIMIT_TRUST_PROXY', False)
+    # Per-route overrides, e.g. {'schedule_lookup': '300/minute;burst=50', 'business_search:user': '600/minute'}
+    RATE_LIMITS = {}
+    # /api/batch limits: sub-requests per call and the worker-wide thread pool for concurrent reads
+    BATCH_MAX_REQUESTS = _env_int('BATCH_MAX_REQUESTS', 20)
+    BATCH_MAX_WORKERS = _env_int('BATCH_MAX_WORKERS', 4)
+    # Booking status event stream: 'memory' for one process, 'sqlite' to fan out across workers
+    EVENT_BROKER = os.environ.get('EVENT_BROKER', 'memory')
+    EVENT_BROKER_PATH = os.environ.get('EVENT_BROKER_PATH', os.path.join(BASE_DIR, 'database', 'events.db'))
+    EVENT_BROKER_POLL_INTERVAL = float(os.environ.get('EVENT_BROKER_POLL_INTERVAL', '0.5'))
+    EVENT_BUFFER_SIZE = _env_int('EVENT_BUFFER_SIZE', 100)
+    SSE_HEARTBEAT_SECONDS = _env_int('SSE_HEARTBEAT_SECONDS', 15)
+    SSE_MAX_STREAM_SECONDS = _env_int('SSE_MAX_STREAM_SECONDS', 300)
+    # Open streams per worker process; keep it below the worker's thread count
+    SSE_MAX_CONNECTIONS = _env_int('SSE_MAX_CONNECTIONS', 50)
+    # Delta sync change log. On PostgreSQL set a small lag (e.g. 2) so entries from
+    # transactions that commit out of seq order are not skipped by a client cursor.
+    SYNC_CHANGE_LOG_ENABLED = _env_bool('SYNC_CHANGE_LOG_ENABLED', True)
+    SYNC_VISIBILITY_LAG_SECONDS = _env_int('SYNC_VISIBILITY_LAG_SECONDS', 0)
+    SYNC_RETENTION_DAYS = _env_int('SYNC_RETENTION_DAYS', 90)
+    # Incremental analytics rollups; disable for bulk loads and run rollups-backfill after
+    ROLLUPS_ENABLED = _env_bool('ROLLUPS_ENABLED', True)
+    # Map tiles: rendered payloads are cached per z/x/y and dropped on business or service area edits
+    MAP_TILE_CACHE_ENABLED = _env_bool('MAP_TILE_CACHE_ENABLED', True)
+    MAP_TILE_TTL_SECONDS = _env_int('MAP_TILE_TTL_SECONDS', 3600)
+    MAP_MAX_ZOOM = _env_int('MAP_MAX_ZOOM', 18)
+    # Providers are merged into clusters up to this zoom, one per MAP_CLUSTER_CELL_PX square
+    MAP_CLUSTER_MAX_ZOOM = _env_int('MAP_CLUSTER_MAX_ZOOM', 15)
+    MAP_CLUSTER_CELL_PX = _env_int('MAP_CLUSTER_CELL_PX', 64)
+    MAP_SIMPLIFY_TOLERANCE_PX = float(os.environ.get('MAP_SIMPLIFY_TOLERANCE_PX', '1.0'))
+    # Seconds a compiled price table is reused before picking up other workers' price edits
+    PRICING_TABLE_TTL_SECONDS = _env_int('PRICING_TABLE_TTL_SECONDS', 300)
+    # In-memory business catalog behind /businesses/search
+    CATALOG_PRELOAD = _env_bool('CATALOG_PRELOAD', True)
+    CATALOG_REFRESH_SECONDS = _env_int('CATALOG_REFRESH_SECONDS', 30)
+    # The catalog and price table are rebuilt in a background thread and swapped in.
+    # Set SNAPSHOT_REFRESH_IN_BACKGROUND to override; unset, it is on unless TESTING
+    # Attribute names of optional blueprints to leave unregistered, e.g. "routing_bp"
+    DISABLED_BLUEPRINTS = [name for name in os.environ.get('DISABLED_BLUEPRINTS', '').split(',') if name]
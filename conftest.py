@@ -0,0 +1,26 @@
+import pytest
+from src.main import create_app
+from src.models.user import db
+
+@pytest.fixture
+def app(tmp_path):
+    """App on a fresh in-memory database with the schema created.
+
+    TESTING makes the query profiler raise on N+1 patterns, so route tests also
+    guard against per-row queries.
+    """
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'AUTO_CREATE_SCHEMA': True,
+        'JOBS_DATABASE_PATH': str(tmp_path / 'jobs.db'),
+        'RATE_LIMIT_ENABLED': False
+    })
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,394 @@
+from src.models.business import db, BusinessService
+from sqlalchemy import and_, or_
+from datetime import datetime
+from functools import partial
+import math
+import uuid
+
+# Geohash precision of the coverage grid; 5 characters is a cell of about 4.9 x 4.9 km
+GRID_PRECISION = 5
+AREA_TYPES = ('radius', 'zip', 'polygon')
+MAX_CELLS_PER_AREA = 20000
+EARTH_RADIUS_MILES = 3958.8
+# Geohash prefix ranges read per bounding box lookup
+MAX_BBOX_PREFIXES = 32
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_BASE32_INDEX = {c: i for i, c in enumerate(_BASE32)}
+
+def haversine_miles(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in miles"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+def geohash_encode(lat, lng, precision=GRID_PRECISION):
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                value = value * 2 + 1
+                lng_lo = mid
+            else:
+                value *= 2
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = value * 2 + 1
+                lat_lo = mid
+            else:
+                value *= 2
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+def geohash_bounds(cell):
+    """(min_lat, min_lng, max_lat, max_lng) of a geohash cell"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+    for c in cell:
+        value = _BASE32_INDEX[c]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                if bit:
+                    lng_lo = mid
+                else:
+                    lng_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return lat_lo, lng_lo, lat_hi, lng_hi
+
+def cell_size(precision=GRID_PRECISION):
+    """(lat degrees, lng degrees) spanned by one cell"""
+    lng_bits = (precision * 5 + 1) // 2
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+def cells_in_bbox(min_lat, min_lng, max_lat, max_lng, precision=GRID_PRECISION):
+    """Geohash cells overlapping a bounding box"""
+    lat_step, lng_step = cell_size(precision)
+    lat = math.floor((min_lat + 90.0) / lat_step) * lat_step - 90.0
+    while lat < max_lat:
+        lng = math.floor((min_lng + 180.0) / lng_step) * lng_step - 180.0
+        while lng < max_lng:
+            yield geohash_encode(lat + lat_step / 2, lng + lng_step / 2, precision)
+            lng += lng_step
+        lat += lat_step
+
+def point_in_polygon(lat, lng, polygon):
+    """Ray casting; polygon is a list of [lat, lng] vertices"""
+    inside = False
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        lat_i, lng_i = polygon[i]
+        lat_j, lng_j = polygon[j]
+        if (lat_i > lat) != (lat_j > lat):
+            crossing = lng_i + (lat - lat_i) * (lng_j - lng_i) / (lat_j - lat_i)
+            if lng < crossing:
+                inside = not inside
+        j = i
+    return inside
+
+def _segments_intersect(p1, p2, q1, q2):
+    def orient(a, b, c):
+        value = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+        return (value > 0) - (value < 0)
+    o1, o2 = orient(p1, p2, q1), orient(p1, p2, q2)
+    o3, o4 = orient(q1, q2, p1), orient(q1, q2, p2)
+    return o1 != o2 and o3 != o4
+
+def _box_corners(bounds):
+    min_lat, min_lng, max_lat, max_lng = bounds
+    return [(min_lat, min_lng), (min_lat, max_lng), (max_lat, max_lng), (max_lat, min_lng)]
+
+def _classify_polygon(bounds, polygon):
+    """'full', 'partial' or None for a cell against a polygon"""
+    corners = _box_corners(bounds)
+    inside = [point_in_polygon(lat, lng, polygon) for lat, lng in corners]
+    box_edges = list(zip(corners, corners[1:] + corners[:1]))
+    poly_edges = list(zip(polygon, polygon[1:] + polygon[:1]))
+    crosses = any(_segments_intersect(a, b, c, d) for a, b in poly_edges for c, d in box_edges)
+    if all(inside) and not crosses:
+        return 'full'
+    min_lat, min_lng, max_lat, max_lng = bounds
+    vertex_inside = any(min_lat <= lat <= max_lat and min_lng <= lng <= max_lng for lat, lng in polygon)
+    if any(inside) or crosses or vertex_inside:
+        return 'partial'
+    return None
+
+def _classify_radius(bounds, lat, lng, radius_miles):
+    min_lat, min_lng, max_lat, max_lng = bounds
+    if all(haversine_miles(lat, lng, c_lat, c_lng) <= radius_miles for c_lat, c_lng in _box_corners(bounds)):
+        return 'full'
+    nearest_lat = min(max(lat, min_lat), max_lat)
+    nearest_lng = min(max(lng, min_lng), max_lng)
+    if haversine_miles(lat, lng, nearest_lat, nearest_lng) <= radius_miles:
+        return 'partial'
+    return None
+
+def area_contains(area, lat, lng, zip_code=None):
+    """Exact containment test for a ServiceArea or any row with its geometry columns"""
+    if area.area_type == 'zip':
+        return zip_code is not None and zip_code in (area.zip_codes or [])
+    if lat is None or lng is None:
+        return False
+    if area.area_type == 'radius':
+        return haversine_miles(area.center_lat, area.center_lng, lat, lng) <= area.radius_miles
+    return point_in_polygon(lat, lng, area.polygon)
+
+class ServiceArea(db.Model):
+    __tablename__ = 'service_areas'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    business_id = db.Column(db.String(36), nullable=False, index=True)
+    name = db.Column(db.String(255), nullable=False)
+    area_type = db.Column(db.String(20), nullable=False)
+    center_lat = db.Column(db.Float)
+    center_lng = db.Column(db.Float)
+    radius_miles = db.Column(db.Float)
+    zip_codes = db.Column(db.JSON)
+    polygon = db.Column(db.JSON)
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def contains(self, lat, lng, zip_code=None):
+        return area_contains(self, lat, lng, zip_code)
+
+    def coverage_cells(self):
+        """Yield (cell key, is_partial) for the grid cells this area touches"""
+        if self.area_type == 'zip':
+            for zip_code in self.zip_codes or []:
+                yield f'zip:{zip_code}', False
+            return
+        if self.area_type == 'radius':
+            d_lat = self.radius_miles / 69.0
+            d_lng = self.radius_miles / (69.0 * max(math.cos(math.radians(self.center_lat)), 0.01))
+            bbox = (self.center_lat - d_lat, self.center_lng - d_lng, self.center_lat + d_lat, self.center_lng + d_lng)
+            classify = partial(_classify_radius, lat=self.center_lat, lng=self.center_lng, radius_miles=self.radius_miles)
+        else:
+            lats = [p[0] for p in self.polygon]
+            lngs = [p[1] for p in self.polygon]
+            bbox = (min(lats), min(lngs), max(lats), max(lngs))
+            classify = partial(_classify_polygon, polygon=self.polygon)
+        for cell in cells_in_bbox(*bbox):
+            kind = classify(geohash_bounds(cell))
+            if kind:
+                yield cell, kind == 'partial'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'businessId': self.business_id,
+            'name': self.name,
+            'type': self.area_type,
+            'center': {'lat': self.center_lat, 'lng': self.center_lng} if self.area_type == 'radius' else None,
+            'radiusMiles': self.radius_miles,
+            'zipCodes': self.zip_codes,
+            'polygon': self.polygon,
+            'isActive': self.is_active,
+            'createdAt': self.created_at.isoformat() + 'Z' if self.created_at else None,
+            'updatedAt': self.updated_at.isoformat() + 'Z' if self.updated_at else None
+        }
+
+class CoverageCell(db.Model):
+    """Grid cell (geohash or 'zip:<code>') -> service areas that cover it.
+
+    Partial cells straddle an area's boundary and need an exact containment
+    check at lookup time; full cells do not.
+    """
+    __tablename__ = 'coverage_cells'
+
+    cell = db.Column(db.String(16), primary_key=True)
+    service_area_id = db.Column(db.String(36), primary_key=True)
+    business_id = db.Column(db.String(36), nullable=False)
+    is_partial = db.Column(db.Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        db.Index('ix_coverage_cells_service_area_id', 'service_area_id'),
+    )
+
+class LeadAssignment(db.Model):
+    """A service request routed to a business through one of its service areas"""
+    __tablename__ = 'lead_assignments'
+
+    request_id = db.Column(db.String(36), primary_key=True)
+    business_id = db.Column(db.String(36), primary_key=True)
+    service_area_id = db.Column(db.String(36), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_lead_assignments_business_created', 'business_id', 'created_at'),
+    )
+
+def validate_area(data):
+    """Return an error message for an invalid service area payload, or None"""
+    area_type = data.get('type')
+    if area_type not in AREA_TYPES:
+        return f"Field type must be one of {', '.join(AREA_TYPES)}"
+    if area_type == 'radius':
+        center = data.get('center') or {}
+        if not isinstance(center.get('lat'), (int, float)) or not isinstance(center.get('lng'), (int, float)):
+            return 'Radius areas need center.lat and center.lng'
+        if not isinstance(data.get('radiusMiles'), (int, float)) or not 0 < data['radiusMiles'] <= 100:
+            return 'Field radiusMiles must be between 0 and 100'
+    elif area_type == 'zip':
+        zip_codes = data.get('zipCodes')
+        if not isinstance(zip_codes, list) or not zip_codes or not all(isinstance(z, str) for z in zip_codes):
+            return 'Zip areas need a non-empty zipCodes list'
+    else:
+        polygon = data.get('polygon')
+        if (not isinstance(polygon, list) or len(polygon) < 3
+                or not all(isinstance(p, list) and len(p) == 2 for p in polygon)):
+            return 'Polygon areas need at least three [lat, lng] points'
+    return None
+
+def apply_area(area, data):
+    area.name = data.get('name', area.name or 'Service area')
+    area.area_type = data['type']
+    center = data.get('center') or {}
+    area.center_lat = center.get('lat')
+    area.center_lng = center.get('lng')
+    area.radius_miles = data.get('radiusMiles')
+    area.zip_codes = data.get('zipCodes')
+    area.polygon = data.get('polygon')
+    area.is_active = data.get('isActive', True if area.is_active is None else area.is_active)
+
+def rebuild_area(area):
+    """Replace the grid rows of one service area; the rest of the grid is untouched.
+
+    Runs in the caller's transaction. Returns the number of cells written.
+    """
+    table = CoverageCell.__table__
+    db.session.execute(table.delete().where(table.c.service_area_id == area.id))
+    if not area.is_active:
+        return 0
+    rows = []
+    for cell, is_partial in area.coverage_cells():
+        rows.append({'cell': cell, 'service_area_id': area.id, 'business_id': area.business_id, 'is_partial': is_partial})
+        if len(rows) > MAX_CELLS_PER_AREA:
+            raise ValueError(f'Service area covers more than {MAX_CELLS_PER_AREA} grid cells')
+    if rows:
+        db.session.execute(table.insert(), rows)
+    return len(rows)
+
+def remove_area(area):
+    table = CoverageCell.__table__
+    db.session.execute(table.delete().where(table.c.service_area_id == area.id))
+
+def covering_areas(lat=None, lng=None, zip_code=None):
+    """(business_id, service_area_id) pairs whose areas contain the point or ZIP code.
+
+    One indexed lookup of at most two grid keys; only boundary cells load
+    their areas for an exact check.
+    """
+    keys = []
+    if lat is not None and lng is not None:
+        keys.append(geohash_encode(lat, lng))
+    if zip_code:
+        keys.append(f'zip:{zip_code}')
+    if not keys:
+        return []
+
+    rows = CoverageCell.query.filter(CoverageCell.cell.in_(keys)).all()
+    partial_ids = [row.service_area_id for row in rows if row.is_partial]
+    exact = {}
+    if partial_ids:
+        exact = {
+            area.id: area.contains(lat, lng, zip_code)
+            for area in ServiceArea.query.filter(ServiceArea.id.in_(partial_ids)).all()
+        }
+
+    matches = {}
+    for row in rows:
+        if row.is_partial and not exact.get(row.service_area_id):
+            continue
+        matches.setdefault(row.business_id, row.service_area_id)
+    return list(matches.items())
+
+def _bbox_prefixes(min_lat, min_lng, max_lat, max_lng):
+    """The longest geohash prefixes, at most MAX_BBOX_PREFIXES of them, that cover a bounding box"""
+    for precision in range(GRID_PRECISION, 0, -1):
+        lat_step, lng_step = cell_size(precision)
+        count = (math.ceil((max_lat - min_lat) / lat_step) + 1) * (math.ceil((max_lng - min_lng) / lng_step) + 1)
+        if count <= MAX_BBOX_PREFIXES:
+            return precision, set(cells_in_bbox(min_lat, min_lng, max_lat, max_lng, precision))
+    return 0, {''}
+
+def area_ids_in_bbox(min_lat, min_lng, max_lat, max_lng):
+    """IDs of service areas with geohash cells overlapping a bounding box.
+
+    Cells are read by geohash prefix ranges on the primary key, so a large box
+    costs a few range scans rather than one lookup per grid cell.
+    """
+    precision, prefixes = _bbox_prefixes(min_lat, min_lng, max_lat, max_lng)
+    cell = CoverageCell.cell
+    query = CoverageCell.query.with_entities(CoverageCell.service_area_id)
+    if precision == GRID_PRECISION:
+        query = query.filter(cell.in_(prefixes))
+    else:
+        # '{' sorts right after 'z', the last geohash character. 'zip:' keys sort inside
+        # the 'z' range, so they are filtered out explicitly.
+        query = query.filter(
+            or_(*(and_(cell >= prefix, cell < prefix + '{') for prefix in prefixes)),
+            ~cell.startswith('zip:')
+        )
+    return {row.service_area_id for row in query.distinct()}
+
+def route_lead(service_request, lat=None, lng=None, zip_code=None):
+    """Assign a new service request to every business covering its location and category.
+
+    Adds LeadAssignment rows to the session; returns them.
+    """
+    matches = covering_areas(lat, lng, zip_code)
+    if not matches:
+        return []
+    offering = {
+        row.business_id for row in BusinessService.query.with_entities(BusinessService.business_id).filter(
+            BusinessService.business_id.in_([business_id for business_id, _ in matches]),
+            BusinessService.service_category == service_request.service_category,
+            BusinessService.is_available.is_(True)
+        )
+    }
+    assignments = [
+        LeadAssignment(request_id=service_request.id, business_id=business_id, service_area_id=area_id)
+        for business_id, area_id in matches if business_id in offering
+    ]
+    db.session.add_all(assignments)
+    return assignments
+
+def rebuild_all(business_id=None):
+    """Rebuild the grid for every active area (or one business's areas)"""
+    query = ServiceArea.query
+    if business_id:
+        query = query.filter_by(business_id=business_id)
+    else:
+        db.session.execute(CoverageCell.__table__.delete())
+    cells = 0
+    for area in query.all():
+        cells += rebuild_area(area)
+    db.session.commit()
+    return cells
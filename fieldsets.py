@@ -0,0 +1,81 @@
+from flask import request
+from sqlalchemy import inspect
+from functools import lru_cache
+import re
+
+_CAMEL_BOUNDARY = re.compile(r'_([a-z0-9])')
+
+class InvalidFieldsError(ValueError):
+    def __init__(self, unknown, allowed):
+        super().__init__(f"Unknown fields: {', '.join(unknown)}")
+        self.unknown = unknown
+        self.allowed = allowed
+
+def camel_case(name):
+    return _CAMEL_BOUNDARY.sub(lambda m: m.group(1).upper(), name)
+
+def _blank(model, values=()):
+    """Transient instance holding only ``values``; never added to a session"""
+    instance = inspect(model).class_manager.new_instance()
+    for key, value in values:
+        setattr(instance, key, value)
+    return instance
+
+@lru_cache(maxsize=None)
+def model_fields(model):
+    """to_dict() key -> the column attribute it is built from, in declaration order.
+
+    Only keys that map to a single column can be selected; keys to_dict() derives
+    from relationships or several columns need the full object. A to_dict() that
+    cannot run on a blank instance allows no field selection at all.
+    """
+    try:
+        keys = _blank(model).to_dict().keys()
+    except Exception:
+        return {}
+    fields = {}
+    for attr in inspect(model).column_attrs:
+        for key in (camel_case(attr.key), attr.key):
+            if key in keys:
+                fields[key] = getattr(model, attr.key)
+                break
+    return fields
+
+def requested_fields(allowed):
+    """Parse ``?fields=a,b`` into a list of names, or None when the parameter is absent.
+
+    Raises InvalidFieldsError for names outside ``allowed``.
+    """
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    fields = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise InvalidFieldsError(unknown, sorted(allowed))
+    return fields
+
+def model_fieldset(model):
+    """Requested fields for ``model``; the primary key is always included"""
+    fields = requested_fields(model_fields(model))
+    if fields is not None and 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields
+
+def select_fields(query, model, fields):
+    """Narrow an ORM query to the requested columns; rows come back as tuples"""
+    columns = model_fields(model)
+    return query.with_entities(*[columns[name] for name in fields])
+
+def serialize(items, fields, model=None):
+    """to_dict() for full objects; narrowed rows of ``model`` go through the same to_dict()"""
+    if fields is None:
+        return [item.to_dict() for item in items]
+    keys = [model_fields(model)[name].key for name in fields]
+    return [pick(_blank(model, zip(keys, row)).to_dict(), fields) for row in items]
+
+def pick(item, fields):
+    """Restrict an already-built dict to the requested keys"""
+    if fields is None:
+        return item
+    return {key: item[key] for key in fields if key in item}
@@ -0,0 +1,218 @@
+from flask import current_app
+from concurrent.futures import ThreadPoolExecutor, wait
+import json
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_at REAL NOT NULL,
+    locked_by TEXT,
+    locked_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, priority DESC, run_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_locked ON jobs(status, locked_until);
+"""
+
+# Task name -> callable(payload)
+TASKS = {}
+
+def task(name):
+    """Register a function as a background task under ``name``"""
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+class Job:
+    """A leased job; (locked_by, attempts) identifies this lease"""
+    __slots__ = ('id', 'task', 'payload', 'attempts', 'max_attempts', 'locked_by')
+
+    def __init__(self, id, task, payload, attempts, max_attempts, locked_by=None):
+        self.id = id
+        self.task = task
+        self.payload = payload
+        self.attempts = attempts
+        self.max_attempts = max_attempts
+        self.locked_by = locked_by
+
+class JobQueue:
+    """Durable job queue stored in a local SQLite file.
+
+    Dequeued jobs are leased for ``visibility_timeout`` seconds; a job whose
+    worker dies becomes visible again once the lease expires. Every lease counts
+    as an attempt, so a job that keeps killing its worker is marked failed after
+    ``max_attempts`` instead of being leased forever. Failed jobs are retried with
+    exponential backoff until ``max_attempts`` is reached.
+
+    ``complete`` and ``fail`` only apply while the caller still holds the lease;
+    once it has expired and the job was leased again they return False.
+    """
+
+    def __init__(self, path, backoff_base=5.0, backoff_max=3600.0):
+        self.path = path
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(JOBS_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, task_name, payload=None, priority=0, delay=0, max_attempts=5):
+        return self.enqueue_many([(task_name, payload)], priority=priority, delay=delay, max_attempts=max_attempts)[0]
+
+    def enqueue_many(self, jobs, priority=0, delay=0, max_attempts=5):
+        """Insert several (task_name, payload) jobs in one transaction; returns their IDs"""
+        now = time.time()
+        conn = self._connection()
+        ids = []
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for task_name, payload in jobs:
+                cursor = conn.execute(
+                    'INSERT INTO jobs (task, payload, priority, max_attempts, run_at, created_at, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (task_name, json.dumps(payload or {}), priority, max_attempts, now + delay, now, now)
+                )
+                ids.append(cursor.lastrowid)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return ids
+
+    def dequeue(self, worker_id, limit=10, visibility_timeout=300):
+        """Lease up to ``limit`` ready jobs, highest priority first"""
+        now = time.time()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # An expired lease was an attempt whose worker died; out of attempts means failed
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', last_error = 'Lease expired on attempt ' || attempts, "
+                "locked_by = NULL, locked_until = NULL, updated_at = ? "
+                "WHERE status = 'running' AND locked_until < ? AND attempts >= max_attempts",
+                (now, now)
+            )
+            rows = conn.execute(
+                "UPDATE jobs SET status = 'running', locked_by = ?, locked_until = ?, "
+                "attempts = attempts + 1, updated_at = ? "
+                "WHERE id IN ("
+                "  SELECT id FROM jobs "
+                "  WHERE (status = 'queued' AND run_at <= ?) OR (status = 'running' AND locked_until < ?) "
+                "  ORDER BY priority DESC, run_at LIMIT ?"
+                ") RETURNING id, task, payload, attempts, max_attempts",
+                (worker_id, now + visibility_timeout, now, now, now, limit)
+            ).fetchall()
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return [Job(row[0], row[1], json.loads(row[2]), row[3], row[4], worker_id) for row in rows]
+
+    def _release(self, job, assignments, values):
+        """UPDATE a job this lease still owns; False if the lease was lost to another worker"""
+        cursor = self._connection().execute(
+            f"UPDATE jobs SET {assignments}, locked_by = NULL, locked_until = NULL, updated_at = ? "
+            "WHERE id = ? AND status = 'running' AND locked_by = ? AND attempts = ?",
+            (*values, time.time(), job.id, job.locked_by, job.attempts)
+        )
+        if cursor.rowcount != 1:
+            logger.warning('Job %s (%s) lease on attempt %s was lost; result discarded', job.id, job.task, job.attempts)
+            return False
+        return True
+
+    def complete(self, job):
+        return self._release(job, "status = 'done'", ())
+
+    def fail(self, job, error):
+        """Reschedule a failed job with backoff, or mark it failed when out of attempts"""
+        if job.attempts >= job.max_attempts:
+            return self._release(job, "status = 'failed', last_error = ?", (error,))
+        delay = min(self.backoff_base * 2 ** (job.attempts - 1), self.backoff_max)
+        delay *= random.uniform(0.8, 1.2)
+        return self._release(job, "status = 'queued', last_error = ?, run_at = ?", (error, time.time() + delay))
+
+    def purge(self, older_than_seconds=7 * 24 * 3600):
+        """Delete finished jobs older than the given age"""
+        cursor = self._connection().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+            (time.time() - older_than_seconds,)
+        )
+        return cursor.rowcount
+
+    def stats(self):
+        return dict(self._connection().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+
+def get_queue(app=None):
+    """Return the application's job queue, creating it on first use"""
+    app = app or current_app._get_current_object()
+    queue = app.extensions.get('job_queue')
+    if queue is None:
+        queue = app.extensions['job_queue'] = JobQueue(
+            app.config['JOBS_DATABASE_PATH'],
+            backoff_base=app.config.get('JOBS_BACKOFF_BASE', 5.0),
+            backoff_max=app.config.get('JOBS_BACKOFF_MAX', 3600.0)
+        )
+    return queue
+
+def enqueue(task_name, payload=None, priority=0, delay=0, max_attempts=5):
+    """Queue a task from request code; returns the job ID"""
+    return get_queue().enqueue(task_name, payload, priority=priority, delay=delay, max_attempts=max_attempts)
+
+def _execute(app, queue, job):
+    func = TASKS.get(job.task)
+    if func is None:
+        queue.fail(job, f'Unknown task {job.task}')
+        return
+    try:
+        with app.app_context():
+            func(job.payload)
+    except Exception as e:
+        logger.exception('Job %s (%s) failed on attempt %s', job.id, job.task, job.attempts)
+        queue.fail(job, f'{type(e).__name__}: {e}')
+    else:
+        queue.complete(job)
+
+def run_worker(app, concurrency=4, batch_size=None, poll_interval=1.0, visibility_timeout=300, stop_event=None):
+    """Process jobs with a thread pool until ``stop_event`` is set"""
+    queue = get_queue(app)
+    worker_id = f'{socket.gethostname()}:{os.getpid()}'
+    batch_size = batch_size or concurrency * 2
+    stop_event = stop_event or threading.Event()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        while not stop_event.is_set():
+            jobs = queue.dequeue(worker_id, limit=batch_size, visibility_timeout=visibility_timeout)
+            if not jobs:
+                stop_event.wait(poll_interval)
+                continue
+            wait([pool.submit(_execute, app, queue, job) for job in jobs])
@@ -3,63 +3,274 @@ import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+import importlib
+import click
+from flask import Flask
 from flask_cors import CORS
+from src.config import Config, configure_database
+from src.responses import FastJSONProvider
 from src.models.user import db
-from src.models.schedule import PickupSchedule, ScheduleZone, PickupEvent, UserScheduleSubscription
-from src.models.business import Business, BusinessService, BusinessPhoto, BusinessReview
-from src.models.booking import ServiceRequest, ServiceQuote, Booking, Payment
-from src.routes.user import user_bp
-from src.routes.schedule import schedule_bp
-from src.routes.business import business_bp
-from src.routes.booking import booking_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
-
-# Enable CORS for all routes
-CORS(app, origins="*")
-
-# Register blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(schedule_bp, url_prefix='/api')
-app.register_blueprint(business_bp, url_prefix='/api')
-app.register_blueprint(booking_bp, url_prefix='/api')
-
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-
-with app.app_context():
+
+# Blueprints registered by create_app: (module, attribute, required).
+# Optional blueprints are skipped if they fail to import or are listed in
+# DISABLED_BLUEPRINTS, so a worker only pays for the features it serves.
+BLUEPRINTS = [
+    ('src.routes.user', 'user_bp', True),
+    ('src.routes.schedule', 'schedule_bp', True),
+    ('src.routes.business', 'business_bp', True),
+    ('src.routes.booking', 'booking_bp', True),
+    ('src.routes.routing', 'routing_bp', False),
+    ('src.routes.batch', 'batch_bp', False),
+    ('src.routes.sync', 'sync_bp', False),
+    ('src.routes.analytics', 'analytics_bp', False),
+    ('src.routes.service_areas', 'service_areas_bp', False),
+    ('src.routes.maps', 'maps_bp', False),
+]
+
+# Modules that declare tables, imported only when the schema is managed
+MODEL_MODULES = [
+    'src.models.user',
+    'src.models.schedule',
+    'src.models.business',
+    'src.models.booking',
+    'src.reconciliation',
+    'src.coverage',
+    'src.map_tiles',
+    'src.pricing',
+    'src.change_log',
+    'src.rollups',
+]
+
+def import_models():
+    """Import every model module so db.metadata knows all tables"""
+    for module_path in MODEL_MODULES:
+        importlib.import_module(module_path)
+
+def create_schema():
+    """Create tables the models declare, then apply pending migrations"""
+    from src.migrations import migrate
+    import_models()
     db.create_all()
+    return migrate(db.engine)
+
+def register_blueprints(app):
+    disabled = set(app.config.get('DISABLED_BLUEPRINTS', ()))
+    for module_path, attribute, required in BLUEPRINTS:
+        if attribute in disabled:
+            continue
+        try:
+            module = importlib.import_module(module_path)
+        except ImportError:
+            if required:
+                raise
+            app.logger.warning('Skipping optional blueprint %s', module_path, exc_info=True)
+            continue
+        app.register_blueprint(getattr(module, attribute), url_prefix='/api')
+
+def register_commands(app):
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create all database tables and apply migrations"""
+        applied = create_schema()
+        click.echo(f'Database schema created ({len(applied)} migrations applied)')
+
+    @app.cli.command('db-migrate')
+    @click.option('--target', default=None, type=int, help='Stop after this migration version')
+    def db_migrate_command(target):
+        """Apply pending schema migrations"""
+        from src.migrations import migrate
+        applied = migrate(db.engine, target=target)
+        for migration in applied:
+            click.echo(f'Applied {migration.version}: {migration.description}')
+        if not applied:
+            click.echo('Schema is up to date')
+
+    @app.cli.command('db-check-indexes')
+    @click.option('--verbose', is_flag=True, help='Print the query plan for every check')
+    def db_check_indexes_command(verbose):
+        """EXPLAIN route queries and fail if an expected index is not used"""
+        from src.migrations import check_indexes
+        results = check_indexes()
+        for result in results:
+            click.echo(f"{'ok  ' if result['used'] else 'MISS'} {result['description']} -> {result['index']}")
+            if verbose or not result['used']:
+                click.echo('     ' + result['plan'].replace('\n', '\n     '))
+        if not all(result['used'] for result in results):
+            sys.exit(1)
+
+    @app.cli.command('reconcile-payments')
+    @click.option('--processor', default=lambda: os.environ.get('PAYMENT_PROCESSOR', 'fake'), help='Registered processor client name')
+    @click.option('--chunk-size', default=1000, help='Unsettled payments loaded per chunk')
+    @click.option('--batch-size', default=None, type=int, help='Payments per processor lookup')
+    def reconcile_payments_command(processor, chunk_size, batch_size):
+        """Reconcile unsettled payments against the payment processor"""
+        from src.reconciliation import get_payment_processor, reconcile_payments
+        summary = reconcile_payments(get_payment_processor(processor), chunk_size=chunk_size, batch_size=batch_size)
+        click.echo(summary)
+
+    @app.cli.command('jobs-worker')
+    @click.option('--concurrency', default=4, help='Worker threads')
+    @click.option('--batch-size', default=None, type=int, help='Jobs leased per poll')
+    @click.option('--poll-interval', default=1.0, help='Seconds to sleep when the queue is empty')
+    @click.option('--visibility-timeout', default=300, help='Seconds a leased job stays invisible to other workers')
+    def jobs_worker_command(concurrency, batch_size, poll_interval, visibility_timeout):
+        """Run background jobs from the local queue"""
+        from src.jobs import run_worker
+        click.echo(f'Job worker started with {concurrency} threads')
+        try:
+            run_worker(app, concurrency=concurrency, batch_size=batch_size,
+                       poll_interval=poll_interval, visibility_timeout=visibility_timeout)
+        except KeyboardInterrupt:
+            click.echo('Job worker stopped')
+
+    @app.cli.command('jobs-stats')
+    def jobs_stats_command():
+        """Show job counts by status"""
+        from src.jobs import get_queue
+        click.echo(get_queue(app).stats())
+
+    @app.cli.command('sync-prune')
+    @click.option('--days', default=lambda: app.config.get('SYNC_RETENTION_DAYS', 90), type=int, help='Keep this many days of change log')
+    def sync_prune_command(days):
+        """Delete change log entries older than the retention window"""
+        from src import change_log
+        click.echo(f'Deleted {change_log.prune(days)} change log entries')
+
+    @app.cli.command('rollups-backfill')
+    @click.option('--start', default=None, type=click.DateTime(formats=['%Y-%m-%d']), help='First day to rebuild (default: oldest request)')
+    @click.option('--end', default=None, type=click.DateTime(formats=['%Y-%m-%d']), help='Last day to rebuild (default: today)')
+    def rollups_backfill_command(start, end):
+        """Rebuild analytics rollups from requests, quotes and bookings"""
+        from src import rollups
+        rebuilt = rollups.backfill(start.date() if start else None, end.date() if end else None)
+        click.echo(f'Rebuilt {rebuilt} rollup rows')
+
+    @app.cli.command('coverage-rebuild')
+    @click.option('--business-id', default=None, help='Only rebuild this business\'s service areas')
+    def coverage_rebuild_command(business_id):
+        """Rebuild the lead routing coverage grid from service areas"""
+        from src.coverage import rebuild_all
+        click.echo(f'Wrote {rebuild_all(business_id)} coverage cells')
+
+    @app.cli.command('map-tiles-warm')
+    @click.option('--max-zoom', default=12, help='Render tiles up to this zoom level')
+    @click.option('--clear', is_flag=True, help='Drop every cached tile first')
+    def map_tiles_warm_command(max_zoom, clear):
+        """Pre-render the map tiles that hold providers or service areas"""
+        from src import map_tiles
+        if clear:
+            click.echo(f'Dropped {map_tiles.clear_tiles()} cached tiles')
+        click.echo(f'Rendered {map_tiles.warm_tiles(max_zoom, app.json.dumps)} tiles')
+
+    @app.cli.command('catalog-stats')
+    def catalog_stats_command():
+        """Load the business catalog and report its size and memory footprint"""
+        from src import catalog
+        from time import perf_counter
+        start = perf_counter()
+        loaded = catalog.load_catalog()
+        click.echo(f'{len(loaded):,} active businesses loaded in {perf_counter() - start:.2f}s')
+        for name, size in loaded.memory_footprint().items():
+            click.echo(f'{name}: {size / 1024:,.1f} KiB')
+
+    @app.cli.command('seed-data')
+    @click.option('--scale', default='small', type=click.Choice(['small', 'town', 'city']), help='Dataset size preset')
+    @click.option('--seed', default=42, help='Seed; the same seed and --as-of produce identical data')
+    @click.option('--as-of', default=None, type=click.DateTime(formats=['%Y-%m-%d']), help='Date the history ends at (default today)')
+    @click.option('--batch-size', default=5000, help='Rows per insert batch')
+    def seed_data_command(scale, seed, as_of, batch_size):
+        """Fill the database with deterministic synthetic data for scale testing"""
+        from src.seed_data import seed as seed_data
+        create_schema()
+
+        def progress(counts):
+            click.echo(f'\r{sum(counts.values()):,} rows', nl=False)
+
+        counts = seed_data(scale, seed=seed, as_of=as_of.date() if as_of else None,
+                           batch_size=batch_size, progress=progress)
+        click.echo('')
+        for table, count in counts.items():
+            click.echo(f'{table}: {count:,}')
+
+def create_app(config=None):
+    """Application factory.
+
+    ``config`` may be a config object/class or a mapping of overrides applied on top
+    of the defaults. The schema is not touched unless AUTO_CREATE_SCHEMA is set;
+    use ``flask --app main:create_app init-db`` to create it explicitly.
+    """
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+    # Pool options and the SQLite directory follow the URI the overrides settled on
+    configure_database(app.config)
+
+    # orjson-backed serialization with native date/time/Decimal support
+    app.json = FastJSONProvider(app)
+
+    # Feature modules are imported where they are registered and, when a config
+    # flag switches them off, not at all: most of them pull in the models. The flush
+    # hooks are process-wide, so a hook module an earlier app loaded is still told
+    # it is off
+
+    # Request timing, Server-Timing headers and /metrics
+    if app.config.get('METRICS_ENABLED', True):
+        from src import metrics
+        metrics.init_app(app)
+    # Query counts, slow-query log and N+1 detection
+    if app.config.get('QUERY_PROFILER_ENABLED', True):
+        from src import query_profiler
+        query_profiler.init_app(app)
+    # gzip/brotli for JSON responses; runs before the timing hook so it is measured
+    if app.config.get('COMPRESS_ENABLED', True):
+        from src import compression
+        compression.init_app(app)
+
+    # Token buckets for public endpoints
+    if app.config.get('RATE_LIMIT_ENABLED', True):
+        from src import rate_limit
+        rate_limit.init_app(app)
+
+    # Enable CORS for all routes
+    CORS(app, origins="*")
+
+    # Database configuration (see config.py for DATABASE_URL and pool/pragma settings)
+    db.init_app(app)
+    # Append-only change log behind the /sync/changes delta feed
+    if app.config.get('SYNC_CHANGE_LOG_ENABLED', True) or 'src.change_log' in sys.modules:
+        from src import change_log
+        change_log.init_app(app)
+    # Daily per business/service area/category counters behind the analytics endpoints
+    if app.config.get('ROLLUPS_ENABLED', True) or 'src.rollups' in sys.modules:
+        from src import rollups
+        rollups.init_app(app)
+    # Per-tile map cache, dropped when a business or service area in the tile changes
+    if app.config.get('MAP_TILE_CACHE_ENABLED', True) or 'src.map_tiles' in sys.modules:
+        from src import map_tiles
+        map_tiles.init_app(app)
+    # Compiled price tables for search results and quote estimates (always on: the
+    # business and booking blueprints price every result)
+    from src import pricing
+    pricing.init_app(app)
+
+    register_blueprints(app)
+    register_commands(app)
+    # SPA and static files: fingerprinted assets are immutable, index.html revalidates
+    from src import static_assets
+    static_assets.init_app(app)
+
+    if app.config.get('AUTO_CREATE_SCHEMA'):
+        with app.app_context():
+            create_schema()
+    # In-memory business catalog for search; preloaded on the first request, never by CLI commands
+    from src import catalog
+    catalog.init_app(app)
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        response = send_from_directory(static_folder_path, path)
-        # Add cache-busting headers
-        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '0'
-        return response
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            response = send_from_directory(static_folder_path, 'index.html')
-            # Add cache-busting headers
-            response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-            response.headers['Pragma'] = 'no-cache'
-            response.headers['Expires'] = '0'
-            return response
-        else:
-            return "index.html not found", 404
+    return app
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    create_app({'AUTO_CREATE_SCHEMA': True}).run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,347 @@
+from src.models.user import db
+from src.models.business import Business
+from src.coverage import ServiceArea, area_ids_in_bbox
+from sqlalchemy import event, inspect, bindparam
+from sqlalchemy.orm import Session
+from datetime import datetime
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+# Web Mercator is undefined at the poles; tiles stop at +-85.0511 degrees
+MAX_LATITUDE = 85.05112878
+CIRCLE_SEGMENTS = 32
+# An edit covering more tiles than this at one zoom deletes them as a key range instead
+MAX_INVALIDATED_TILES_PER_ZOOM = 64
+
+_settings = {
+    'enabled': False,
+    'max_zoom': 18,
+    'cluster_max_zoom': 15,
+    'cluster_cell_px': 64,
+    'simplify_tolerance_px': 1.0,
+    'ttl_seconds': 3600
+}
+
+class MapTile(db.Model):
+    """Rendered tile payloads, deleted when a business or service area inside them changes"""
+    __tablename__ = 'map_tiles'
+
+    z = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    x = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    y = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+def project(lat, lng, z):
+    """World pixel coordinates of a point at zoom ``z``"""
+    lat = max(min(lat, MAX_LATITUDE), -MAX_LATITUDE)
+    scale = TILE_SIZE * 2 ** z
+    sin_lat = math.sin(math.radians(lat))
+    x = (lng + 180.0) / 360.0 * scale
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return x, y
+
+def unproject(x, y, z):
+    scale = TILE_SIZE * 2 ** z
+    lng = x / scale * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / scale))))
+    return lat, lng
+
+def tile_for(lat, lng, z):
+    x, y = project(lat, lng, z)
+    last = 2 ** z - 1
+    return min(max(int(x // TILE_SIZE), 0), last), min(max(int(y // TILE_SIZE), 0), last)
+
+def tile_bounds(z, x, y):
+    """(min_lat, min_lng, max_lat, max_lng) of tile z/x/y"""
+    max_lat, min_lng = unproject(x * TILE_SIZE, y * TILE_SIZE, z)
+    min_lat, max_lng = unproject((x + 1) * TILE_SIZE, (y + 1) * TILE_SIZE, z)
+    return min_lat, min_lng, max_lat, max_lng
+
+def valid_tile(z, x, y):
+    return 0 <= z <= _settings['max_zoom'] and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+def simplify(points, tolerance):
+    """Douglas-Peucker on [(x, y), ...]; returns the indexes of the points to keep"""
+    if len(points) < 3:
+        return list(range(len(points)))
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    tolerance_sq = tolerance * tolerance
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[first]
+        bx, by = points[last]
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        farthest, farthest_sq = None, tolerance_sq
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length_sq:
+                t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+                ex, ey = ax + t * dx - px, ay + t * dy - py
+            else:
+                ex, ey = ax - px, ay - py
+            distance_sq = ex * ex + ey * ey
+            if distance_sq > farthest_sq:
+                farthest, farthest_sq = i, distance_sq
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [i for i, kept in enumerate(keep) if kept]
+
+def _location(address):
+    if not isinstance(address, dict):
+        return None
+    lat, lng = address.get('lat'), address.get('lng')
+    if not isinstance(lat, (int, float)) or not isinstance(lng, (int, float)):
+        return None
+    return lat, lng
+
+def _outline(area_type, polygon=None, center_lat=None, center_lng=None, radius_miles=None):
+    """Area boundary as [(lat, lng), ...]; radius areas become a regular polygon, ZIP areas have none"""
+    if area_type == 'polygon' and polygon:
+        return [tuple(p) for p in polygon]
+    if area_type == 'radius' and center_lat is not None and radius_miles:
+        d_lat = radius_miles / 69.0
+        d_lng = radius_miles / (69.0 * max(math.cos(math.radians(center_lat)), 0.01))
+        return [
+            (center_lat + d_lat * math.sin(2 * math.pi * i / CIRCLE_SEGMENTS),
+             center_lng + d_lng * math.cos(2 * math.pi * i / CIRCLE_SEGMENTS))
+            for i in range(CIRCLE_SEGMENTS)
+        ]
+    return None
+
+def _bbox(points):
+    lats = [p[0] for p in points]
+    lngs = [p[1] for p in points]
+    return min(lats), min(lngs), max(lats), max(lngs)
+
+def _intersects(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+def _cluster_providers(z, x, y, bounds):
+    min_lat, min_lng, max_lat, max_lng = bounds
+    lat = Business.business_address['lat'].as_float()
+    lng = Business.business_address['lng'].as_float()
+    rows = Business.query.with_entities(
+        Business.id, Business.business_name, Business.rating_average, Business.is_verified, Business.business_address
+    ).filter(
+        Business.is_active.is_(True),
+        lat.between(min_lat, max_lat), lng >= min_lng, lng < max_lng
+    ).all()
+
+    points = []
+    for row in rows:
+        location = _location(row.business_address)
+        if location:
+            points.append((row, location))
+
+    if z > _settings['cluster_max_zoom']:
+        cells = {i: [point] for i, point in enumerate(points)}
+    else:
+        # Cells are aligned to the tile, so a cluster never straddles two tiles
+        cell_px = _settings['cluster_cell_px']
+        cells = {}
+        for row, (lat, lng) in points:
+            px, py = project(lat, lng, z)
+            key = (int((px - x * TILE_SIZE) // cell_px), int((py - y * TILE_SIZE) // cell_px))
+            cells.setdefault(key, []).append((row, (lat, lng)))
+
+    markers = []
+    for members in cells.values():
+        if len(members) == 1:
+            row, (lat, lng) = members[0]
+            markers.append({
+                'type': 'provider',
+                'id': row.id,
+                'name': row.business_name,
+                'rating': float(row.rating_average or 0),
+                'isVerified': bool(row.is_verified),
+                'lat': lat,
+                'lng': lng
+            })
+        else:
+            markers.append({
+                'type': 'cluster',
+                'count': len(members),
+                'lat': round(sum(lat for _, (lat, _) in members) / len(members), 6),
+                'lng': round(sum(lng for _, (_, lng) in members) / len(members), 6)
+            })
+    return markers
+
+def _simplified_zones(z, bounds):
+    # The coverage grid narrows the areas down to those near the tile
+    area_ids = area_ids_in_bbox(*bounds)
+    if not area_ids:
+        return []
+    areas = ServiceArea.query.filter(
+        ServiceArea.id.in_(area_ids),
+        ServiceArea.is_active.is_(True),
+        ServiceArea.area_type.in_(('polygon', 'radius'))
+    ).all()
+
+    tolerance = _settings['simplify_tolerance_px']
+    zones = []
+    for area in areas:
+        outline = _outline(area.area_type, area.polygon, area.center_lat, area.center_lng, area.radius_miles)
+        if not outline or not _intersects(_bbox(outline), bounds):
+            continue
+        projected = [project(lat, lng, z) for lat, lng in outline]
+        xs = [p[0] for p in projected]
+        ys = [p[1] for p in projected]
+        if max(xs) - min(xs) < tolerance * 2 and max(ys) - min(ys) < tolerance * 2:
+            # Smaller than a couple of pixels at this zoom; the provider marker stands in for it
+            continue
+        kept = simplify(projected + [projected[0]], tolerance)[:-1]
+        if len(kept) < 3:
+            continue
+        zones.append({
+            'id': area.id,
+            'businessId': area.business_id,
+            'name': area.name,
+            'polygon': [[round(outline[i][0], 6), round(outline[i][1], 6)] for i in kept]
+        })
+    return zones
+
+def render_tile(z, x, y):
+    bounds = tile_bounds(z, x, y)
+    return {
+        'z': z,
+        'x': x,
+        'y': y,
+        'providers': _cluster_providers(z, x, y, bounds),
+        'zones': _simplified_zones(z, bounds)
+    }
+
+def get_tile(z, x, y, dumps):
+    """Serialized tile payload, rendered and stored on the first request for it"""
+    if _settings['enabled']:
+        cached = db.session.get(MapTile, (z, x, y))
+        # The TTL bounds staleness from a render that raced an edit's invalidation
+        if cached is not None and (datetime.utcnow() - cached.created_at).total_seconds() < _settings['ttl_seconds']:
+            return cached.payload
+    payload = dumps(render_tile(z, x, y))
+    if _settings['enabled']:
+        try:
+            _store_tile(z, x, y, payload)
+        except Exception:
+            # Serving the tile matters more than caching it; the next request renders it again
+            logger.warning('Could not cache map tile %s/%s/%s', z, x, y, exc_info=True)
+    return payload
+
+def _store_tile(z, x, y, payload):
+    """Write a rendered tile in its own short transaction, apart from the request's session"""
+    table = MapTile.__table__
+    with db.engine.begin() as connection:
+        connection.execute(table.delete().where(table.c.z == z, table.c.x == x, table.c.y == y))
+        connection.execute(table.insert(), {'z': z, 'x': x, 'y': y, 'payload': payload, 'created_at': datetime.utcnow()})
+
+def _previous(obj, attribute):
+    history = inspect(obj).attrs[attribute].history
+    return history.deleted[0] if history.deleted else getattr(obj, attribute)
+
+def _stale_regions(session):
+    """Points and bounding boxes whose tiles the pending flush makes stale"""
+    points = []
+    boxes = []
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Business):
+            for address in (obj.business_address, _previous(obj, 'business_address')):
+                location = _location(address)
+                if location:
+                    points.append(location)
+        elif isinstance(obj, ServiceArea):
+            for values in (
+                (obj.area_type, obj.polygon, obj.center_lat, obj.center_lng, obj.radius_miles),
+                tuple(_previous(obj, name) for name in ('area_type', 'polygon', 'center_lat', 'center_lng', 'radius_miles'))
+            ):
+                outline = _outline(*values)
+                if outline:
+                    boxes.append(_bbox(outline))
+    return points, boxes
+
+def _stale_tiles(points, boxes):
+    """(tile keys, key ranges) to delete: single tiles, and boxes too large to list at a zoom"""
+    keys = set()
+    ranges = set()
+    for z in range(_settings['max_zoom'] + 1):
+        for lat, lng in points:
+            keys.add((z, *tile_for(lat, lng, z)))
+        for min_lat, min_lng, max_lat, max_lng in boxes:
+            x0, y0 = tile_for(max_lat, min_lng, z)
+            x1, y1 = tile_for(min_lat, max_lng, z)
+            if (x1 - x0 + 1) * (y1 - y0 + 1) > MAX_INVALIDATED_TILES_PER_ZOOM:
+                ranges.add((z, x0, x1, y0, y1))
+            else:
+                keys.update((z, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1))
+    return keys, ranges
+
+def _invalidate_tiles(session, flush_context):
+    if not _settings['enabled']:
+        return
+    points, boxes = _stale_regions(session)
+    if not points and not boxes:
+        return
+    keys, ranges = _stale_tiles(set(points), set(boxes))
+    table = MapTile.__table__
+    connection = session.connection()
+    # Same transaction as the edit, so a rolled-back edit keeps its tiles. Each delete is a
+    # primary key lookup, or a range on it for large areas at high zooms.
+    if keys:
+        connection.execute(
+            table.delete().where(table.c.z == bindparam('tile_z'), table.c.x == bindparam('tile_x'),
+                                 table.c.y == bindparam('tile_y')),
+            [{'tile_z': z, 'tile_x': x, 'tile_y': y} for z, x, y in keys]
+        )
+    if ranges:
+        connection.execute(
+            table.delete().where(table.c.z == bindparam('tile_z'),
+                                 table.c.x.between(bindparam('x0'), bindparam('x1')),
+                                 table.c.y.between(bindparam('y0'), bindparam('y1'))),
+            [{'tile_z': z, 'x0': x0, 'x1': x1, 'y0': y0, 'y1': y1} for z, x0, x1, y0, y1 in ranges]
+        )
+
+def clear_tiles():
+    count = db.session.execute(MapTile.__table__.delete()).rowcount
+    db.session.commit()
+    return count
+
+def warm_tiles(max_zoom, dumps):
+    """Render every tile up to ``max_zoom`` that holds a provider or a service area vertex"""
+    points = [
+        location for location in (
+            _location(row.business_address)
+            for row in Business.query.with_entities(Business.business_address).filter(Business.is_active.is_(True))
+        ) if location
+    ]
+    areas = ServiceArea.query.with_entities(
+        ServiceArea.area_type, ServiceArea.polygon, ServiceArea.center_lat, ServiceArea.center_lng, ServiceArea.radius_miles
+    ).filter(ServiceArea.is_active.is_(True), ServiceArea.area_type.in_(('polygon', 'radius')))
+    for area in areas:
+        outline = _outline(*area)
+        if outline:
+            points.extend(outline)
+
+    rendered = 0
+    for z in range(max_zoom + 1):
+        for x, y in sorted({tile_for(lat, lng, z) for lat, lng in points}):
+            get_tile(z, x, y, dumps)
+            rendered += 1
+    return rendered
+
+def init_app(app):
+    """Cache tiles in map_tiles and drop them on business or service area edits (MAP_TILE_CACHE_ENABLED)"""
+    _settings['enabled'] = app.config.get('MAP_TILE_CACHE_ENABLED', True)
+    _settings['max_zoom'] = app.config.get('MAP_MAX_ZOOM', 18)
+    _settings['cluster_max_zoom'] = app.config.get('MAP_CLUSTER_MAX_ZOOM', 15)
+    _settings['cluster_cell_px'] = app.config.get('MAP_CLUSTER_CELL_PX', 64)
+    _settings['simplify_tolerance_px'] = app.config.get('MAP_SIMPLIFY_TOLERANCE_PX', 1.0)
+    _settings['ttl_seconds'] = app.config.get('MAP_TILE_TTL_SECONDS', 3600)
+    if not event.contains(Session, 'after_flush', _invalidate_tiles):
+        event.listen(Session, 'after_flush', _invalidate_tiles)
@@ -0,0 +1,26 @@
+from flask import Blueprint, Response, request, current_app
+from src.responses import error_response, request_meta
+from src.map_tiles import get_tile, valid_tile
+import hashlib
+
+maps_bp = Blueprint('maps', __name__)
+
+@maps_bp.route('/map/tiles/<int:z>/<int:x>/<int:y>', methods=['GET'])
+def get_map_tile(z, x, y):
+    """Clustered provider markers and simplified service area outlines for one map tile"""
+    try:
+        if not valid_tile(z, x, y):
+            return error_response('INVALID_TILE', 'Tile coordinates are out of range', 400)
+
+        payload = get_tile(z, x, y, current_app.json.dumps)
+
+        # The cached payload is spliced into the envelope instead of being parsed and re-serialized
+        timestamp, request_id = request_meta()
+        body = f'{{"success":true,"data":{payload},"timestamp":"{timestamp}","requestId":"{request_id}"}}'
+        response = Response(body, mimetype='application/json')
+        response.set_etag(hashlib.md5(payload.encode('utf-8')).hexdigest(), weak=True)
+        response.headers['Cache-Control'] = 'public, max-age=60'
+        return response.make_conditional(request)
+
+    except Exception as e:
+        return error_response('INTERNAL_ERROR', str(e), 500)
@@ -0,0 +1,165 @@
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from bisect import bisect_left
+from time import perf_counter
+import threading
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Cumulative-on-export histogram with fixed buckets"""
+
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Per-process request metrics keyed by (endpoint, method)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = {}
+        self.db_durations = {}
+        self.serialize_durations = {}
+        self.db_queries = {}
+        self.status_counts = {}
+
+    def observe_request(self, endpoint, method, status, total, db_time, serialize_time, db_queries):
+        key = (endpoint, method)
+        with self._lock:
+            for series, value in ((self.durations, total), (self.db_durations, db_time), (self.serialize_durations, serialize_time)):
+                histogram = series.get(key)
+                if histogram is None:
+                    histogram = series[key] = Histogram()
+                histogram.observe(value)
+            self.db_queries[key] = self.db_queries.get(key, 0) + db_queries
+            status_key = (endpoint, method, status)
+            self.status_counts[status_key] = self.status_counts.get(status_key, 0) + 1
+
+    def render_prometheus(self):
+        """Render all series in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, help_text, series in (
+                ('http_request_duration_seconds', 'Total request handling time', self.durations),
+                ('http_request_db_seconds', 'Time spent in database calls per request', self.db_durations),
+                ('http_request_serialize_seconds', 'Time spent serializing JSON per request', self.serialize_durations),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (endpoint, method), histogram in sorted(series.items()):
+                    labels = f'endpoint="{endpoint}",method="{method}"'
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.total:.6f}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+            lines.append('# HELP http_request_db_queries_total Database statements executed')
+            lines.append('# TYPE http_request_db_queries_total counter')
+            for (endpoint, method), count in sorted(self.db_queries.items()):
+                lines.append(f'http_request_db_queries_total{{endpoint="{endpoint}",method="{method}"}} {count}')
+
+            lines.append('# HELP http_requests_total Requests by endpoint, method and status code')
+            lines.append('# TYPE http_requests_total counter')
+            for (endpoint, method, status), count in sorted(self.status_counts.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+_server_timing_enabled = True
+# fn(statement, seconds) callbacks for statements run inside a request
+_statement_observers = []
+
+def add_timing(name, seconds):
+    """Accumulate time under g.<name> for the current request, if any"""
+    if has_request_context():
+        setattr(g, name, g.get(name, 0.0) + seconds)
+
+def on_statement(fn):
+    """Register fn(statement, seconds) to receive every statement timed during a request.
+
+    This is the only cursor timing in the app; other per-request consumers such as
+    the query profiler read it here instead of timing statements again.
+    """
+    if fn not in _statement_observers:
+        _statement_observers.append(fn)
+    return fn
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_start', []).append(perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_query_start')
+    if not starts:
+        return
+    elapsed = perf_counter() - starts.pop()
+    if has_request_context():
+        g._db_time = g.get('_db_time', 0.0) + elapsed
+        g._db_queries = g.get('_db_queries', 0) + 1
+        for observer in _statement_observers:
+            observer(statement, elapsed)
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    # after_cursor_execute does not run for a failed statement; drop its start time
+    # so the stack does not grow and shift later timings
+    conn = exception_context.connection
+    starts = conn.info.get('_query_start') if conn is not None and not conn.closed else None
+    if starts:
+        starts.pop()
+
+def _start_timer():
+    g._request_start = perf_counter()
+
+def _record_request(response):
+    start = g.get('_request_start')
+    if start is None:
+        return response
+    total = perf_counter() - start
+    db_time = g.get('_db_time', 0.0)
+    serialize_time = g.get('_serialize_time', 0.0)
+    endpoint = request.endpoint or 'unmatched'
+
+    if endpoint != 'metrics':
+        registry.observe_request(
+            endpoint, request.method, response.status_code,
+            total, db_time, serialize_time, g.get('_db_queries', 0)
+        )
+
+    if _server_timing_enabled:
+        response.headers['Server-Timing'] = (
+            f'db;dur={db_time * 1000:.2f}, '
+            f'ser;dur={serialize_time * 1000:.2f}, '
+            f'total;dur={total * 1000:.2f}'
+        )
+    return response
+
+def init_app(app):
+    """Install request timing hooks and the /metrics endpoint"""
+    global _server_timing_enabled
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    _server_timing_enabled = app.config.get('SERVER_TIMING_ENABLED', True)
+
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus scrape endpoint (per worker process)"""
+        return app.response_class(registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,137 @@
+from src.models.user import db
+from sqlalchemy import text
+from datetime import datetime
+
+SCHEMA_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    description VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP NOT NULL
+)
+"""
+
+class Migration:
+    __slots__ = ('version', 'description', 'statements')
+
+    def __init__(self, version, description, statements):
+        self.version = version
+        self.description = description
+        self.statements = statements
+
+# Applied in version order; never edit a released migration, add a new one.
+# Statements must be valid on both SQLite and PostgreSQL.
+MIGRATIONS = [
+    Migration(1, 'Composite indexes for route query patterns', [
+        # GET /businesses/<id>/reviews: business_id = ? AND is_public ORDER BY created_at DESC
+        'CREATE INDEX IF NOT EXISTS ix_business_reviews_business_public_created '
+        'ON business_reviews (business_id, is_public, created_at)',
+        # GET /schedules/subscriptions: user_id = ? AND is_active
+        'CREATE INDEX IF NOT EXISTS ix_user_schedule_subscriptions_user_active '
+        'ON user_schedule_subscriptions (user_id, is_active)',
+        # Business profile lookups by owning user
+        'CREATE INDEX IF NOT EXISTS ix_businesses_user_id ON businesses (user_id)',
+        # Service replacement on profile update
+        'CREATE INDEX IF NOT EXISTS ix_business_services_business_id ON business_services (business_id)',
+        # Schedule events: schedule_id = ? AND event_date BETWEEN ...
+        'CREATE INDEX IF NOT EXISTS ix_pickup_events_schedule_date ON pickup_events (schedule_id, event_date)',
+        # Booking history: customer_user_id = ? ORDER BY created_at DESC
+        'CREATE INDEX IF NOT EXISTS ix_bookings_customer_created ON bookings (customer_user_id, created_at)',
+        # Quotes for a request
+        'CREATE INDEX IF NOT EXISTS ix_service_quotes_request_id ON service_quotes (request_id)',
+        # Payment reconciliation keyset scan: payment_status IN (...) AND id > ? ORDER BY id
+        'CREATE INDEX IF NOT EXISTS ix_payments_status_id ON payments (payment_status, id)',
+    ]),
+]
+
+def _ensure_table(connection):
+    connection.execute(text(SCHEMA_MIGRATIONS_TABLE))
+
+def applied_versions(connection):
+    _ensure_table(connection)
+    return {row[0] for row in connection.execute(text('SELECT version FROM schema_migrations'))}
+
+def pending_migrations(connection):
+    applied = applied_versions(connection)
+    return [m for m in sorted(MIGRATIONS, key=lambda m: m.version) if m.version not in applied]
+
+def migrate(engine=None, target=None):
+    """Apply pending migrations up to ``target`` (default: latest), each in its own transaction.
+
+    Returns the migrations that were applied.
+    """
+    engine = engine or db.engine
+    with engine.begin() as connection:
+        pending = pending_migrations(connection)
+
+    applied = []
+    for migration in pending:
+        if target is not None and migration.version > target:
+            break
+        with engine.begin() as connection:
+            for statement in migration.statements:
+                connection.execute(text(statement))
+            connection.execute(
+                text('INSERT INTO schema_migrations (version, description, applied_at) VALUES (:version, :description, :applied_at)'),
+                {'version': migration.version, 'description': migration.description, 'applied_at': datetime.utcnow()}
+            )
+        applied.append(migration)
+    return applied
+
+def _index_checks():
+    """(description, query, expected index) built the same way the routes build them"""
+    from src.models.schedule import PickupEvent, UserScheduleSubscription
+    from src.models.business import Business, BusinessReview
+    from src.models.booking import Booking, ServiceQuote, Payment
+    from datetime import date
+
+    return [
+        ('business reviews page', BusinessReview.query.filter_by(
+            business_id='business_id', is_public=True
+        ).order_by(BusinessReview.created_at.desc()).limit(10),
+            'ix_business_reviews_business_public_created'),
+        ('active subscriptions', UserScheduleSubscription.query.filter_by(
+            user_id='user_id', is_active=True
+        ), 'ix_user_schedule_subscriptions_user_active'),
+        ('business by owner', Business.query.filter_by(user_id='user_id').limit(1), 'ix_businesses_user_id'),
+        ('schedule events in range', PickupEvent.query.filter(
+            PickupEvent.schedule_id == 'schedule_id',
+            PickupEvent.event_date.between(date(2025, 1, 1), date(2025, 3, 31))
+        ).order_by(PickupEvent.event_date), 'ix_pickup_events_schedule_date'),
+        ('booking history', Booking.query.filter_by(
+            customer_user_id='user_id'
+        ).order_by(Booking.created_at.desc()).limit(20), 'ix_bookings_customer_created'),
+        ('request quotes', ServiceQuote.query.filter_by(request_id='request_id'), 'ix_service_quotes_request_id'),
+        ('unsettled payments chunk', Payment.query.filter(
+            Payment.payment_status.in_(['pending', 'processing']),
+            Payment.id > ''
+        ).order_by(Payment.id).limit(1000), 'ix_payments_status_id'),
+    ]
+
+def check_indexes():
+    """EXPLAIN each route query and report whether the planner uses the expected index.
+
+    Returns a list of dicts with description, index, used and the plan text.
+    Must run inside an application context.
+    """
+    connection = db.session.connection()
+    if connection.dialect.name == 'sqlite':
+        explain = 'EXPLAIN QUERY PLAN '
+    else:
+        explain = 'EXPLAIN '
+        # Small or unanalyzed tables make sequential scans look cheaper; ask whether the index is usable
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+    results = []
+    for description, query, index in _index_checks():
+        sql = str(query.statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+        plan = '\n'.join(
+            ' '.join(str(column) for column in row)
+            for row in connection.exec_driver_sql(explain + sql)
+        )
+        results.append({
+            'description': description,
+            'index': index,
+            'used': index in plan,
+            'plan': plan
+        })
+    db.session.rollback()
+    return results
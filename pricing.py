@@ -0,0 +1,260 @@
+"""Area-aware price tables.
+
+Every available BusinessService and per-area multiplier is compiled into flat
+arrays indexed by (business, category). A search page or a batch of quote
+estimates then reads prices for any number of businesses without touching the
+database. The table also keeps each business's radius and polygon areas, so a
+search can tell which area covers the customer without querying the grid.
+
+The table is rebuilt after a commit that changes prices or areas in this
+process, and every PRICING_TABLE_TTL_SECONDS so other workers' edits show up
+too. Rebuilds run off the request path (see snapshot.py): readers keep the
+published table until the new one is swapped in.
+"""
+from src.models.business import db, BusinessService
+from src.coverage import ServiceArea, area_contains
+from src.snapshot import Snapshot, refresh_in_background
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from array import array
+from datetime import datetime
+import math
+
+# Multiplier rows with this category apply to every category in the area
+ALL_CATEGORIES = ''
+PRICE_TIERS = ('$', '$$', '$$$')
+# Area types a point can be located in; ZIP areas need the customer's ZIP code
+LOCATED_AREA_TYPES = ('radius', 'polygon')
+
+class AreaPriceRule(db.Model):
+    """Price multiplier for one service area, for one category or all of them"""
+    __tablename__ = 'area_price_rules'
+
+    service_area_id = db.Column(db.String(36), primary_key=True)
+    service_category = db.Column(db.String(100), primary_key=True, default=ALL_CATEGORIES)
+    business_id = db.Column(db.String(36), nullable=False, index=True)
+    multiplier = db.Column(db.Float, nullable=False, default=1.0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class PriceTable:
+    """Compiled prices: flat arrays of n_businesses x n_categories, NaN where a service is not offered.
+
+    A business with several services in one category gets the cheapest and
+    dearest base price of those sharing the cheapest service's price unit.
+    """
+    __slots__ = ('business_index', 'categories', 'category_index', 'units', 'base', 'base_high', 'minimum',
+                 'low', 'high', 'tiers', 'area_rules', 'located_areas', 'compiled_at')
+
+    def __init__(self, services, areas, rules):
+        self.business_index = {}
+        self.categories = sorted({s.service_category for s in services})
+        self.category_index = {c: j for j, c in enumerate(self.categories)}
+        for s in services:
+            self.business_index.setdefault(s.business_id, len(self.business_index))
+
+        size = len(self.business_index) * len(self.categories)
+        self.base = array('d', [math.nan]) * size
+        self.base_high = array('d', [math.nan]) * size
+        self.minimum = array('d', [0.0]) * size
+        self.low = array('d', [1.0]) * size
+        self.high = array('d', [1.0]) * size
+        self.units = [None] * size
+        slots = {}
+        for s in services:
+            slots.setdefault(self._slot(s.business_id, s.service_category), []).append(s)
+        for k, offered in slots.items():
+            cheapest = min(offered, key=lambda s: float(s.base_price or 0))
+            prices = [float(s.base_price or 0) for s in offered if s.price_unit == cheapest.price_unit]
+            self.base[k] = min(prices)
+            self.base_high[k] = max(prices)
+            self.minimum[k] = float(cheapest.minimum_charge or 0)
+            self.units[k] = cheapest.price_unit
+
+        # service_area_id -> {category: multiplier}
+        self.area_rules = {}
+        for rule in rules:
+            self.area_rules.setdefault(rule.service_area_id, {})[rule.service_category] = rule.multiplier
+
+        # business_id -> its radius and polygon areas, for areas_at
+        self.located_areas = {}
+        for area in areas:
+            if getattr(area, 'area_type', None) in LOCATED_AREA_TYPES:
+                self.located_areas.setdefault(area.business_id, []).append(area)
+
+        # Without a location a business's price spans the multipliers of all its areas
+        seen = set()
+        for area in areas:
+            i = self.business_index.get(area.business_id)
+            if i is None:
+                continue
+            for j, category in enumerate(self.categories):
+                k = i * len(self.categories) + j
+                multiplier = self.multiplier(area.id, category)
+                if k in seen:
+                    self.low[k] = min(self.low[k], multiplier)
+                    self.high[k] = max(self.high[k], multiplier)
+                else:
+                    self.low[k] = self.high[k] = multiplier
+                    seen.add(k)
+
+        self.tiers = self._tiers()
+        self.compiled_at = datetime.utcnow()
+
+    def _slot(self, business_id, category):
+        return self.business_index[business_id] * len(self.categories) + self.category_index[category]
+
+    def _tiers(self):
+        """Price tier per business: tercile of its mid base price within each category, averaged"""
+        width = len(self.categories)
+        ranks = [[] for _ in self.business_index]
+        for j in range(width):
+            column = sorted(
+                ((self.base[i * width + j] + self.base_high[i * width + j]) / 2, i)
+                for i in range(len(self.business_index))
+                if not math.isnan(self.base[i * width + j])
+            )
+            for position, (_, i) in enumerate(column):
+                ranks[i].append(position * len(PRICE_TIERS) // len(column))
+        return array('b', [round(sum(r) / len(r)) if r else 1 for r in ranks])
+
+    def multiplier(self, area_id, category):
+        rules = self.area_rules.get(area_id)
+        if not rules:
+            return 1.0
+        return rules.get(category, rules.get(ALL_CATEGORIES, 1.0))
+
+    def tier(self, business_id):
+        """Index into PRICE_TIERS, or -1 for a business with no priced services"""
+        i = self.business_index.get(business_id)
+        return -1 if i is None else self.tiers[i]
+
+    def categories_for(self, business_id):
+        i = self.business_index.get(business_id)
+        if i is None:
+            return []
+        width = len(self.categories)
+        return [c for j, c in enumerate(self.categories) if not math.isnan(self.base[i * width + j])]
+
+    def areas_at(self, business_ids, lat, lng):
+        """business_id -> the first of its areas containing the point, for those that have one"""
+        located = {}
+        for business_id in business_ids:
+            for area in self.located_areas.get(business_id, ()):
+                if area_contains(area, lat, lng):
+                    located[business_id] = area.id
+                    break
+        return located
+
+    def price_ranges(self, business_ids, category=None, areas=None):
+        """business_id -> {'min', 'max', 'unit', 'minimumCharge', 'tier'} (None if nothing is priced).
+
+        ``areas`` maps business_id -> the service area covering the customer; those
+        businesses are priced with that area's multiplier instead of their full span.
+        Without a category the range covers only the categories priced in the same
+        unit as the cheapest one, so hourly and flat rates are never mixed.
+        """
+        width = len(self.categories)
+        columns = [self.category_index[category]] if category in self.category_index else (
+            [] if category else range(width)
+        )
+        areas = areas or {}
+        result = {}
+        for business_id in business_ids:
+            i = self.business_index.get(business_id)
+            if i is None or not columns:
+                result[business_id] = None
+                continue
+            area_id = areas.get(business_id)
+            priced = []
+            for j in columns:
+                k = i * width + j
+                if math.isnan(self.base[k]):
+                    continue
+                if area_id is not None:
+                    lo = hi = self.multiplier(area_id, self.categories[j])
+                else:
+                    lo, hi = self.low[k], self.high[k]
+                priced.append((self.base[k] * lo, self.base_high[k] * hi, self.minimum[k] * lo, self.units[k]))
+            if not priced:
+                result[business_id] = None
+                continue
+            low, _, minimum, unit = min(priced, key=lambda price: price[0])
+            result[business_id] = {
+                'min': round(low, 2),
+                'max': round(max(high for _, high, _, u in priced if u == unit), 2),
+                'unit': unit,
+                'minimumCharge': round(minimum, 2),
+                'tier': PRICE_TIERS[self.tiers[i]]
+            }
+        return result
+
+def compile_table():
+    services = BusinessService.query.with_entities(
+        BusinessService.business_id, BusinessService.service_category, BusinessService.base_price,
+        BusinessService.minimum_charge, BusinessService.price_unit
+    ).filter(BusinessService.is_available.is_(True)).all()
+    areas = ServiceArea.query.with_entities(
+        ServiceArea.id, ServiceArea.business_id, ServiceArea.area_type, ServiceArea.center_lat,
+        ServiceArea.center_lng, ServiceArea.radius_miles, ServiceArea.polygon
+    ).filter(ServiceArea.is_active.is_(True)).all()
+    rules = AreaPriceRule.query.all()
+    return PriceTable(services, areas, rules)
+
+class PricingState:
+    """Per-app published table and whether a committed edit made it stale"""
+
+    def __init__(self, app):
+        self.ttl_seconds = app.config.get('PRICING_TABLE_TTL_SECONDS', 300)
+        self.stale = False
+        # When the last TTL rebuild was started, so requests during a rebuild do not start another
+        self.requested_at = datetime.min
+        self.snapshot = Snapshot(app, 'price table', lambda table: compile_table(), refresh_in_background(app))
+
+def get_price_table():
+    """The published table; a local price edit or the TTL running out starts a rebuild"""
+    state = current_app.extensions['pricing']
+    table = state.snapshot.get()
+    now = datetime.utcnow()
+    if state.stale or (now - max(table.compiled_at, state.requested_at)).total_seconds() >= state.ttl_seconds:
+        state.stale = False
+        state.requested_at = now
+        state.snapshot.refresh()
+    return state.snapshot.value
+
+def set_area_rules(area, multipliers):
+    """Replace an area's multipliers; ``multipliers`` maps category (or 'default') -> factor"""
+    # A bulk delete bypasses the flush hook
+    db.session.info['pricing_changed'] = True
+    AreaPriceRule.query.filter_by(service_area_id=area.id).delete()
+    for category, multiplier in multipliers.items():
+        db.session.add(AreaPriceRule(
+            service_area_id=area.id,
+            service_category=ALL_CATEGORIES if category == 'default' else category,
+            business_id=area.business_id,
+            multiplier=float(multiplier)
+        ))
+
+def _note_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (BusinessService, ServiceArea, AreaPriceRule)):
+            session.info['pricing_changed'] = True
+            return
+
+def _mark_stale(session):
+    # Only after the commit, so a rebuild can never cache rows that are not committed yet
+    if session.info.pop('pricing_changed', False) and has_app_context():
+        state = current_app.extensions.get('pricing')
+        if state is not None:
+            state.stale = True
+
+def _discard_rolled_back(session):
+    session.info.pop('pricing_changed', None)
+
+def init_app(app):
+    """Recompile price tables on local price edits and every PRICING_TABLE_TTL_SECONDS"""
+    app.extensions['pricing'] = PricingState(app)
+    for name, fn in (('after_flush', _note_changes), ('after_commit', _mark_stale),
+                     ('after_rollback', _discard_rolled_back)):
+        if not event.contains(Session, name, fn):
+            event.listen(Session, name, fn)
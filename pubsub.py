@@ -0,0 +1,171 @@
+from flask import current_app
+from collections import deque
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class Event:
+    __slots__ = ('id', 'channel', 'type', 'data')
+
+    def __init__(self, id, channel, type, data):
+        self.id = id
+        self.channel = channel
+        self.type = type
+        self.data = data
+
+    def to_sse(self):
+        return f'id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, separators=(",", ":"))}\n\n'
+
+class InProcessBroker:
+    """Pub/sub within one process, keeping a short per-channel replay buffer.
+
+    Event IDs are microsecond timestamps made strictly increasing, so a client's
+    Last-Event-ID stays meaningful across restarts.
+    """
+
+    def __init__(self, buffer_size=100):
+        self.buffer_size = buffer_size
+        self._channels = {}
+        self._condition = threading.Condition()
+        self._last_id = 0
+
+    def publish(self, channel, event_type, data):
+        with self._condition:
+            self._last_id = max(self._last_id + 1, time.time_ns() // 1000)
+            event = Event(self._last_id, channel, event_type, data)
+            buffer = self._channels.get(channel)
+            if buffer is None:
+                buffer = self._channels[channel] = deque(maxlen=self.buffer_size)
+            buffer.append(event)
+            self._condition.notify_all()
+        return event
+
+    def _since(self, channel, after_id):
+        buffer = self._channels.get(channel)
+        if not buffer:
+            return []
+        return [event for event in buffer if event.id > after_id]
+
+    def wait_for(self, channel, after_id, timeout):
+        """Return events after ``after_id``, blocking up to ``timeout`` seconds for new ones"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            events = self._since(channel, after_id)
+            while not events:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+                events = self._since(channel, after_id)
+            return events
+
+class SQLiteBroker:
+    """Pub/sub shared by all worker processes through a SQLite file.
+
+    Publishing inserts a row; subscribers poll for rows after their last ID.
+    Rows older than ``retention_seconds`` are pruned on publish.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pubsub_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        channel TEXT NOT NULL,
+        type TEXT NOT NULL,
+        data TEXT NOT NULL,
+        created_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_pubsub_channel_id ON pubsub_events(channel, id);
+    """
+
+    def __init__(self, path, poll_interval=0.5, retention_seconds=3600):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._local = threading.local()
+        self._publishes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def publish(self, channel, event_type, data):
+        conn = self._connection()
+        now = time.time()
+        cursor = conn.execute(
+            'INSERT INTO pubsub_events (channel, type, data, created_at) VALUES (?, ?, ?, ?)',
+            (channel, event_type, json.dumps(data), now)
+        )
+        self._publishes += 1
+        if self._publishes % 500 == 0:
+            conn.execute('DELETE FROM pubsub_events WHERE created_at < ?', (now - self.retention_seconds,))
+        return Event(cursor.lastrowid, channel, event_type, data)
+
+    def wait_for(self, channel, after_id, timeout):
+        deadline = time.monotonic() + timeout
+        conn = self._connection()
+        while True:
+            rows = conn.execute(
+                'SELECT id, type, data FROM pubsub_events WHERE channel = ? AND id > ? ORDER BY id LIMIT 100',
+                (channel, after_id)
+            ).fetchall()
+            if rows or time.monotonic() >= deadline:
+                return [Event(row[0], channel, row[1], json.loads(row[2])) for row in rows]
+            time.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+
+_broker_lock = threading.Lock()
+
+def get_broker(app=None):
+    """Return the application's event broker, creating it on first use"""
+    app = app or current_app._get_current_object()
+    broker = app.extensions.get('event_broker')
+    if broker is not None:
+        return broker
+    with _broker_lock:
+        broker = app.extensions.get('event_broker')
+        if broker is not None:
+            return broker
+        if app.config.get('EVENT_BROKER', 'memory') == 'sqlite':
+            broker = SQLiteBroker(
+                app.config['EVENT_BROKER_PATH'],
+                poll_interval=app.config.get('EVENT_BROKER_POLL_INTERVAL', 0.5)
+            )
+        else:
+            broker = InProcessBroker(buffer_size=app.config.get('EVENT_BUFFER_SIZE', 100))
+        app.extensions['event_broker'] = broker
+    return broker
+
+def get_stream_slots(app=None):
+    """Semaphore bounding this process's open event streams (SSE_MAX_CONNECTIONS)"""
+    app = app or current_app._get_current_object()
+    slots = app.extensions.get('event_stream_slots')
+    if slots is not None:
+        return slots
+    with _broker_lock:
+        slots = app.extensions.get('event_stream_slots')
+        if slots is None:
+            slots = app.extensions['event_stream_slots'] = threading.BoundedSemaphore(
+                app.config.get('SSE_MAX_CONNECTIONS', 50)
+            )
+    return slots
+
+def publish(channel, event_type, data):
+    """Publish an event from request code; delivery is best effort and never fails the request"""
+    try:
+        return get_broker().publish(channel, event_type, data)
+    except Exception:
+        logger.exception('Failed to publish %s on %s', event_type, channel)
+        return None
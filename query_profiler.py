@@ -0,0 +1,96 @@
+from flask import g, request
+from src.metrics import on_statement
+from collections import Counter
+from functools import lru_cache
+import logging
+import random
+import re
+
+logger = logging.getLogger(__name__)
+
+class NPlusOneError(RuntimeError):
+    """Raised when a request repeats the same statement shape too many times"""
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_BIND_PARAM = re.compile(r'%\(\w+\)s|:\w+|\$\d+|%s')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement):
+    """Reduce a statement to its shape: literals and bind params become ?, IN lists collapse"""
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _BIND_PARAM.sub('?', shape)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _IN_LIST.sub('IN (?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+class QueryProfile:
+    """Statements seen during one request"""
+
+    __slots__ = ('count', 'total_time', 'shapes')
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes = Counter()
+
+_settings = {
+    'slow_query_seconds': 0.1,
+    'n_plus_one_threshold': 10,
+    'sample_rate': 1.0,
+    'raise_on_n_plus_one': False
+}
+
+@on_statement
+def _observe_statement(statement, elapsed):
+    """Fold a statement timed by the metrics cursor hooks into the request's profile"""
+    profile = g.get('_query_profile')
+    if profile is None:
+        return
+    shape = normalize_sql(statement)
+    profile.count += 1
+    profile.total_time += elapsed
+    profile.shapes[shape] += 1
+    if elapsed >= _settings['slow_query_seconds']:
+        logger.warning(
+            'Slow query (%.1f ms) in %s %s: %s',
+            elapsed * 1000, request.method, request.endpoint or request.path, shape
+        )
+
+def _start_profile():
+    if _settings['sample_rate'] >= 1.0 or random.random() < _settings['sample_rate']:
+        g._query_profile = QueryProfile()
+
+def _check_profile(response):
+    profile = g.pop('_query_profile', None)
+    if profile is None:
+        return response
+    threshold = _settings['n_plus_one_threshold']
+    repeated = [(shape, count) for shape, count in profile.shapes.items() if count >= threshold]
+    if repeated:
+        route = f'{request.method} {request.endpoint or request.path}'
+        details = '; '.join(f'{count}x {shape}' for shape, count in repeated)
+        if _settings['raise_on_n_plus_one']:
+            raise NPlusOneError(f'Possible N+1 in {route}: {details}')
+        logger.warning('Possible N+1 in %s (%d queries, %.1f ms): %s',
+                       route, profile.count, profile.total_time * 1000, details)
+    return response
+
+def init_app(app):
+    """Enable per-request query counting, slow-query logging and N+1 detection.
+
+    In testing, every request is profiled and N+1 patterns raise NPlusOneError;
+    otherwise a QUERY_PROFILER_SAMPLE_RATE fraction of requests is profiled and
+    findings are logged.
+    """
+    if not app.config.get('QUERY_PROFILER_ENABLED', True):
+        return
+    _settings['slow_query_seconds'] = app.config.get('SLOW_QUERY_MS', 100) / 1000.0
+    _settings['n_plus_one_threshold'] = app.config.get('N_PLUS_ONE_THRESHOLD', 10)
+    _settings['sample_rate'] = 1.0 if app.testing else app.config.get('QUERY_PROFILER_SAMPLE_RATE', 0.05)
+    _settings['raise_on_n_plus_one'] = app.config.get('QUERY_PROFILER_RAISE', app.testing)
+
+    app.before_request(_start_profile)
+    app.after_request(_check_profile)
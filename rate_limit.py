@@ -0,0 +1,168 @@
+from flask import current_app, request
+from src.responses import error_response
+from functools import wraps
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+
+PERIODS = {
+    'second': 1.0,
+    'minute': 60.0,
+    'hour': 3600.0,
+    'day': 86400.0
+}
+
+def parse_limit(limit):
+    """Parse '60/minute' or '60/minute;burst=20' into (tokens per second, capacity)"""
+    spec, _, burst = limit.partition(';')
+    count, _, period = spec.strip().partition('/')
+    count = float(count)
+    rate = count / PERIODS[period.strip().lower()]
+    capacity = float(burst.split('=', 1)[1]) if burst.strip().startswith('burst=') else count
+    return rate, capacity
+
+class MemoryBucketStore:
+    """Token buckets in process memory; suitable for a single worker process"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, capacity, now=None):
+        """Take one token; returns (allowed, tokens remaining, seconds until next token)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            if len(self._buckets) >= self.max_keys and key not in self._buckets:
+                self._evict(now)
+            self._buckets[key] = (tokens, now)
+        retry_after = 0.0 if allowed else (1.0 - tokens) / rate
+        return allowed, tokens, retry_after
+
+    def _evict(self, now):
+        # Buckets idle long enough to be full again carry no state worth keeping
+        idle = [k for k, (_, updated) in self._buckets.items() if now - updated > 3600]
+        for k in idle or list(self._buckets)[:len(self._buckets) // 10]:
+            del self._buckets[k]
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file shared by all worker processes.
+
+    Each check is a single atomic UPSERT. Point the path at tmpfs
+    (e.g. /dev/shm/bulk-pickup-ratelimit.db) to keep it in shared memory.
+    """
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS rate_limit_buckets ('
+        ' key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, granted INTEGER NOT NULL'
+        ') WITHOUT ROWID'
+    )
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection().execute(self.SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key, rate, capacity, now=None):
+        now = time.time() if now is None else now
+        tokens, granted = self._connection().execute(
+            'INSERT INTO rate_limit_buckets (key, tokens, updated, granted) VALUES (:key, :capacity - 1, :now, 1) '
+            'ON CONFLICT(key) DO UPDATE SET '
+            ' tokens = CASE WHEN MIN(:capacity, tokens + (:now - updated) * :rate) >= 1 '
+            '   THEN MIN(:capacity, tokens + (:now - updated) * :rate) - 1 '
+            '   ELSE MIN(:capacity, tokens + (:now - updated) * :rate) END, '
+            ' granted = MIN(:capacity, tokens + (:now - updated) * :rate) >= 1, '
+            ' updated = :now '
+            'RETURNING tokens, granted',
+            {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+        ).fetchone()
+        allowed = bool(granted)
+        retry_after = 0.0 if allowed else (1.0 - tokens) / rate
+        return allowed, tokens, retry_after
+
+def _client_ip():
+    if current_app.config.get('RATE_LIMIT_TRUST_PROXY'):
+        return request.access_route[0] if request.access_route else request.remote_addr
+    return request.remote_addr
+
+def _client_user():
+    # Until JWT auth lands, a bearer token identifies the caller
+    authorization = request.headers.get('Authorization')
+    if not authorization:
+        return None
+    return hashlib.sha1(authorization.encode('utf-8')).hexdigest()
+
+def rate_limit(name, default='60/minute', user_default=None):
+    """Limit a view per client IP and, when identified, per user.
+
+    Limits are '<count>/<second|minute|hour|day>[;burst=<n>]' strings and can be
+    overridden per route through the RATE_LIMITS config mapping
+    (``name`` for the IP limit, ``name + ':user'`` for the user limit).
+    Rejections return 429 before the view runs, without touching the database.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = current_app.extensions.get('rate_limiter')
+            if limiter is None:
+                return view(*args, **kwargs)
+
+            limits = current_app.config.get('RATE_LIMITS', {})
+            checks = [(f'ip:{name}:{_client_ip()}', limits.get(name, default))]
+            user = _client_user()
+            if user is not None:
+                checks.append((f'user:{name}:{user}', limits.get(f'{name}:user', user_default or default)))
+
+            for key, limit in checks:
+                rate, capacity = limiter.parse(limit)
+                allowed, remaining, retry_after = limiter.store.consume(key, rate, capacity)
+                if not allowed:
+                    response, status = error_response('RATE_LIMITED', 'Too many requests, please slow down', 429)
+                    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                    response.headers['X-RateLimit-Limit'] = str(int(capacity))
+                    response.headers['X-RateLimit-Remaining'] = '0'
+                    return response, status
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class RateLimiter:
+    def __init__(self, store):
+        self.store = store
+        self._parsed = {}
+
+    def parse(self, limit):
+        parsed = self._parsed.get(limit)
+        if parsed is None:
+            parsed = self._parsed[limit] = parse_limit(limit)
+        return parsed
+
+def init_app(app):
+    """Attach the configured bucket store; 'memory' for one process, 'sqlite' for many"""
+    if not app.config.get('RATE_LIMIT_ENABLED', True):
+        return
+    if app.config.get('RATE_LIMIT_STORAGE', 'memory') == 'sqlite':
+        store = SQLiteBucketStore(app.config['RATE_LIMIT_STORAGE_PATH'])
+    else:
+        store = MemoryBucketStore()
+    app.extensions['rate_limiter'] = RateLimiter(store)
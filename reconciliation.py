@@ -0,0 +1,213 @@
+from src.models.booking import db, Booking, Payment
+from abc import ABC, abstractmethod
+from datetime import datetime
+from decimal import Decimal
+import uuid
+
+# Local statuses that still need confirmation from the processor
+UNSETTLED_STATUSES = ('pending', 'processing')
+
+# Processor status -> booking payment status
+BOOKING_PAYMENT_STATUS = {
+    'succeeded': 'paid',
+    'failed': 'failed',
+    'cancelled': 'failed',
+    'refunded': 'refunded'
+}
+
+class PaymentDiscrepancy(db.Model):
+    __tablename__ = 'payment_discrepancies'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    payment_id = db.Column(db.String(36), nullable=False, index=True)
+    payment_intent_id = db.Column(db.String(255))
+    discrepancy_type = db.Column(db.String(50), nullable=False)
+    local_value = db.Column(db.String(255))
+    processor_value = db.Column(db.String(255))
+    run_id = db.Column(db.String(36), nullable=False, index=True)
+    is_resolved = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'paymentId': self.payment_id,
+            'paymentIntentId': self.payment_intent_id,
+            'type': self.discrepancy_type,
+            'localValue': self.local_value,
+            'processorValue': self.processor_value,
+            'runId': self.run_id,
+            'isResolved': self.is_resolved,
+            'createdAt': self.created_at.isoformat() + 'Z' if self.created_at else None
+        }
+
+class PaymentProcessorClient(ABC):
+    """Interface for payment processor lookups used by reconciliation.
+
+    Implementations return a dict keyed by payment intent ID with 'status', 'amount'
+    (Decimal), 'currency' and optionally 'chargeId' and 'failureReason'. Unknown
+    intents are simply absent from the result.
+    """
+
+    max_batch_size = 100
+
+    @abstractmethod
+    def fetch_payments(self, payment_intent_ids):
+        """Look up a batch of at most ``max_batch_size`` payment intents"""
+
+class FakePaymentProcessor(PaymentProcessorClient):
+    """In-memory processor for tests and local development"""
+
+    def __init__(self, payments=None):
+        self.payments = dict(payments or {})
+        self.calls = []
+
+    def set_payment(self, payment_intent_id, status, amount, currency='USD', charge_id=None, failure_reason=None):
+        self.payments[payment_intent_id] = {
+            'status': status,
+            'amount': Decimal(str(amount)),
+            'currency': currency,
+            'chargeId': charge_id,
+            'failureReason': failure_reason
+        }
+
+    def fetch_payments(self, payment_intent_ids):
+        self.calls.append(list(payment_intent_ids))
+        return {pid: self.payments[pid] for pid in payment_intent_ids if pid in self.payments}
+
+PAYMENT_PROCESSORS = {
+    'fake': FakePaymentProcessor
+}
+
+def get_payment_processor(name):
+    """Instantiate a registered processor client by name"""
+    try:
+        return PAYMENT_PROCESSORS[name]()
+    except KeyError:
+        raise ValueError(f'Unknown payment processor: {name}')
+
+def _iter_unsettled_chunks(chunk_size):
+    """Yield unsettled payments in keyset-paginated chunks of lightweight rows"""
+    last_id = ''
+    while True:
+        rows = db.session.query(
+            Payment.id,
+            Payment.booking_id,
+            Payment.payment_intent_id,
+            Payment.amount,
+            Payment.currency,
+            Payment.payment_status
+        ).filter(
+            Payment.payment_status.in_(UNSETTLED_STATUSES),
+            Payment.id > last_id
+        ).order_by(Payment.id).limit(chunk_size).all()
+
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+def _open_discrepancies(payment_ids):
+    """(payment_id, type) pairs already recorded and not yet resolved"""
+    return set(db.session.query(PaymentDiscrepancy.payment_id, PaymentDiscrepancy.discrepancy_type).filter(
+        PaymentDiscrepancy.payment_id.in_(payment_ids),
+        PaymentDiscrepancy.is_resolved.is_(False)
+    ).all())
+
+def reconcile_payments(processor, chunk_size=1000, batch_size=None):
+    """Reconcile unsettled payments against the processor.
+
+    Payments are streamed in chunks and looked up in processor-sized batches.
+    Changed payments and their bookings are loaded with one query each per chunk
+    and updated through the ORM, so the flush hooks (change log, rollups) see
+    them and customers' booking streams are notified after the commit.
+    Differences in amount or currency, and intents the processor does not know
+    about, are recorded as PaymentDiscrepancy rows, once per payment and kind
+    until resolved. Returns a summary of the run.
+    """
+    from src.routes.booking import publish_booking_status
+
+    batch_size = min(batch_size or processor.max_batch_size, processor.max_batch_size)
+    run_id = str(uuid.uuid4())
+    summary = {
+        'runId': run_id,
+        'checked': 0,
+        'updated': 0,
+        'unchanged': 0,
+        'discrepancies': 0
+    }
+
+    for rows in _iter_unsettled_chunks(chunk_size):
+        now = datetime.utcnow()
+        payment_updates = {}
+        booking_statuses = {}
+        discrepancies = []
+        recorded = _open_discrepancies([row.id for row in rows])
+
+        def discrepancy(row, kind, local_value, processor_value):
+            if (row.id, kind) in recorded:
+                return
+            recorded.add((row.id, kind))
+            discrepancies.append(PaymentDiscrepancy(
+                payment_id=row.id,
+                payment_intent_id=row.payment_intent_id,
+                discrepancy_type=kind,
+                local_value=local_value,
+                processor_value=processor_value,
+                run_id=run_id,
+                created_at=now
+            ))
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            intent_ids = [row.payment_intent_id for row in batch if row.payment_intent_id]
+            remote = processor.fetch_payments(intent_ids) if intent_ids else {}
+
+            for row in batch:
+                summary['checked'] += 1
+                record = remote.get(row.payment_intent_id) if row.payment_intent_id else None
+
+                if record is None:
+                    discrepancy(row, 'missing_at_processor', row.payment_status, None)
+                    continue
+
+                if Decimal(str(row.amount)) != record['amount']:
+                    discrepancy(row, 'amount_mismatch', str(row.amount), str(record['amount']))
+                if (row.currency or 'USD').upper() != (record.get('currency') or 'USD').upper():
+                    discrepancy(row, 'currency_mismatch', row.currency, record.get('currency'))
+
+                if record['status'] == row.payment_status:
+                    summary['unchanged'] += 1
+                    continue
+
+                payment_updates[row.id] = record
+                if record['status'] in BOOKING_PAYMENT_STATUS:
+                    booking_statuses[row.booking_id] = BOOKING_PAYMENT_STATUS[record['status']]
+
+        if payment_updates:
+            for payment in Payment.query.filter(Payment.id.in_(list(payment_updates))).all():
+                record = payment_updates[payment.id]
+                payment.payment_status = record['status']
+                payment.updated_at = now
+                if record.get('chargeId'):
+                    payment.stripe_charge_id = record['chargeId']
+                if record.get('failureReason'):
+                    payment.failure_reason = record['failureReason']
+                if record['status'] not in UNSETTLED_STATUSES:
+                    payment.processed_at = now
+        bookings = Booking.query.filter(Booking.id.in_(list(booking_statuses))).all() if booking_statuses else []
+        for booking in bookings:
+            booking.payment_status = booking_statuses[booking.id]
+            booking.updated_at = now
+        db.session.add_all(discrepancies)
+        db.session.commit()
+
+        if bookings:
+            # One query refreshes every booking the commit expired
+            for booking in Booking.query.filter(Booking.id.in_(list(booking_statuses))).all():
+                publish_booking_status(booking)
+
+        summary['updated'] += len(payment_updates)
+        summary['discrepancies'] += len(discrepancies)
+
+    return summary
@@ -0,0 +1,124 @@
+from flask import g, jsonify
+from flask.json.provider import DefaultJSONProvider
+from datetime import datetime, date, time
+from decimal import Decimal
+from time import perf_counter
+from src.metrics import add_timing
+import itertools
+import json
+import os
+import uuid
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+# Request IDs are a per-process random prefix plus a monotonic counter, so they
+# are unique across workers and never collide under load the way float
+# timestamps do.
+_request_id_prefix = uuid.uuid4().hex[:8]
+_request_id_counter = itertools.count(1)
+_request_id_pid = os.getpid()
+
+def next_request_id():
+    """Return a new process-unique, monotonically increasing request ID"""
+    global _request_id_prefix, _request_id_counter, _request_id_pid
+    if os.getpid() != _request_id_pid:
+        # Forked worker: don't share the parent's prefix
+        _request_id_prefix = uuid.uuid4().hex[:8]
+        _request_id_counter = itertools.count(1)
+        _request_id_pid = os.getpid()
+    return f'req_{_request_id_prefix}{next(_request_id_counter):x}'
+
+def request_meta():
+    """Return the (timestamp, requestId) pair for the current request, computed once"""
+    meta = g.get('_envelope_meta')
+    if meta is None:
+        meta = (datetime.utcnow().isoformat() + 'Z', next_request_id())
+        g._envelope_meta = meta
+    return meta
+
+def success_response(data=None, message=None, status=200):
+    """Build the standard success envelope"""
+    timestamp, request_id = request_meta()
+    body = {'success': True}
+    if data is not None:
+        body['data'] = data
+    if message:
+        body['message'] = message
+    body['timestamp'] = timestamp
+    body['requestId'] = request_id
+    return jsonify(body), status
+
+def error_response(code, message, status=400, details=None):
+    """Build the standard error envelope"""
+    timestamp, request_id = request_meta()
+    error = {
+        'code': code,
+        'message': message
+    }
+    if details is not None:
+        error['details'] = details
+    return jsonify({
+        'success': False,
+        'error': error,
+        'timestamp': timestamp,
+        'requestId': request_id
+    }), status
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat() + ('Z' if obj.tzinfo is None else '')
+    if isinstance(obj, (date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def _dumps_bytes(obj, indent=False):
+        option = _ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else _ORJSON_OPTIONS
+        return orjson.dumps(obj, default=_json_default, option=option)
+
+    _loads = orjson.loads
+else:
+    def _dumps_bytes(obj, indent=False):
+        return json.dumps(
+            obj,
+            default=_json_default,
+            ensure_ascii=False,
+            indent=2 if indent else None,
+            separators=None if indent else (',', ':')
+        ).encode('utf-8')
+
+    _loads = json.loads
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson when installed, with a stdlib fallback.
+
+    Naive datetimes are rendered as ISO 8601 UTC with a trailing 'Z', dates and
+    times as ISO strings and Decimals as numbers. Keys are not sorted.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        return _dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return _loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        start = perf_counter()
+        body = _dumps_bytes(obj, indent=indent)
+        add_timing('_serialize_time', perf_counter() - start)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,277 @@
+from src.models.user import db
+from src.models.booking import ServiceRequest, ServiceQuote, Booking
+from src.coverage import LeadAssignment
+from sqlalchemy import event, func, select, inspect, literal, bindparam
+from sqlalchemy.orm import Session
+from datetime import datetime, date, timedelta
+
+# Dimension value for demand not attributed to a business or service area
+UNASSIGNED = ''
+
+COUNTERS = ('requests', 'quotes', 'bookings', 'completed', 'cancelled', 'revenue')
+
+class ServiceAreaDailyStats(db.Model):
+    """Daily counters per business x service area x category, updated as rows are written.
+
+    On a business's rows ``requests`` counts leads routed to it; rows with
+    business_id == '' hold area-wide demand (all new service requests), each
+    request counted once under the lowest service area id it was routed through,
+    or under '' when no business took it.
+    """
+    __tablename__ = 'service_area_daily_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    business_id = db.Column(db.String(36), primary_key=True)
+    service_area_id = db.Column(db.String(36), primary_key=True)
+    service_category = db.Column(db.String(100), primary_key=True)
+    requests = db.Column(db.Integer, nullable=False, default=0)
+    quotes = db.Column(db.Integer, nullable=False, default=0)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    cancelled = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_service_area_daily_stats_business_day', 'business_id', 'day'),
+    )
+
+_settings = {
+    'enabled': False
+}
+
+def resolve_service_areas(connection, pairs):
+    """Service area through which each (request_id, business_id) lead was routed, in one query"""
+    if not pairs:
+        return {}
+    rows = connection.execute(
+        select(LeadAssignment.request_id, LeadAssignment.business_id, LeadAssignment.service_area_id)
+        .where(LeadAssignment.request_id.in_({request_id for request_id, _ in pairs}))
+    )
+    return {(request_id, business_id): area for request_id, business_id, area in rows
+            if (request_id, business_id) in pairs}
+
+def demand_areas(connection, request_ids):
+    """The one service area each request's demand is counted under, in one query"""
+    if not request_ids:
+        return {}
+    return dict(connection.execute(
+        select(LeadAssignment.request_id, func.min(LeadAssignment.service_area_id))
+        .where(LeadAssignment.request_id.in_(request_ids))
+        .group_by(LeadAssignment.request_id)
+    ).all())
+
+def _categories(connection, request_ids):
+    if not request_ids:
+        return {}
+    return dict(connection.execute(
+        select(ServiceRequest.id, ServiceRequest.service_category).where(ServiceRequest.id.in_(request_ids))
+    ).all())
+
+def _status_changed_to(obj, attribute, value):
+    history = inspect(obj).attrs[attribute].history
+    return history.has_changes() and value in history.added
+
+def _collect(session, connection):
+    """Counter increments implied by the pending flush: key -> {counter: delta}"""
+    # (request_id, business_id, counter, amount, category, area); missing dimensions are
+    # looked up below with one query each rather than once per row
+    events = []
+
+    def bump(request_id, business_id, counter, amount=1, category=None, area=None):
+        events.append((request_id, business_id, counter, amount, category, area))
+
+    for obj in session.new:
+        if isinstance(obj, ServiceRequest):
+            # Leads are usually routed in a later flush; the demand row waits for the commit
+            session.info.setdefault('rollup_new_requests', {})[obj.id] = obj.service_category
+        elif isinstance(obj, ServiceQuote):
+            bump(obj.request_id, obj.business_id, 'quotes')
+        elif isinstance(obj, Booking):
+            bump(obj.request_id, obj.business_id, 'bookings')
+        elif isinstance(obj, LeadAssignment):
+            # On a business's rows, requests counts the leads routed to it
+            bump(obj.request_id, obj.business_id, 'requests', area=obj.service_area_id)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Booking):
+            continue
+        if _status_changed_to(obj, 'booking_status', 'completed'):
+            bump(obj.request_id, obj.business_id, 'completed')
+            bump(obj.request_id, obj.business_id, 'revenue', obj.final_amount or 0)
+        elif _status_changed_to(obj, 'booking_status', 'cancelled'):
+            bump(obj.request_id, obj.business_id, 'cancelled')
+
+    categories = _categories(connection, {event[0] for event in events if event[4] is None})
+    areas = resolve_service_areas(connection, {
+        (request_id, business_id) for request_id, business_id, _, _, _, area in events
+        if area is None and business_id
+    })
+
+    today = datetime.utcnow().date()
+    deltas = {}
+    for request_id, business_id, counter, amount, category, area in events:
+        category = category or categories.get(request_id) or 'unknown'
+        if area is None:
+            area = areas.get((request_id, business_id)) or UNASSIGNED
+        key = (today, business_id or UNASSIGNED, area, category)
+        counters = deltas.setdefault(key, {})
+        counters[counter] = counters.get(counter, 0) + amount
+    return deltas
+
+def _upsert_statement(connection):
+    """Dialect-native upsert adding to the counters, or None where there is none"""
+    dialect = connection.dialect.name
+    table = ServiceAreaDailyStats.__table__
+    if dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(table)
+        return statement.on_duplicate_key_update({name: table.c[name] + statement.inserted[name] for name in COUNTERS})
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[c.name for c in table.primary_key.columns],
+        set_={name: table.c[name] + statement.excluded[name] for name in COUNTERS}
+    )
+
+def _update_then_insert(connection, rows):
+    """Portable fallback: add to the rows that exist, insert the rest.
+
+    One UPDATE per row, since executemany row counts are not reliable on every driver.
+    """
+    table = ServiceAreaDailyStats.__table__
+    keys = [c.name for c in table.primary_key.columns]
+    update = table.update().where(*[table.c[key] == bindparam(f'key_{key}') for key in keys]).values(
+        {name: table.c[name] + bindparam(f'add_{name}') for name in COUNTERS}
+    )
+    missing = []
+    for row in rows:
+        params = {f'key_{key}': row[key] for key in keys}
+        params.update({f'add_{name}': row[name] for name in COUNTERS})
+        if connection.execute(update, params).rowcount == 0:
+            missing.append(row)
+    if missing:
+        connection.execute(table.insert(), missing)
+
+def apply_deltas(connection, deltas):
+    """Add counter deltas to their rollup rows in one upsert"""
+    if not deltas:
+        return
+    rows = []
+    for (day, business_id, area, category), counters in deltas.items():
+        row = {'day': day, 'business_id': business_id, 'service_area_id': area, 'service_category': category}
+        row.update({name: counters.get(name, 0) for name in COUNTERS})
+        rows.append(row)
+    statement = _upsert_statement(connection)
+    if statement is None:
+        _update_then_insert(connection, rows)
+    else:
+        connection.execute(statement, rows)
+
+def _update_rollups(session, flush_context):
+    # Runs inside the flush, so rollups commit or roll back with the rows they count
+    if not _settings['enabled']:
+        return
+    connection = session.connection()
+    apply_deltas(connection, _collect(session, connection))
+
+def _count_demand(session):
+    """Count the transaction's new requests once their leads are routed, just before it commits"""
+    if not _settings['enabled']:
+        return
+    # Pushes anything still pending, so this transaction's lead assignments are visible
+    session.flush()
+    requests = session.info.pop('rollup_new_requests', None)
+    if not requests:
+        return
+    connection = session.connection()
+    areas = demand_areas(connection, list(requests))
+    today = datetime.utcnow().date()
+    deltas = {}
+    for request_id, category in requests.items():
+        key = (today, UNASSIGNED, areas.get(request_id) or UNASSIGNED, category or 'unknown')
+        counters = deltas.setdefault(key, {})
+        counters['requests'] = counters.get('requests', 0) + 1
+    apply_deltas(connection, deltas)
+
+def _discard_rolled_back(session, previous_transaction=None):
+    session.info.pop('rollup_new_requests', None)
+
+def _attributed(source, day_column, request_column, business_column, value, *conditions):
+    """(day, business, area, category, value) rows with the area taken from the lead assignment"""
+    return (
+        select(func.date(day_column), business_column, LeadAssignment.service_area_id,
+               ServiceRequest.service_category, value)
+        .select_from(source)
+        .outerjoin(ServiceRequest, ServiceRequest.id == request_column)
+        .outerjoin(LeadAssignment, (LeadAssignment.request_id == request_column)
+                   & (LeadAssignment.business_id == business_column))
+        .where(*conditions)
+    )
+
+def backfill(start=None, end=None, days_per_chunk=31):
+    """Rebuild rollups from the base tables for [start, end], one date chunk at a time"""
+    end = end or datetime.utcnow().date()
+    start = start or (db.session.query(func.min(ServiceRequest.created_at)).scalar() or datetime.utcnow()).date()
+    table = ServiceAreaDailyStats.__table__
+    rebuilt = 0
+
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=days_per_chunk - 1), end)
+        lower = datetime.combine(chunk_start, datetime.min.time())
+        upper = datetime.combine(chunk_end + timedelta(days=1), datetime.min.time())
+        connection = db.session.connection()
+        deltas = {}
+
+        def add(statement, counter):
+            for day, business_id, area, category, value in connection.execute(statement):
+                if isinstance(day, str):
+                    day = date.fromisoformat(day)
+                key = (day, business_id or UNASSIGNED, area or UNASSIGNED, category or 'unknown')
+                counters = deltas.setdefault(key, {})
+                counters[counter] = counters.get(counter, 0) + (value or 0)
+
+        demand_area = (
+            select(LeadAssignment.request_id, func.min(LeadAssignment.service_area_id).label('area'))
+            .group_by(LeadAssignment.request_id).subquery()
+        )
+        add(select(func.date(ServiceRequest.created_at), literal(UNASSIGNED), demand_area.c.area,
+                   ServiceRequest.service_category, literal(1))
+            .outerjoin(demand_area, demand_area.c.request_id == ServiceRequest.id)
+            .where(ServiceRequest.created_at >= lower, ServiceRequest.created_at < upper), 'requests')
+        add(select(func.date(LeadAssignment.created_at), LeadAssignment.business_id, LeadAssignment.service_area_id,
+                   ServiceRequest.service_category, literal(1))
+            .join(ServiceRequest, ServiceRequest.id == LeadAssignment.request_id)
+            .where(LeadAssignment.created_at >= lower, LeadAssignment.created_at < upper), 'requests')
+        add(_attributed(ServiceQuote, ServiceQuote.created_at, ServiceQuote.request_id, ServiceQuote.business_id, literal(1),
+                        ServiceQuote.created_at >= lower, ServiceQuote.created_at < upper), 'quotes')
+        add(_attributed(Booking, Booking.created_at, Booking.request_id, Booking.business_id, literal(1),
+                        Booking.created_at >= lower, Booking.created_at < upper), 'bookings')
+        completed = (Booking.booking_status == 'completed', Booking.completed_at >= lower, Booking.completed_at < upper)
+        add(_attributed(Booking, Booking.completed_at, Booking.request_id, Booking.business_id, literal(1),
+                        *completed), 'completed')
+        add(_attributed(Booking, Booking.completed_at, Booking.request_id, Booking.business_id, Booking.final_amount,
+                        *completed), 'revenue')
+        add(_attributed(Booking, Booking.updated_at, Booking.request_id, Booking.business_id, literal(1),
+                        Booking.booking_status == 'cancelled', Booking.updated_at >= lower, Booking.updated_at < upper),
+            'cancelled')
+
+        connection.execute(table.delete().where(table.c.day >= chunk_start, table.c.day <= chunk_end))
+        apply_deltas(connection, deltas)
+        db.session.commit()
+        rebuilt += len(deltas)
+        chunk_start = chunk_end + timedelta(days=1)
+    return rebuilt
+
+def init_app(app):
+    """Keep rollups current on every flush and commit (ROLLUPS_ENABLED)"""
+    _settings['enabled'] = app.config.get('ROLLUPS_ENABLED', True)
+    for name, fn in (('after_flush', _update_rollups), ('before_commit', _count_demand),
+                     ('after_rollback', _discard_rolled_back)):
+        if not event.contains(Session, name, fn):
+            event.listen(Session, name, fn)
@@ -0,0 +1,376 @@
+from flask import Blueprint, request
+from src.responses import success_response, error_response
+from src.models.booking import db, ServiceRequest, ServiceQuote, Booking
+from src.schemas import Schema, ValidationError, String, Date, Time, Object, List
+from src.coverage import haversine_miles
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import atexit
+import math
+import threading
+
+routing_bp = Blueprint('routing', __name__)
+
+ROUTE_REQUEST_SCHEMA = Schema({
+    'date': Date(required=True),
+    'locations': Object(required=True),
+    'startTime': Time(),
+    'depot': Object(),
+    # One list of booking IDs per crew
+    'crews': List(schema=List(schema=String()))
+})
+
+# Average crew truck speed used to turn distances into drive time
+AVERAGE_SPEED_MPH = 25.0
+# Default on-site time per job when the accepted quote has no duration estimate
+DEFAULT_SERVICE_MINUTES = 45
+# Crews with at least this many stops are optimized in the process pool
+PROCESS_POOL_MIN_STOPS = 200
+PROCESS_POOL_WORKERS = 2
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def build_distance_matrix(points):
+    """Precompute the symmetric distance matrix (miles) for a list of (lat, lng) points"""
+    n = len(points)
+    matrix = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        lat1, lng1 = points[i]
+        row = matrix[i]
+        for j in range(i + 1, n):
+            d = haversine_miles(lat1, lng1, points[j][0], points[j][1])
+            row[j] = d
+            matrix[j][i] = d
+    return matrix
+
+def _minutes(t):
+    return t.hour * 60 + t.minute if t is not None else None
+
+def _schedule(order, matrix, windows, service, start_minute):
+    """Walk a visit order and return (arrival minutes, total lateness, total miles).
+
+    Node 0 is the depot; windows[i] is (earliest, latest) in minutes from midnight.
+    """
+    minutes_per_mile = 60.0 / AVERAGE_SPEED_MPH
+    clock = start_minute
+    prev = 0
+    arrivals = []
+    lateness = 0.0
+    miles = 0.0
+    for node in order:
+        miles += matrix[prev][node]
+        clock += matrix[prev][node] * minutes_per_mile
+        earliest, latest = windows[node]
+        if clock < earliest:
+            clock = earliest
+        if latest is not None and clock > latest:
+            lateness += clock - latest
+        arrivals.append(clock)
+        clock += service[node]
+        prev = node
+    return arrivals, lateness, miles
+
+def nearest_neighbour(matrix, windows, service, start_minute):
+    """Build an initial order greedily, preferring the nearest stop still reachable in its window"""
+    minutes_per_mile = 60.0 / AVERAGE_SPEED_MPH
+    unvisited = set(range(1, len(matrix)))
+    order = []
+    prev = 0
+    clock = start_minute
+    while unvisited:
+        feasible = [
+            node for node in unvisited
+            if windows[node][1] is None or clock + matrix[prev][node] * minutes_per_mile <= windows[node][1]
+        ]
+        if feasible:
+            # Waiting for a window to open counts as distance so we don't idle across town
+            node = min(feasible, key=lambda n: (
+                max(matrix[prev][n], (windows[n][0] - clock) / minutes_per_mile),
+                windows[n][0]
+            ))
+        else:
+            # Everything left will be late - serve the tightest deadline first
+            node = min(unvisited, key=lambda n: (windows[n][1], matrix[prev][n]))
+        clock = max(clock + matrix[prev][node] * minutes_per_mile, windows[node][0]) + service[node]
+        order.append(node)
+        unvisited.discard(node)
+        prev = node
+    return order
+
+def _segment(node, windows, service):
+    """Time-window data for a single stop: (duration, time warp, earliest start, latest start)"""
+    earliest, latest = windows[node]
+    return (service[node], 0.0, earliest, math.inf if latest is None else latest)
+
+def _concat(first, second, travel):
+    """Join two segments with ``travel`` minutes between them in O(1).
+
+    Lateness is scored as time warp: arriving after a window closes costs the
+    overshoot, and the crew is treated as starting on time from there, so a late
+    stop does not double count on every stop after it.
+    """
+    d1, tw1, e1, l1 = first
+    d2, tw2, e2, l2 = second
+    delta = d1 - tw1 + travel
+    wait = max(e2 - delta - l1, 0.0)
+    warp = max(e1 + delta - l2, 0.0)
+    return (d1 + d2 + travel + wait, tw1 + tw2 + warp, max(e2 - delta, e1) - wait, min(l2 - delta, l1) + warp)
+
+def time_warp(order, matrix, windows, service, start_minute):
+    """Total time warp of a visit order, the lateness measure two_opt minimizes"""
+    minutes_per_mile = 60.0 / AVERAGE_SPEED_MPH
+    route = (0.0, 0.0, start_minute, start_minute)
+    prev = 0
+    for node in order:
+        route = _concat(route, _segment(node, windows, service), matrix[prev][node] * minutes_per_mile)
+        prev = node
+    return route[1]
+
+def two_opt(order, matrix, windows, service, start_minute, max_passes=50):
+    """Improve an order with 2-opt segment reversals that never increase time warp.
+
+    Every candidate is scored in O(1): the distance change from the two replaced
+    edges, and the time warp from concatenating the unchanged prefix, the reversed
+    segment (grown one stop at a time) and the unchanged suffix. A pass is O(n^2).
+    """
+    n = len(order)
+    if n < 3:
+        return list(order)
+    minutes_per_mile = 60.0 / AVERAGE_SPEED_MPH
+    best = list(order)
+    depot = (0.0, 0.0, start_minute, start_minute)
+    single = [_segment(node, windows, service) for node in range(len(windows))]
+
+    def segments():
+        # prefix[k]: depot then best[:k]; suffix[k]: best[k:]
+        prefix = [depot]
+        prev = 0
+        for node in best:
+            prefix.append(_concat(prefix[-1], single[node], matrix[prev][node] * minutes_per_mile))
+            prev = node
+        suffix = [None] * (n + 1)
+        suffix[n - 1] = single[best[n - 1]]
+        for k in range(n - 2, -1, -1):
+            suffix[k] = _concat(single[best[k]], suffix[k + 1], matrix[best[k]][best[k + 1]] * minutes_per_mile)
+        return prefix, suffix
+
+    prefix, suffix = segments()
+    best_warp = prefix[n][1]
+    improved = True
+    passes = 0
+    while improved and passes < max_passes:
+        improved = False
+        passes += 1
+        for i in range(n - 1):
+            before = best[i - 1] if i else 0
+            reversed_segment = single[best[i]]
+            for j in range(i + 1, n):
+                # best[i..j] reversed is best[j] followed by the previous reversal
+                reversed_segment = _concat(single[best[j]], reversed_segment, matrix[best[j]][best[j - 1]] * minutes_per_mile)
+                gain = matrix[before][best[i]] - matrix[before][best[j]]
+                route = _concat(prefix[i], reversed_segment, matrix[before][best[j]] * minutes_per_mile)
+                if j + 1 < n:
+                    after = best[j + 1]
+                    gain += matrix[best[j]][after] - matrix[best[i]][after]
+                    route = _concat(route, suffix[j + 1], matrix[best[i]][after] * minutes_per_mile)
+                warp = route[1]
+                if warp < best_warp - 1e-9 or (warp <= best_warp + 1e-9 and gain > 1e-9):
+                    best[i:j + 1] = best[i:j + 1][::-1]
+                    best_warp = warp
+                    prefix, suffix = segments()
+                    improved = True
+                    break
+    return best
+
+def optimize_route(stops, depot=None, start_time=None):
+    """Order a single crew's stops.
+
+    Each stop is a dict with 'id', 'lat', 'lng', 'windowStart' and 'windowEnd' (the arrival
+    window, datetime.time or None) and optional 'serviceMinutes' on site. Returns the ordered
+    stops with estimated arrival times plus route totals.
+
+    totalLatenessMinutes adds up every stop's simulated lateness, so one late stop
+    makes the stops after it late too. totalTimeWarpMinutes counts each overshoot
+    once and is what the search minimizes. The returned route is never later, by
+    totalLatenessMinutes, than the greedy route the search started from.
+    """
+    if not stops:
+        return {'stops': [], 'totalMiles': 0.0, 'totalLatenessMinutes': 0.0, 'totalTimeWarpMinutes': 0.0}
+
+    if depot is None:
+        depot = (stops[0]['lat'], stops[0]['lng'])
+    points = [depot] + [(s['lat'], s['lng']) for s in stops]
+    matrix = build_distance_matrix(points)
+
+    windows = [(0, None)]
+    service = [0]
+    for s in stops:
+        earliest = _minutes(s.get('windowStart')) or 0
+        windows.append((earliest, _minutes(s.get('windowEnd'))))
+        service.append(s.get('serviceMinutes') or DEFAULT_SERVICE_MINUTES)
+
+    if start_time is not None:
+        start_minute = _minutes(start_time)
+    else:
+        start_minute = min(w[0] for w in windows[1:])
+
+    initial = nearest_neighbour(matrix, windows, service, start_minute)
+    order = two_opt(initial, matrix, windows, service, start_minute)
+    arrivals, lateness, miles = _schedule(order, matrix, windows, service, start_minute)
+    # 2-opt minimizes time warp, which can disagree with the cumulative lateness we
+    # report; never hand back a route that is later than the one it started from
+    initial_schedule = _schedule(initial, matrix, windows, service, start_minute)
+    if (initial_schedule[1], initial_schedule[2]) < (lateness, miles):
+        order = initial
+        arrivals, lateness, miles = initial_schedule
+
+    ordered = []
+    for position, (node, arrival) in enumerate(zip(order, arrivals), start=1):
+        stop = stops[node - 1]
+        arrival_minute = int(round(arrival))
+        ordered.append({
+            'sequence': position,
+            'bookingId': stop['id'],
+            'estimatedArrival': f'{arrival_minute // 60 % 24:02d}:{arrival_minute % 60:02d}',
+            'late': windows[node][1] is not None and arrival > windows[node][1]
+        })
+
+    return {
+        'stops': ordered,
+        'totalMiles': round(miles, 2),
+        'totalLatenessMinutes': round(lateness, 1),
+        'totalTimeWarpMinutes': round(time_warp(order, matrix, windows, service, start_minute), 1)
+    }
+
+def _optimize_route_args(args):
+    return optimize_route(*args)
+
+def _get_pool():
+    """Process pool shared by every request in this worker, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PROCESS_POOL_WORKERS)
+        return _pool
+
+@atexit.register
+def _shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+def optimize_routes(crew_stops, depot=None, start_time=None):
+    """Optimize several crews' routes.
+
+    Crews with at least PROCESS_POOL_MIN_STOPS stops go to the shared process pool,
+    including a single large crew; smaller ones run inline while those are computed.
+    """
+    jobs = [(stops, depot, start_time) for stops in crew_stops]
+    futures = {}
+    try:
+        for index, job in enumerate(jobs):
+            if len(job[0]) >= PROCESS_POOL_MIN_STOPS:
+                futures[index] = _get_pool().submit(_optimize_route_args, job)
+        routes = [None if index in futures else _optimize_route_args(job) for index, job in enumerate(jobs)]
+        for index, future in futures.items():
+            routes[index] = future.result()
+    except BrokenProcessPool:
+        # A pool process died; start a fresh pool next time and finish this request inline
+        _reset_pool()
+        routes = [_optimize_route_args(job) for job in jobs]
+    return routes
+
+@routing_bp.route('/businesses/<business_id>/routes/optimize', methods=['POST'])
+def optimize_business_route(business_id):
+    """Return a time-window-aware visit order for a business's bookings on one day"""
+    try:
+        data = request.get_json()
+
+        if not data:
+            return error_response('INVALID_JSON', 'Request body must be valid JSON', 400)
+
+        values = ROUTE_REQUEST_SCHEMA.load(data)
+        route_date = values['date']
+        start_time = values['startTime']
+
+        depot = None
+        if values['depot']:
+            depot = (float(values['depot']['lat']), float(values['depot']['lng']))
+
+        # The booked slot is the arrival window; time on site comes from the accepted quote
+        # and the address from the original request
+        bookings = db.session.query(
+            Booking, ServiceRequest.customer_address_id, ServiceQuote.estimated_duration_hours
+        ).outerjoin(ServiceRequest, ServiceRequest.id == Booking.request_id).outerjoin(
+            ServiceQuote, ServiceQuote.id == Booking.quote_id
+        ).filter(
+            Booking.business_id == business_id,
+            Booking.scheduled_date == route_date,
+            Booking.booking_status.in_(['confirmed', 'in_progress'])
+        ).order_by(Booking.scheduled_time_start).all()
+
+        # Coordinates come from the client keyed by address ID until the location
+        # service owns address geocoding
+        locations = values['locations']
+        stops = []
+        unlocated = []
+        for booking, address_id, duration_hours in bookings:
+            location = locations.get(address_id)
+            if not location:
+                unlocated.append(booking.id)
+                continue
+            service_minutes = round(float(duration_hours) * 60) if duration_hours else None
+            stops.append({
+                'id': booking.id,
+                'lat': float(location['lat']),
+                'lng': float(location['lng']),
+                'windowStart': booking.scheduled_time_start,
+                'windowEnd': booking.scheduled_time_end,
+                'serviceMinutes': service_minutes
+            })
+
+        # Optional crew split: list of booking ID lists, one per crew
+        crews = values['crews']
+        unassigned = []
+        if crews:
+            seen = set()
+            duplicates = set()
+            for crew in crews:
+                for booking_id in crew:
+                    if booking_id in seen:
+                        duplicates.add(booking_id)
+                    seen.add(booking_id)
+            if duplicates:
+                return error_response('INVALID_ROUTE_REQUEST', 'A booking can only be assigned to one crew', 400,
+                                      details={'bookingIds': sorted(duplicates)})
+            by_id = {stop['id']: stop for stop in stops}
+            crew_stops = [[by_id[b] for b in crew if b in by_id] for crew in crews]
+            assigned = {b for crew in crews for b in crew}
+            unassigned = [stop['id'] for stop in stops if stop['id'] not in assigned]
+        else:
+            crew_stops = [stops]
+
+        routes = optimize_routes(crew_stops, depot=depot, start_time=start_time)
+
+        return success_response({
+            'businessId': business_id,
+            'date': route_date.isoformat(),
+            'routes': routes,
+            'unlocatedBookings': unlocated,
+            'unassignedBookings': unassigned
+        })
+
+    except ValidationError as e:
+        return error_response('VALIDATION_ERROR', str(e), 400, details={'errors': e.errors})
+    except (ValueError, KeyError, TypeError):
+        return error_response('INVALID_ROUTE_REQUEST', 'Locations and depot must be {lat, lng} objects', 400)
+    except Exception as e:
+        return error_response('INTERNAL_ERROR', str(e), 500)
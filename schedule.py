@@ -1,11 +1,38 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
+from src.responses import success_response, error_response
+from src.rate_limit import rate_limit
+from src.fieldsets import InvalidFieldsError, model_fieldset, select_fields, serialize
 from src.models.schedule import db, PickupSchedule, ScheduleZone, PickupEvent, UserScheduleSubscription
+from src.schemas import Schema, ValidationError, String, Date, Object
 from datetime import datetime, date
 import json
 
 schedule_bp = Blueprint('schedule', __name__)
 
+SUBSCRIPTION_SCHEMA = Schema({
+    'scheduleId': String(required=True),
+    'addressId': String(required=True),
+    'notificationPreferences': Object(default={
+        'email': True,
+        'push': True,
+        'sms': False,
+        'advance_days': [1, 7]
+    })
+})
+
+SCHEDULE_SCHEMA = Schema({
+    'municipality_id': String(required=True),
+    'schedule_name': String(required=True),
+    'schedule_type': String(required=True, choices=('bulk', 'yard_waste', 'recycling', 'special')),
+    'frequency': String(required=True, choices=('weekly', 'biweekly', 'monthly', 'quarterly', 'annual', 'on_demand')),
+    'start_date': Date(required=True),
+    'end_date': Date(),
+    'description': String(),
+    'rules': Object()
+})
+
 @schedule_bp.route('/schedules/lookup', methods=['GET'])
+@rate_limit('schedule_lookup', default='120/minute;burst=30')
 def lookup_schedules():
     """Look up pickup schedules for a specific address"""
     try:
@@ -16,13 +43,7 @@ def lookup_schedules():
         zip_code = request.args.get('zipCode')
         
         if not any([address, (lat and lng), zip_code]):
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'MISSING_PARAMETERS',
-                    'message': 'Address, coordinates, or ZIP code is required'
-                }
-            }), 400
+            return error_response('MISSING_PARAMETERS', 'Address, coordinates, or ZIP code is required', 400)
         
         # Mock data for demonstration - in real implementation, this would query based on location
         mock_schedules = [
@@ -52,24 +73,12 @@ def lookup_schedules():
             }
         ]
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'schedules': mock_schedules
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
+        return success_response({
+            'schedules': mock_schedules
         })
         
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @schedule_bp.route('/schedules/<schedule_id>/events', methods=['GET'])
 def get_schedule_events(schedule_id):
@@ -106,24 +115,12 @@ def get_schedule_events(schedule_id):
             }
         ]
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'events': mock_events[:limit]
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
+        return success_response({
+            'events': mock_events[:limit]
         })
         
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @schedule_bp.route('/schedules/subscriptions', methods=['POST'])
 def create_subscription():
@@ -132,24 +129,9 @@ def create_subscription():
         data = request.get_json()
         
         if not data:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'INVALID_JSON',
-                    'message': 'Request body must be valid JSON'
-                }
-            }), 400
-        
-        required_fields = ['scheduleId', 'addressId']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'MISSING_FIELD',
-                        'message': f'Field {field} is required'
-                    }
-                }), 400
+            return error_response('INVALID_JSON', 'Request body must be valid JSON', 400)
+        
+        values = SUBSCRIPTION_SCHEMA.load(data)
         
         # Mock user ID - in real implementation, get from JWT token
         user_id = 'user_123'
@@ -157,39 +139,23 @@ def create_subscription():
         # Create subscription
         subscription = UserScheduleSubscription(
             user_id=user_id,
-            address_id=data['addressId'],
-            schedule_id=data['scheduleId'],
-            notification_preferences=data.get('notificationPreferences', {
-                'email': True,
-                'push': True,
-                'sms': False,
-                'advance_days': [1, 7]
-            })
+            address_id=values['addressId'],
+            schedule_id=values['scheduleId'],
+            notification_preferences=values['notificationPreferences']
         )
         
         db.session.add(subscription)
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'subscription': subscription.to_dict()
-            },
-            'message': 'Subscription created successfully',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
-        }), 201
+        return success_response({
+            'subscription': subscription.to_dict()
+        }, message='Subscription created successfully', status=201)
         
+    except ValidationError as e:
+        return error_response('VALIDATION_ERROR', str(e), 400, details={'errors': e.errors})
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @schedule_bp.route('/schedules/subscriptions', methods=['GET'])
 def get_user_subscriptions():
@@ -198,29 +164,24 @@ def get_user_subscriptions():
         # Mock user ID - in real implementation, get from JWT token
         user_id = 'user_123'
         
-        subscriptions = UserScheduleSubscription.query.filter_by(
+        fields = model_fieldset(UserScheduleSubscription)
+        
+        query = UserScheduleSubscription.query.filter_by(
             user_id=user_id,
             is_active=True
-        ).all()
+        )
+        if fields:
+            query = select_fields(query, UserScheduleSubscription, fields)
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'subscriptions': [sub.to_dict() for sub in subscriptions]
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
+        return success_response({
+            'subscriptions': serialize(query.all(), fields, UserScheduleSubscription)
         })
         
+    except InvalidFieldsError as e:
+        return error_response('INVALID_FIELDS', str(e), 400, details={'allowed': e.allowed})
+        
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @schedule_bp.route('/schedules/subscriptions/<subscription_id>', methods=['DELETE'])
 def delete_subscription(subscription_id):
@@ -235,59 +196,36 @@ def delete_subscription(subscription_id):
         ).first()
         
         if not subscription:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'SUBSCRIPTION_NOT_FOUND',
-                    'message': 'Subscription not found'
-                }
-            }), 404
+            return error_response('SUBSCRIPTION_NOT_FOUND', 'Subscription not found', 404)
         
         db.session.delete(subscription)
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'message': 'Subscription deleted successfully',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
-        })
+        return success_response(message='Subscription deleted successfully')
         
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @schedule_bp.route('/schedules', methods=['GET'])
 def get_schedules():
     """Get all pickup schedules"""
     try:
-        schedules = PickupSchedule.query.filter_by(is_active=True).all()
+        fields = model_fieldset(PickupSchedule)
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'schedules': [schedule.to_dict() for schedule in schedules]
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
+        query = PickupSchedule.query.filter_by(is_active=True)
+        if fields:
+            query = select_fields(query, PickupSchedule, fields)
+        
+        return success_response({
+            'schedules': serialize(query.all(), fields, PickupSchedule)
         })
         
+    except InvalidFieldsError as e:
+        return error_response('INVALID_FIELDS', str(e), 400, details={'allowed': e.allowed})
+        
     except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
 @schedule_bp.route('/schedules', methods=['POST'])
 def create_schedule():
@@ -296,71 +234,31 @@ def create_schedule():
         data = request.get_json()
         
         if not data:
-            return jsonify({
-                'success': False,
-                'error': {
-                    'code': 'INVALID_JSON',
-                    'message': 'Request body must be valid JSON'
-                }
-            }), 400
-        
-        required_fields = ['municipality_id', 'schedule_name', 'schedule_type', 'frequency', 'start_date']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'MISSING_FIELD',
-                        'message': f'Field {field} is required'
-                    }
-                }), 400
-        
-        # Parse dates
-        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-        end_date = None
-        if data.get('end_date'):
-            end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+            return error_response('INVALID_JSON', 'Request body must be valid JSON', 400)
+        
+        values = SCHEDULE_SCHEMA.load(data)
         
         schedule = PickupSchedule(
-            municipality_id=data['municipality_id'],
-            schedule_name=data['schedule_name'],
-            schedule_type=data['schedule_type'],
-            description=data.get('description'),
-            frequency=data['frequency'],
-            start_date=start_date,
-            end_date=end_date,
-            rules=data.get('rules')
+            municipality_id=values['municipality_id'],
+            schedule_name=values['schedule_name'],
+            schedule_type=values['schedule_type'],
+            description=values['description'],
+            frequency=values['frequency'],
+            start_date=values['start_date'],
+            end_date=values['end_date'],
+            rules=values['rules']
         )
         
         db.session.add(schedule)
         db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'schedule': schedule.to_dict()
-            },
-            'message': 'Schedule created successfully',
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'requestId': f'req_{datetime.utcnow().timestamp()}'
-        }), 201
-        
-    except ValueError as e:
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INVALID_DATE_FORMAT',
-                'message': 'Date must be in YYYY-MM-DD format'
-            }
-        }), 400
+        return success_response({
+            'schedule': schedule.to_dict()
+        }, message='Schedule created successfully', status=201)
+        
+    except ValidationError as e:
+        return error_response('VALIDATION_ERROR', str(e), 400, details={'errors': e.errors})
     except Exception as e:
         db.session.rollback()
-        return jsonify({
-            'success': False,
-            'error': {
-                'code': 'INTERNAL_ERROR',
-                'message': str(e)
-            },
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
+        return error_response('INTERNAL_ERROR', str(e), 500)
 
@@ -0,0 +1,201 @@
+from datetime import datetime, date, time
+import math
+
+class ValidationError(ValueError):
+    """Every field error in a request body: [{'field', 'code', 'message'}]"""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(error['message'] for error in errors))
+        self.errors = errors
+
+def _error(field, code, message):
+    return {'field': field, 'code': code, 'message': message}
+
+# Parsers take the raw value and return the parsed one, or raise ValueError with a
+# message for the client. The canonical wire format goes through the faster
+# fromisoformat; anything else falls back to strptime, so the inputs accepted
+# before the schemas existed (e.g. '2025-1-1' or '9:30') still are.
+
+def parse_date(value):
+    """YYYY-MM-DD"""
+    if not isinstance(value, str):
+        raise ValueError('must be in YYYY-MM-DD format')
+    if len(value) == 10 and value[4] == '-' and value[7] == '-':
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValueError('must be a valid date') from None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('must be in YYYY-MM-DD format') from None
+
+def parse_time(value):
+    """HH:MM"""
+    if not isinstance(value, str):
+        raise ValueError('must be in HH:MM format')
+    if len(value) == 5 and value[2] == ':':
+        try:
+            return time.fromisoformat(value)
+        except ValueError:
+            raise ValueError('must be a valid time') from None
+    try:
+        return datetime.strptime(value, '%H:%M').time()
+    except ValueError:
+        raise ValueError('must be in HH:MM format') from None
+
+class Field:
+    """Declarative field spec; compiled into a single check function by Schema"""
+    __slots__ = ('kind', 'required', 'choices', 'minimum', 'maximum', 'schema', 'default')
+
+    def __init__(self, kind, required=False, choices=None, minimum=None, maximum=None, schema=None, default=None):
+        self.kind = kind
+        self.required = required
+        self.choices = frozenset(choices) if choices is not None else None
+        self.minimum = minimum
+        self.maximum = maximum
+        self.schema = schema
+        self.default = default
+
+def String(required=False, choices=None, default=None):
+    return Field('string', required, choices=choices, default=default)
+
+def Integer(required=False, minimum=None, maximum=None, default=None):
+    return Field('integer', required, minimum=minimum, maximum=maximum, default=default)
+
+def Number(required=False, minimum=None, maximum=None, default=None):
+    return Field('number', required, minimum=minimum, maximum=maximum, default=default)
+
+def Boolean(required=False, default=None):
+    return Field('boolean', required, default=default)
+
+def Date(required=False):
+    return Field('date', required)
+
+def Time(required=False):
+    return Field('time', required)
+
+def Object(required=False, schema=None, default=None):
+    """A JSON object; with ``schema`` it must match it"""
+    return Field('object', required, schema=schema, default=default)
+
+def List(required=False, schema=None, default=None):
+    """A JSON array; with ``schema`` every item must match it: a Schema for objects, or a field"""
+    return Field('list', required, schema=schema, default=default)
+
+_TYPES = {
+    'string': (str, 'a string'),
+    'integer': (int, 'an integer'),
+    'number': ((int, float), 'a number'),
+    'boolean': (bool, 'true or false'),
+    'object': (dict, 'an object'),
+    'list': (list, 'a list')
+}
+
+def _compile_field(name, spec):
+    """Build check(value, path) -> (parsed, errors) for one field"""
+    if spec.kind in ('date', 'time'):
+        parse = parse_date if spec.kind == 'date' else parse_time
+
+        def check(value, path):
+            try:
+                return parse(value), None
+            except ValueError as e:
+                return None, [_error(path, 'INVALID_FORMAT', f'Field {path} {e}')]
+        return check
+
+    expected, description = _TYPES[spec.kind]
+    # bool is an int subclass; keep true/false out of numeric fields
+    reject_bool = spec.kind in ('integer', 'number')
+    # JSON parsing lets NaN and Infinity through as floats
+    finite_only = spec.kind == 'number'
+    choices, minimum, maximum, schema = spec.choices, spec.minimum, spec.maximum, spec.schema
+    if isinstance(schema, Field):
+        # List items that are plain values (or nested lists) rather than objects
+        check_item = _compile_field(name, schema)
+    elif schema is not None:
+        def check_item(item, path):
+            return schema.check(item, f'{path}.')
+
+    def check(value, path):
+        if not isinstance(value, expected) or (reject_bool and isinstance(value, bool)):
+            return None, [_error(path, 'INVALID_TYPE', f'Field {path} must be {description}')]
+        if finite_only and isinstance(value, float) and not math.isfinite(value):
+            return None, [_error(path, 'INVALID_VALUE', f'Field {path} must be a finite number')]
+        if choices is not None and value not in choices:
+            return None, [_error(path, 'INVALID_VALUE', f"Field {path} must be one of {', '.join(sorted(choices))}")]
+        if minimum is not None and value < minimum or maximum is not None and value > maximum:
+            bounds = f'between {minimum} and {maximum}' if minimum is not None and maximum is not None else (
+                f'at least {minimum}' if minimum is not None else f'at most {maximum}'
+            )
+            return None, [_error(path, 'INVALID_VALUE', f'Field {path} must be {bounds}')]
+        if schema is not None and spec.kind == 'object':
+            return schema.check(value, f'{path}.')
+        if schema is not None:
+            items = []
+            errors = []
+            for i, item in enumerate(value):
+                parsed, item_errors = check_item(item, f'{path}[{i}]')
+                items.append(parsed)
+                errors.extend(item_errors or ())
+            return items, errors or None
+        return value, None
+    return check
+
+class Schema:
+    """A request body schema, compiled once at import.
+
+    ``load`` returns the declared fields parsed (absent optional fields get their
+    default) and raises ValidationError listing every bad field at once.
+    Undeclared keys are ignored. ``validate_many`` checks a list of bodies without
+    raising, for bulk endpoints.
+    """
+    __slots__ = ('fields', '_checks')
+
+    def __init__(self, fields):
+        self.fields = fields
+        # An empty string counts as absent for dates and times, as it did with the old strptime guards
+        self._checks = tuple(
+            (name, spec.required, spec.default, ('',) if spec.kind in ('date', 'time') else (), _compile_field(name, spec))
+            for name, spec in fields.items()
+        )
+
+    def check(self, data, prefix=''):
+        """(values, errors or None) for one body; field paths are prefixed for nested items"""
+        if not isinstance(data, dict):
+            path = prefix.rstrip('.') or 'body'
+            return None, [_error(path, 'INVALID_TYPE', f'Field {path} must be an object')]
+        values = {}
+        errors = None
+        for name, required, default, blank, check in self._checks:
+            value = data.get(name)
+            if value is None or value in blank:
+                if required:
+                    errors = errors or []
+                    errors.append(_error(prefix + name, 'MISSING_FIELD', f'Field {prefix}{name} is required'))
+                else:
+                    # Copy list/dict defaults so requests never share a mutable value
+                    values[name] = default.copy() if isinstance(default, (list, dict)) else default
+                continue
+            parsed, field_errors = check(value, prefix + name)
+            if field_errors:
+                errors = errors or []
+                errors.extend(field_errors)
+            else:
+                values[name] = parsed
+        return values, errors
+
+    def load(self, data):
+        values, errors = self.check(data)
+        if errors:
+            raise ValidationError(errors)
+        return values
+
+    def validate_many(self, items):
+        """[(values, errors)] per item; exactly one of the pair is None"""
+        results = []
+        check = self.check
+        for item in items:
+            values, errors = check(item)
+            results.append((None, errors) if errors else (values, None))
+        return results
@@ -0,0 +1,487 @@
+"""
+Synthetic data generator for scale testing
+
+Fills every model with city-sized volumes: residents' addresses and schedule
+subscriptions, municipal schedules with zones and years of pickup events,
+businesses with services, photos and reviews, and years of service requests,
+quotes, bookings and payments. Output is fully determined by ``seed`` and
+``as_of``: IDs are uuid5 values derived from the seed and row index, and each
+table draws from its own random stream, so changing one count does not reshuffle
+the rest.
+
+Rows go in through executemany inserts in ``batch_size`` chunks with secondary
+indexes dropped during the load and rebuilt afterwards. Those inserts skip the
+session flush hooks, so the derived tables are rebuilt once at the end: the
+coverage grid and analytics rollups are recomputed, cached map tiles dropped and
+the sync change log reset so clients reload. Running servers keep their
+in-memory catalog and price table until restarted.
+
+    flask --app main:create_app seed-data --scale city --seed 42
+"""
+
+from src.models.user import db
+from src.models.schedule import PickupSchedule, ScheduleZone, PickupEvent, UserScheduleSubscription
+from src.models.business import Business, BusinessService, BusinessPhoto, BusinessReview
+from src.models.booking import ServiceRequest, ServiceQuote, Booking, Payment
+from src import change_log, coverage, map_tiles, rollups
+from contextlib import contextmanager
+from datetime import datetime, date, time, timedelta
+import random
+import uuid
+
+SCALES = {
+    'small': {
+        'municipalities': 2, 'zones_per_schedule': 4, 'residents': 2000,
+        'businesses': 200, 'service_requests': 3000, 'years': 1
+    },
+    'town': {
+        'municipalities': 4, 'zones_per_schedule': 10, 'residents': 100000,
+        'businesses': 2000, 'service_requests': 100000, 'years': 2
+    },
+    'city': {
+        'municipalities': 10, 'zones_per_schedule': 25, 'residents': 1500000,
+        'businesses': 25000, 'service_requests': 1500000, 'years': 3
+    }
+}
+
+CATEGORIES = ['junk_removal', 'furniture_removal', 'appliance_pickup', 'yard_cleanup', 'recycling', 'hazardous_waste']
+SCHEDULE_TYPES = [('bulk', 'monthly'), ('yard_waste', 'weekly'), ('recycling', 'biweekly')]
+PICKUP_DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday']
+PRICE_UNITS = ['per_item', 'per_load', 'per_hour', 'flat_rate']
+PHOTO_TYPES = ['profile', 'gallery', 'before_after', 'equipment', 'team']
+STREETS = ['Main St', 'Oak Ave', 'Maple Dr', 'Lincoln Blvd', 'Cedar Ln', 'Washington St', 'Park Ave', 'Elm St']
+REVIEW_TEXTS = {
+    1: 'No-show on the scheduled day and hard to reach.',
+    2: 'Took the items but left a mess behind.',
+    3: 'Job got done, arrived later than quoted.',
+    4: 'Quick and careful, fair price.',
+    5: 'Arrived on time and cleared everything.'
+}
+
+# Demo accounts the mock-authenticated routes read from
+DEMO_RESIDENT_ID = 'user_123'
+DEMO_BUSINESS_USER_ID = 'business_user_123'
+
+# Springfield, IL; coordinates scatter within about 15 miles
+CENTER_LAT, CENTER_LNG = 39.7817, -89.6501
+SPREAD_DEGREES = 0.22
+
+class Generator:
+    def __init__(self, seed, as_of):
+        self.seed = seed
+        self.as_of = as_of
+        self.namespace = uuid.uuid5(uuid.NAMESPACE_OID, f'bulk-pickup-seed:{seed}')
+
+    def id(self, kind, n):
+        """Stable ID for row ``n`` of ``kind``; recomputable without keeping ID lists"""
+        return str(uuid.uuid5(self.namespace, f'{kind}:{n}'))
+
+    def random(self, table):
+        return random.Random(f'{self.seed}:{table}')
+
+    def resident_id(self, n):
+        return DEMO_RESIDENT_ID if n == 0 else self.id('resident', n)
+
+    def business_user_id(self, n):
+        return DEMO_BUSINESS_USER_ID if n == 0 else self.id('business_user', n)
+
+    def moment(self, rnd, years):
+        """Timestamp within the last ``years`` before as_of"""
+        start = datetime.combine(self.as_of, time()) - timedelta(days=365 * years)
+        return start + timedelta(seconds=rnd.randrange(365 * years * 86400))
+
+class BatchWriter:
+    """Buffers rows per table and inserts them with executemany"""
+
+    def __init__(self, connection, batch_size, progress=None):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.progress = progress
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, model, row):
+        buffer = self.buffers.setdefault(model.__table__, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        # One transaction per flush keeps the WAL small; tables go in the order their
+        # first row arrived, so parents land before children
+        with self.connection.begin():
+            for table, rows in self.buffers.items():
+                if rows:
+                    self.connection.execute(table.insert(), rows)
+                    self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+                    rows.clear()
+        if self.progress:
+            self.progress(dict(self.counts))
+
+@contextmanager
+def deferred_indexes(connection, tables):
+    """Drop secondary indexes for the load and rebuild them once at the end"""
+    indexes = [index for table in tables for index in table.indexes]
+    with connection.begin():
+        for index in indexes:
+            index.drop(bind=connection, checkfirst=True)
+    try:
+        yield
+    finally:
+        with connection.begin():
+            for index in indexes:
+                index.create(bind=connection, checkfirst=True)
+
+def _schedules(gen, writer, scale):
+    rnd = gen.random('schedules')
+    zones = []
+    n = 0
+    for m in range(scale['municipalities']):
+        municipality_id = gen.id('municipality', m)
+        for schedule_type, frequency in SCHEDULE_TYPES:
+            schedule_id = gen.id('schedule', n)
+            created_at = gen.moment(rnd, scale['years'])
+            writer.add(PickupSchedule, {
+                'id': schedule_id,
+                'municipality_id': municipality_id,
+                'schedule_name': f'Municipality {m + 1} {schedule_type.replace("_", " ").title()}',
+                'schedule_type': schedule_type,
+                'description': f'{frequency.title()} {schedule_type.replace("_", " ")} collection',
+                'frequency': frequency,
+                'start_date': gen.as_of - timedelta(days=365 * scale['years']),
+                'end_date': None,
+                'is_active': True,
+                'rules': {'holidayShift': 1},
+                'created_at': created_at,
+                'updated_at': created_at
+            })
+            for z in range(scale['zones_per_schedule']):
+                zone_id = gen.id('zone', len(zones))
+                pickup_day = PICKUP_DAYS[z % len(PICKUP_DAYS)]
+                start_hour = rnd.choice([6, 7, 8])
+                writer.add(ScheduleZone, {
+                    'id': zone_id,
+                    'schedule_id': schedule_id,
+                    'zone_name': f'Zone {z + 1}',
+                    'pickup_day': pickup_day,
+                    'pickup_time_start': time(start_hour),
+                    'pickup_time_end': time(start_hour + 8),
+                    'is_active': True,
+                    'created_at': created_at,
+                    'updated_at': created_at
+                })
+                zones.append((m, schedule_id, zone_id, frequency, PICKUP_DAYS.index(pickup_day), start_hour))
+            n += 1
+    return zones
+
+def _pickup_events(gen, writer, scale, zones):
+    rnd = gen.random('pickup_events')
+    step_days = {'weekly': 7, 'biweekly': 14, 'monthly': 28}
+    first = gen.as_of - timedelta(days=365 * scale['years'])
+    horizon = gen.as_of + timedelta(days=90)
+    n = 0
+    for _, schedule_id, zone_id, frequency, weekday, start_hour in zones:
+        day = first + timedelta(days=(weekday - first.weekday()) % 7)
+        while day <= horizon:
+            past = day < gen.as_of
+            status = 'scheduled'
+            if past:
+                status = 'cancelled' if rnd.random() < 0.01 else 'completed'
+            writer.add(PickupEvent, {
+                'id': gen.id('pickup_event', n),
+                'schedule_id': schedule_id,
+                'zone_id': zone_id,
+                'event_date': day,
+                'event_time_start': time(start_hour),
+                'event_time_end': time(start_hour + 8),
+                'status': status,
+                'crew_assigned': f'Crew {rnd.randint(1, 12)}',
+                'created_at': datetime.combine(day - timedelta(days=30), time()),
+                'updated_at': datetime.combine(day, time(start_hour + 8)),
+                'completed_at': datetime.combine(day, time(start_hour + 8)) if status == 'completed' else None
+            })
+            n += 1
+            day += timedelta(days=step_days[frequency])
+
+def _subscriptions(gen, writer, scale, zones):
+    """Addresses are owned by the user service; residents get 1-2 address IDs each"""
+    rnd = gen.random('subscriptions')
+    zones_by_municipality = {}
+    for m, schedule_id, zone_id, *_ in zones:
+        zones_by_municipality.setdefault(m, {}).setdefault(schedule_id, []).append(zone_id)
+    n = 0
+    address = 0
+    for resident in range(scale['residents']):
+        user_id = gen.resident_id(resident)
+        for _ in range(1 if rnd.random() < 0.8 else 2):
+            address_id = gen.id('address', address)
+            schedules = zones_by_municipality[address % scale['municipalities']]
+            for i, (schedule_id, zone_ids) in enumerate(schedules.items()):
+                # Everyone gets bulk pickup; other streams are opt-in
+                if i and rnd.random() < 0.35:
+                    continue
+                created_at = gen.moment(rnd, scale['years'])
+                writer.add(UserScheduleSubscription, {
+                    'id': gen.id('subscription', n),
+                    'user_id': user_id,
+                    'address_id': address_id,
+                    'schedule_id': schedule_id,
+                    'zone_id': zone_ids[address % len(zone_ids)],
+                    'notification_preferences': {'email': True, 'push': rnd.random() < 0.7, 'sms': rnd.random() < 0.2, 'advance_days': [1, 7]},
+                    'is_active': rnd.random() < 0.95,
+                    'created_at': created_at,
+                    'updated_at': created_at
+                })
+                n += 1
+            address += 1
+    return address
+
+def _businesses(gen, writer, scale):
+    rnd = gen.random('businesses')
+    service_n = photo_n = review_n = 0
+    for b in range(scale['businesses']):
+        business_id = gen.id('business', b)
+        created_at = gen.moment(rnd, scale['years'])
+        categories = rnd.sample(CATEGORIES, rnd.randint(1, 4))
+
+        # Review volume is long-tailed: most businesses have a handful, a few have hundreds
+        review_count = min(int(rnd.paretovariate(1.3) * 4) - 4, 600)
+        quality = rnd.uniform(2.5, 5.0)
+        ratings = [max(1, min(5, round(rnd.gauss(quality, 0.9)))) for _ in range(review_count)]
+
+        writer.add(Business, {
+            'id': business_id,
+            'user_id': gen.business_user_id(b),
+            'business_name': f'{rnd.choice(STREETS).split()[0]} {rnd.choice(["Hauling", "Junk Co", "Cleanouts", "Removal"])} {b}',
+            'business_type': categories[0],
+            'description': f'Local {categories[0].replace("_", " ")} specialists',
+            'business_phone': f'217-555-{b % 10000:04d}',
+            'business_email': f'contact{b}@example.com',
+            'license_number': f'IL-{b:07d}',
+            'business_address': {
+                'street': f'{rnd.randint(100, 9999)} {rnd.choice(STREETS)}',
+                'city': 'Springfield',
+                'state': 'IL',
+                'zipCode': f'627{rnd.randint(1, 39):02d}',
+                'lat': round(CENTER_LAT + rnd.uniform(-SPREAD_DEGREES, SPREAD_DEGREES), 6),
+                'lng': round(CENTER_LNG + rnd.uniform(-SPREAD_DEGREES, SPREAD_DEGREES), 6)
+            },
+            'service_radius_miles': rnd.choice([5, 10, 15, 25, 50]),
+            'minimum_job_value': rnd.choice([50, 75, 100]),
+            'response_time_hours': rnd.choice([2, 4, 12, 24, 48]),
+            'is_verified': rnd.random() < 0.6,
+            'is_active': rnd.random() < 0.97,
+            'subscription_tier': rnd.choices(['basic', 'premium', 'enterprise'], weights=[80, 17, 3])[0],
+            'rating_average': round(sum(ratings) / len(ratings), 2) if ratings else 0,
+            'rating_count': len(ratings),
+            'total_jobs_completed': review_count * rnd.randint(2, 6),
+            'created_at': created_at,
+            'updated_at': created_at
+        })
+
+        for category in categories:
+            base_price = rnd.choice([49, 75, 99, 125, 150, 199, 249])
+            writer.add(BusinessService, {
+                'id': gen.id('business_service', service_n),
+                'business_id': business_id,
+                'service_category': category,
+                'service_name': category.replace('_', ' ').title(),
+                'service_description': f'{category.replace("_", " ").capitalize()} for homes and small offices',
+                'base_price': base_price,
+                'price_unit': rnd.choice(PRICE_UNITS),
+                'minimum_charge': base_price // 2,
+                'is_available': rnd.random() < 0.95,
+                'requires_estimate': rnd.random() < 0.3,
+                'estimated_duration_hours': rnd.choice([1, 1.5, 2, 3, 4]),
+                'created_at': created_at,
+                'updated_at': created_at
+            })
+            service_n += 1
+
+        for order in range(rnd.randint(0, 5)):
+            writer.add(BusinessPhoto, {
+                'id': gen.id('business_photo', photo_n),
+                'business_id': business_id,
+                'photo_url': f'https://cdn.example.com/businesses/{business_id}/{order}.jpg',
+                'photo_type': 'profile' if order == 0 else rnd.choice(PHOTO_TYPES[1:]),
+                'display_order': order,
+                'is_primary': order == 0,
+                'created_at': created_at
+            })
+            photo_n += 1
+
+        for rating in ratings:
+            reviewed_at = gen.moment(rnd, scale['years'])
+            responded = rnd.random() < 0.3
+            writer.add(BusinessReview, {
+                'id': gen.id('business_review', review_n),
+                'business_id': business_id,
+                'reviewer_user_id': gen.resident_id(rnd.randrange(scale['residents'])),
+                'rating': rating,
+                'review_title': f'{rating} stars',
+                'review_text': REVIEW_TEXTS[rating],
+                'response_text': 'Thanks for the feedback!' if responded else None,
+                'response_date': reviewed_at + timedelta(days=2) if responded else None,
+                'is_verified': rnd.random() < 0.7,
+                'is_public': rnd.random() < 0.97,
+                'created_at': reviewed_at,
+                'updated_at': reviewed_at
+            })
+            review_n += 1
+
+def _bookings(gen, writer, scale, addresses):
+    """Service requests with their quotes, and bookings/payments for the accepted ones"""
+    rnd = gen.random('bookings')
+    quote_n = booking_n = 0
+    for r in range(scale['service_requests']):
+        request_id = gen.id('service_request', r)
+        # Every tenth request belongs to the demo resident so history endpoints have data
+        customer = 0 if r % 10 == 0 else rnd.randrange(scale['residents'])
+        created_at = gen.moment(rnd, scale['years'])
+        preferred_date = created_at.date() + timedelta(days=rnd.randint(1, 21))
+        category = rnd.choice(CATEGORIES)
+        budget = rnd.choice([None, 100, 150, 200, 300, 500])
+        quote_count = rnd.choices([0, 1, 2, 3, 4], weights=[10, 25, 30, 20, 15])[0]
+        booked = quote_count and rnd.random() < 0.65
+        expired = created_at + timedelta(days=7) < datetime.combine(gen.as_of, time())
+
+        if booked:
+            status = 'booked'
+        elif expired:
+            status = 'cancelled'
+        else:
+            status = 'quoted' if quote_count else 'open'
+
+        writer.add(ServiceRequest, {
+            'id': request_id,
+            'customer_user_id': gen.resident_id(customer),
+            'customer_address_id': gen.id('address', rnd.randrange(addresses)),
+            'service_category': category,
+            'service_description': f'{category.replace("_", " ").capitalize()} - {rnd.randint(1, 8)} items',
+            'preferred_date': preferred_date,
+            'preferred_time_start': time(rnd.randint(8, 15)),
+            'urgency_level': rnd.choices(['low', 'normal', 'high', 'emergency'], weights=[20, 65, 13, 2])[0],
+            'estimated_budget': budget,
+            'photos': [],
+            'status': status,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'expires_at': created_at + timedelta(days=7)
+        })
+
+        accepted = rnd.randrange(quote_count) if booked else None
+        for q in range(quote_count):
+            quote_id = gen.id('service_quote', quote_n)
+            business = rnd.randrange(scale['businesses'])
+            amount = round((budget or 200) * rnd.uniform(0.6, 1.5), 2)
+            quoted_at = created_at + timedelta(minutes=rnd.randint(10, 2880))
+            writer.add(ServiceQuote, {
+                'id': quote_id,
+                'request_id': request_id,
+                'business_id': gen.id('business', business),
+                'quote_amount': amount,
+                'quote_details': 'Includes loading, hauling and disposal fees',
+                'estimated_duration_hours': rnd.choice([1, 2, 3]),
+                'valid_until': quoted_at + timedelta(days=7),
+                'status': 'accepted' if q == accepted else ('declined' if booked else ('expired' if expired else 'pending')),
+                'created_at': quoted_at,
+                'updated_at': quoted_at
+            })
+            quote_n += 1
+            if q != accepted:
+                continue
+
+            booking_id = gen.id('booking', booking_n)
+            scheduled = datetime.combine(preferred_date, time(rnd.randint(8, 16)))
+            past = scheduled.date() < gen.as_of
+            if past:
+                booking_status = rnd.choices(['completed', 'cancelled'], weights=[92, 8])[0]
+            else:
+                booking_status = 'confirmed'
+            payment_status = {'completed': 'paid', 'cancelled': 'refunded', 'confirmed': 'pending'}[booking_status]
+            if booking_status == 'completed' and rnd.random() < 0.02:
+                payment_status = 'failed'
+            completed_at = scheduled + timedelta(hours=2) if booking_status == 'completed' else None
+
+            writer.add(Booking, {
+                'id': booking_id,
+                'request_id': request_id,
+                'quote_id': quote_id,
+                'customer_user_id': gen.resident_id(customer),
+                'business_id': gen.id('business', business),
+                'booking_reference': f'BK-{scheduled:%Y%m%d}-{booking_n:08d}',
+                'scheduled_date': scheduled.date(),
+                'scheduled_time_start': scheduled.time(),
+                'scheduled_time_end': (scheduled + timedelta(hours=2)).time(),
+                'actual_start_time': scheduled if completed_at else None,
+                'actual_end_time': completed_at,
+                'final_amount': amount,
+                'payment_status': payment_status,
+                'booking_status': booking_status,
+                'cancellation_reason': 'Customer cancelled' if booking_status == 'cancelled' else None,
+                'created_at': quoted_at,
+                'updated_at': completed_at or quoted_at,
+                'completed_at': completed_at
+            })
+
+            processor_status = {
+                'paid': 'succeeded', 'refunded': 'refunded', 'failed': 'failed',
+                # A slice of upcoming payments is mid-flight so reconciliation has work
+                'pending': 'processing' if rnd.random() < 0.1 else 'pending'
+            }[payment_status]
+            writer.add(Payment, {
+                'id': gen.id('payment', booking_n),
+                'booking_id': booking_id,
+                'payment_intent_id': f'pi_{booking_n:014d}',
+                'amount': amount,
+                'currency': 'USD',
+                'payment_method': rnd.choices(['card', 'apple_pay', 'google_pay'], weights=[80, 12, 8])[0],
+                'payment_status': processor_status,
+                'stripe_charge_id': f'ch_{booking_n:014d}' if processor_status in ('succeeded', 'refunded') else None,
+                'failure_reason': 'card_declined' if processor_status == 'failed' else None,
+                'refund_amount': amount if processor_status == 'refunded' else 0,
+                'processed_at': completed_at,
+                'created_at': quoted_at,
+                'updated_at': completed_at or quoted_at
+            })
+            booking_n += 1
+
+def seed(scale='small', seed=42, as_of=None, batch_size=5000, progress=None, **overrides):
+    """Generate a full dataset into the current app's database; returns row counts per table.
+
+    ``scale`` names a preset in SCALES; keyword overrides replace individual counts.
+    Must run inside an application context.
+    """
+    settings = dict(SCALES[scale], **overrides)
+    gen = Generator(seed, as_of or date.today())
+    tables = [model.__table__ for model in (
+        PickupSchedule, ScheduleZone, PickupEvent, UserScheduleSubscription,
+        Business, BusinessService, BusinessPhoto, BusinessReview,
+        ServiceRequest, ServiceQuote, Booking, Payment
+    )]
+
+    with db.engine.connect() as connection:
+        sqlite = connection.dialect.name == 'sqlite'
+        if sqlite:
+            # A fixture build can be rerun from scratch; skip fsyncs for the load
+            with connection.begin():
+                connection.exec_driver_sql('PRAGMA synchronous=OFF')
+        try:
+            with deferred_indexes(connection, tables):
+                writer = BatchWriter(connection, batch_size, progress)
+                zones = _schedules(gen, writer, settings)
+                _pickup_events(gen, writer, settings, zones)
+                addresses = _subscriptions(gen, writer, settings, zones)
+                _businesses(gen, writer, settings)
+                _bookings(gen, writer, settings, addresses)
+                writer.flush()
+        finally:
+            if sqlite:
+                with connection.begin():
+                    connection.exec_driver_sql('PRAGMA synchronous=NORMAL')
+
+    coverage.rebuild_all()
+    rollups.backfill(end=max(gen.as_of, date.today()))
+    map_tiles.clear_tiles()
+    change_log.expire_cursors()
+    return writer.counts
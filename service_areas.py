@@ -0,0 +1,179 @@
+from flask import Blueprint, request
+from src.responses import success_response, error_response
+from src.models.business import Business
+from src.coverage import db, ServiceArea, validate_area, apply_area, rebuild_area, remove_area, covering_areas
+from src.pricing import set_area_rules
+
+service_areas_bp = Blueprint('service_areas', __name__)
+
+@service_areas_bp.route('/businesses/<business_id>/service-areas', methods=['GET'])
+def get_service_areas(business_id):
+    """List a business's service areas"""
+    try:
+        areas = ServiceArea.query.filter_by(business_id=business_id).order_by(ServiceArea.created_at).all()
+
+        return success_response({
+            'serviceAreas': [area.to_dict() for area in areas]
+        })
+
+    except Exception as e:
+        return error_response('INTERNAL_ERROR', str(e), 500)
+
+@service_areas_bp.route('/businesses/<business_id>/service-areas', methods=['POST'])
+def create_service_area(business_id):
+    """Add a radius, ZIP list or polygon service area (business users only)"""
+    try:
+        data = request.get_json()
+
+        if not data:
+            return error_response('INVALID_JSON', 'Request body must be valid JSON', 400)
+
+        message = validate_area(data)
+        if message:
+            return error_response('INVALID_SERVICE_AREA', message, 400)
+
+        # Mock business user ID - in real implementation, get from JWT token and verify business ownership
+        business_user_id = 'business_user_123'
+
+        if not Business.query.filter_by(id=business_id).first():
+            return error_response('BUSINESS_NOT_FOUND', 'Business not found', 404)
+
+        area = ServiceArea(business_id=business_id)
+        apply_area(area, data)
+        db.session.add(area)
+        db.session.flush()
+        cells = rebuild_area(area)
+        db.session.commit()
+
+        return success_response({
+            'serviceArea': area.to_dict(),
+            'coverageCells': cells
+        }, message='Service area created successfully', status=201)
+
+    except ValueError as e:
+        db.session.rollback()
+        return error_response('SERVICE_AREA_TOO_LARGE', str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return error_response('INTERNAL_ERROR', str(e), 500)
+
+@service_areas_bp.route('/businesses/<business_id>/service-areas/<area_id>', methods=['PUT'])
+def update_service_area(business_id, area_id):
+    """Replace a service area and rebuild only its grid cells (business users only)"""
+    try:
+        data = request.get_json()
+
+        if not data:
+            return error_response('INVALID_JSON', 'Request body must be valid JSON', 400)
+
+        message = validate_area(data)
+        if message:
+            return error_response('INVALID_SERVICE_AREA', message, 400)
+
+        # Mock business user ID - in real implementation, get from JWT token and verify business ownership
+        business_user_id = 'business_user_123'
+
+        area = ServiceArea.query.filter_by(id=area_id, business_id=business_id).first()
+
+        if not area:
+            return error_response('SERVICE_AREA_NOT_FOUND', 'Service area not found', 404)
+
+        apply_area(area, data)
+        cells = rebuild_area(area)
+        db.session.commit()
+
+        return success_response({
+            'serviceArea': area.to_dict(),
+            'coverageCells': cells
+        }, message='Service area updated successfully')
+
+    except ValueError as e:
+        db.session.rollback()
+        return error_response('SERVICE_AREA_TOO_LARGE', str(e), 400)
+    except Exception as e:
+        db.session.rollback()
+        return error_response('INTERNAL_ERROR', str(e), 500)
+
+@service_areas_bp.route('/businesses/<business_id>/service-areas/<area_id>', methods=['DELETE'])
+def delete_service_area(business_id, area_id):
+    """Delete a service area and its grid cells (business users only)"""
+    try:
+        # Mock business user ID - in real implementation, get from JWT token and verify business ownership
+        business_user_id = 'business_user_123'
+
+        area = ServiceArea.query.filter_by(id=area_id, business_id=business_id).first()
+
+        if not area:
+            return error_response('SERVICE_AREA_NOT_FOUND', 'Service area not found', 404)
+
+        remove_area(area)
+        set_area_rules(area, {})
+        db.session.delete(area)
+        db.session.commit()
+
+        return success_response(message='Service area deleted successfully')
+
+    except Exception as e:
+        db.session.rollback()
+        return error_response('INTERNAL_ERROR', str(e), 500)
+
+@service_areas_bp.route('/businesses/<business_id>/service-areas/<area_id>/pricing', methods=['PUT'])
+def update_service_area_pricing(business_id, area_id):
+    """Set price multipliers for a service area, per category or 'default' (business users only)"""
+    try:
+        data = request.get_json()
+
+        if not data or not isinstance(data.get('multipliers'), dict):
+            return error_response('INVALID_JSON', 'Request body must contain a multipliers object', 400)
+
+        multipliers = data['multipliers']
+        invalid = [
+            category for category, multiplier in multipliers.items()
+            if isinstance(multiplier, bool) or not isinstance(multiplier, (int, float)) or not 0.1 <= multiplier <= 10
+        ]
+        if invalid:
+            return error_response('INVALID_MULTIPLIER', 'Multipliers must be numbers between 0.1 and 10', 400,
+                                  details={'categories': invalid})
+
+        # Mock business user ID - in real implementation, get from JWT token and verify business ownership
+        business_user_id = 'business_user_123'
+
+        area = ServiceArea.query.filter_by(id=area_id, business_id=business_id).first()
+
+        if not area:
+            return error_response('SERVICE_AREA_NOT_FOUND', 'Service area not found', 404)
+
+        set_area_rules(area, multipliers)
+        db.session.commit()
+
+        return success_response({
+            'serviceAreaId': area.id,
+            'multipliers': multipliers
+        }, message='Service area pricing updated successfully')
+
+    except Exception as e:
+        db.session.rollback()
+        return error_response('INTERNAL_ERROR', str(e), 500)
+
+@service_areas_bp.route('/service-areas/coverage', methods=['GET'])
+def get_coverage():
+    """Businesses whose service areas cover a location or ZIP code"""
+    try:
+        lat = request.args.get('lat', type=float)
+        lng = request.args.get('lng', type=float)
+        zip_code = request.args.get('zipCode')
+
+        if (lat is None or lng is None) and not zip_code:
+            return error_response('MISSING_PARAMETERS', 'Coordinates or ZIP code is required', 400)
+
+        matches = covering_areas(lat, lng, zip_code)
+
+        return success_response({
+            'businesses': [
+                {'businessId': business_id, 'serviceAreaId': area_id}
+                for business_id, area_id in matches
+            ]
+        })
+
+    except Exception as e:
+        return error_response('INTERNAL_ERROR', str(e), 500)
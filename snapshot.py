@@ -0,0 +1,74 @@
+"""Read-only values rebuilt off the request path and swapped in whole.
+
+The business catalog and the price table are both built from many rows and read
+on every search. Readers take whatever value is published; a refresh builds the
+replacement in a background thread with its own app context and session, then
+swaps it in with one assignment. In testing (or with
+SNAPSHOT_REFRESH_IN_BACKGROUND off) refreshes run inline in the caller's
+session instead, so tests see their own uncommitted setup and stay
+deterministic.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class Snapshot:
+    """A value built by ``build(current)``; build returns the replacement, or None to keep ``current``"""
+
+    def __init__(self, app, name, build, background=True):
+        self.app = app
+        self.name = name
+        self.build = build
+        self.background = background
+        self.value = None
+        # Serializes builds; readers never take it
+        self._build_lock = threading.Lock()
+        # Guards the running/again flags that coalesce refresh requests
+        self._lock = threading.Lock()
+        self._running = False
+        self._again = False
+
+    def get(self):
+        """The published value, built inline the first time since there is nothing to serve yet"""
+        if self.value is None:
+            with self._build_lock:
+                if self.value is None:
+                    self._swap()
+        return self.value
+
+    def refresh(self):
+        """Rebuild from the published value; in the background, so the caller keeps the current one"""
+        if not self.background:
+            with self._build_lock:
+                self._swap()
+            return
+        with self._lock:
+            if self._running:
+                # Requests that arrive mid-build get one more pass, so nothing queued is missed
+                self._again = True
+                return
+            self._running = True
+        threading.Thread(target=self._run, name=f'refresh-{self.name}', daemon=True).start()
+
+    def _swap(self):
+        value = self.build(self.value)
+        if value is not None:
+            self.value = value
+
+    def _run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    with self._build_lock:
+                        self._swap()
+            except Exception:
+                logger.exception('Refreshing %s failed; still serving the previous one', self.name)
+            with self._lock:
+                if not self._again:
+                    self._running = False
+                    return
+                self._again = False
+
+def refresh_in_background(app):
+    return app.config.get('SNAPSHOT_REFRESH_IN_BACKGROUND', not app.testing)
@@ -0,0 +1,148 @@
+from flask import request, send_file
+import mimetypes
+import os
+import re
+
+# Content-hashed build output (e.g. index.3f9a2b1c.js, app-5d41402abc4b2a76.css)
+FINGERPRINT_RE = re.compile(r'[.-][0-9a-f]{8,}\.[A-Za-z0-9]+$')
+
+# Precompressed siblings and the Content-Encoding they are served with, in preference order
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+INDEX_CACHE_CONTROL = 'no-cache'
+
+class StaticAsset:
+    __slots__ = ('path', 'mimetype', 'etag', 'fingerprinted', 'variants')
+
+    def __init__(self, path, mimetype, etag, fingerprinted):
+        self.path = path
+        self.mimetype = mimetype
+        self.etag = etag
+        self.fingerprinted = fingerprinted
+        # encoding -> absolute path of the precompressed file
+        self.variants = {}
+
+class StaticManifest:
+    """In-memory index of the static folder built once at startup"""
+
+    def __init__(self, root, immutable_prefixes=('assets/',), default_max_age=3600):
+        self.root = root
+        self.immutable_prefixes = tuple(immutable_prefixes)
+        self.default_max_age = default_max_age
+        self.assets = {}
+        self.refresh()
+
+    def refresh(self):
+        assets = {}
+        compressed = []
+        if self.root and os.path.isdir(self.root):
+            for directory, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    full_path = os.path.join(directory, filename)
+                    relative = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                    if any(relative.endswith(suffix) for _, suffix in ENCODINGS):
+                        compressed.append((relative, full_path))
+                        continue
+                    stat = os.stat(full_path)
+                    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                    assets[relative] = StaticAsset(
+                        full_path,
+                        mimetype,
+                        f'{stat.st_mtime_ns:x}-{stat.st_size:x}',
+                        self._is_immutable(relative)
+                    )
+
+        for relative, full_path in compressed:
+            for encoding, suffix in ENCODINGS:
+                if relative.endswith(suffix):
+                    original = assets.get(relative[:-len(suffix)])
+                    if original is not None:
+                        original.variants[encoding] = full_path
+                    else:
+                        # Precompressed file without an original - serve it as-is
+                        stat = os.stat(full_path)
+                        assets[relative] = StaticAsset(
+                            full_path, 'application/octet-stream',
+                            f'{stat.st_mtime_ns:x}-{stat.st_size:x}', self._is_immutable(relative)
+                        )
+                    break
+        self.assets = assets
+
+    def _is_immutable(self, relative):
+        return relative.startswith(self.immutable_prefixes) or bool(FINGERPRINT_RE.search(relative))
+
+    def get(self, path):
+        return self.assets.get(path)
+
+def accepted_encodings(header):
+    """Encodings the client accepts with a non-zero q value"""
+    accepted = set()
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(token)
+    return accepted
+
+def send_asset(asset, cache_control):
+    """Send an asset, choosing a precompressed variant by Accept-Encoding"""
+    path = asset.path
+    etag = asset.etag
+    encoding = None
+    if asset.variants:
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        for candidate, _ in ENCODINGS:
+            if candidate in asset.variants and (candidate in accepted or '*' in accepted):
+                encoding = candidate
+                path = asset.variants[candidate]
+                etag = f'{asset.etag}-{candidate}'
+                break
+
+    response = send_file(path, mimetype=asset.mimetype, conditional=True, etag=etag, max_age=None)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if asset.variants:
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def init_app(app):
+    """Serve the SPA from an in-memory manifest of the static folder"""
+    manifest = StaticManifest(
+        app.static_folder,
+        immutable_prefixes=app.config.get('STATIC_IMMUTABLE_PREFIXES', ('assets/',)),
+        default_max_age=app.config.get('STATIC_DEFAULT_MAX_AGE', 3600)
+    )
+    app.extensions['static_manifest'] = manifest
+    default_cache_control = f'public, max-age={manifest.default_max_age}'
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        if app.static_folder is None:
+            return "Static folder not configured", 404
+
+        asset = manifest.get(path) if path else None
+        if asset is None and path and app.debug:
+            # Pick up files added by a dev build without restarting
+            manifest.refresh()
+            asset = manifest.get(path)
+
+        if asset is not None and path != 'index.html':
+            cache_control = IMMUTABLE_CACHE_CONTROL if asset.fingerprinted else default_cache_control
+            return send_asset(asset, cache_control)
+
+        index = manifest.get('index.html')
+        if index is None:
+            return "index.html not found", 404
+        return send_asset(index, INDEX_CACHE_CONTROL)
@@ -0,0 +1,109 @@
+from flask import Blueprint, request, current_app
+from src.responses import success_response, error_response
+from src.change_log import db, ChangeLog, ENTITY_MODELS, head_seq, oldest_seq
+from src.models.business import Business
+from src.models.schedule import UserScheduleSubscription
+from datetime import datetime, timedelta
+
+sync_bp = Blueprint('sync', __name__)
+
+MAX_SYNC_LIMIT = 1000
+
+def _scopes(role):
+    # Mock user IDs - in real implementation, get from JWT token
+    if role == 'business':
+        business = Business.query.filter_by(user_id='business_user_123').first()
+        return [f'business:{business.id}'] if business else []
+
+    user_id = 'user_123'
+    schedule_ids = [
+        row.schedule_id for row in UserScheduleSubscription.query.with_entities(
+            UserScheduleSubscription.schedule_id
+        ).filter_by(user_id=user_id, is_active=True).distinct()
+    ]
+    return [f'user:{user_id}'] + [f'schedule:{schedule_id}' for schedule_id in schedule_ids]
+
+def _load_changes(entries):
+    """Collapse repeated changes per entity and attach current state; deleted rows become tombstones"""
+    latest = {}
+    for entry in entries:
+        latest[(entry.entity_type, entry.entity_id)] = entry
+
+    ids_by_type = {}
+    for (entity_type, entity_id), entry in latest.items():
+        if entry.operation == 'upsert':
+            ids_by_type.setdefault(entity_type, []).append(entity_id)
+
+    current = {}
+    for entity_type, ids in ids_by_type.items():
+        model = ENTITY_MODELS[entity_type]
+        for obj in model.query.filter(model.id.in_(ids)).all():
+            current[(entity_type, obj.id)] = obj.to_dict()
+
+    changes = []
+    for key, entry in sorted(latest.items(), key=lambda item: item[1].seq):
+        data = current.get(key)
+        changes.append({
+            'seq': entry.seq,
+            'type': entry.entity_type,
+            'id': entry.entity_id,
+            'op': 'upsert' if data is not None else 'delete',
+            'data': data
+        })
+    return changes
+
+@sync_bp.route('/sync/changes', methods=['GET'])
+def get_changes():
+    """Return changes since a client-held cursor.
+
+    Without a cursor the response carries no changes, just the current head and
+    reset=true: the client loads its lists normally and then syncs from that cursor.
+    A cursor older than the retained log gets 410 and the same full reload.
+    """
+    try:
+        role = request.args.get('role', 'resident')
+        limit = min(request.args.get('limit', 500, type=int), MAX_SYNC_LIMIT)
+        cursor = request.args.get('cursor')
+
+        if role not in ('resident', 'business'):
+            return error_response('INVALID_ROLE', 'Role must be resident or business', 400)
+
+        if not cursor:
+            return success_response({
+                'changes': [],
+                'cursor': str(head_seq()),
+                'hasMore': False,
+                'reset': True
+            })
+
+        try:
+            cursor = int(cursor)
+        except ValueError:
+            return error_response('INVALID_CURSOR', 'Cursor must come from a previous sync response', 400)
+
+        oldest = oldest_seq()
+        if oldest is not None and cursor < oldest - 1:
+            return error_response('CURSOR_EXPIRED', 'Cursor is older than the retained change log; reload and sync again', 410)
+
+        query = ChangeLog.query.filter(
+            ChangeLog.scope.in_(_scopes(role)),
+            ChangeLog.seq > cursor
+        )
+        lag = current_app.config.get('SYNC_VISIBILITY_LAG_SECONDS', 0)
+        if lag:
+            # Concurrent transactions can commit out of seq order; hold back the newest entries
+            query = query.filter(ChangeLog.created_at <= datetime.utcnow() - timedelta(seconds=lag))
+        entries = query.order_by(ChangeLog.seq).limit(limit + 1).all()
+
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        return success_response({
+            'changes': _load_changes(entries),
+            'cursor': str(entries[-1].seq if entries else cursor),
+            'hasMore': has_more,
+            'reset': False
+        })
+
+    except Exception as e:
+        return error_response('INTERNAL_ERROR', str(e), 500)
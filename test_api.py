@@ -1,86 +1,18 @@
-#!/usr/bin/env python3
 """
-API Test Script for Bulk Pickup Service
-Tests all major API endpoints to ensure functionality
+API tests for Bulk Pickup Service
+Exercises the major endpoints through the Flask test client
 """
 
-import requests
-import json
-import sys
-from datetime import datetime, date, timedelta
+import pytest
+from datetime import date, timedelta
 
-BASE_URL = "http://localhost:5000/api"
-
-def test_endpoint(method, endpoint, data=None, params=None, expected_status=200):
-    """Test a single API endpoint"""
-    url = f"{BASE_URL}{endpoint}"
-    
-    try:
-        if method.upper() == 'GET':
-            response = requests.get(url, params=params)
-        elif method.upper() == 'POST':
-            response = requests.post(url, json=data, params=params)
-        elif method.upper() == 'PUT':
-            response = requests.put(url, json=data, params=params)
-        elif method.upper() == 'DELETE':
-            response = requests.delete(url, params=params)
-        else:
-            print(f"❌ Unsupported method: {method}")
-            return False
-        
-        if response.status_code == expected_status:
-            print(f"✅ {method} {endpoint} - Status: {response.status_code}")
-            try:
-                response_data = response.json()
-                if response_data.get('success'):
-                    print(f"   Response: Success")
-                else:
-                    print(f"   Response: {response_data.get('error', {}).get('message', 'Unknown error')}")
-            except:
-                print(f"   Response: Non-JSON response")
-            return True
-        else:
-            print(f"❌ {method} {endpoint} - Expected: {expected_status}, Got: {response.status_code}")
-            try:
-                error_data = response.json()
-                print(f"   Error: {error_data.get('error', {}).get('message', 'Unknown error')}")
-            except:
-                print(f"   Error: {response.text}")
-            return False
-            
-    except requests.exceptions.ConnectionError:
-        print(f"❌ {method} {endpoint} - Connection failed (server not running?)")
-        return False
-    except Exception as e:
-        print(f"❌ {method} {endpoint} - Exception: {str(e)}")
-        return False
-
-def run_tests():
-    """Run all API tests"""
-    print("🚀 Starting API Tests for Bulk Pickup Service")
-    print("=" * 50)
-    
-    tests_passed = 0
-    tests_total = 0
-    
-    # Test Schedule API
-    print("\n📅 Testing Schedule API")
-    print("-" * 30)
-    
-    tests_total += 1
-    if test_endpoint('GET', '/schedules/lookup', params={'zipCode': '62701'}):
-        tests_passed += 1
-    
-    tests_total += 1
-    if test_endpoint('GET', '/schedules/schedule_123/events', params={'limit': 5}):
-        tests_passed += 1
-    
-    tests_total += 1
-    if test_endpoint('GET', '/schedules'):
-        tests_passed += 1
-    
-    tests_total += 1
-    if test_endpoint('POST', '/schedules/subscriptions', data={
+# (method, endpoint, json body, query params, expected status)
+ENDPOINTS = [
+    # Schedule API
+    ('GET', '/schedules/lookup', None, {'zipCode': '62701'}, 200),
+    ('GET', '/schedules/schedule_123/events', None, {'limit': 5}, 200),
+    ('GET', '/schedules', None, None, 200),
+    ('POST', '/schedules/subscriptions', {
         'scheduleId': 'schedule_123',
         'addressId': 'addr_123',
         'notificationPreferences': {
@@ -89,81 +21,59 @@ def run_tests():
             'sms': False,
             'advance_days': [1, 7]
         }
-    }, expected_status=201):
-        tests_passed += 1
-    
-    # Test Business API
-    print("\n🏢 Testing Business API")
-    print("-" * 30)
-    
-    tests_total += 1
-    if test_endpoint('GET', '/businesses/search', params={
-        'lat': 39.7817,
-        'lng': -89.6501,
-        'radius': 10
-    }):
-        tests_passed += 1
-    
-    tests_total += 1
-    if test_endpoint('GET', '/businesses/business_123'):
-        tests_passed += 1
-    
-    tests_total += 1
-    if test_endpoint('POST', '/businesses/profile', data={
+    }, None, 201),
+
+    # Business API
+    ('GET', '/businesses/search', None, {'lat': 39.7817, 'lng': -89.6501, 'radius': 10}, 200),
+    ('GET', '/businesses/business_123', None, None, 200),
+    ('POST', '/businesses/profile', {
         'businessName': 'Test Cleanup Service',
         'businessType': 'junk_removal',
         'description': 'Test business for API testing',
         'serviceRadiusMiles': 25
-    }):
-        tests_passed += 1
-    
-    # Test Booking API
-    print("\n📋 Testing Booking API")
-    print("-" * 30)
-    
-    tests_total += 1
-    if test_endpoint('POST', '/bookings/requests', data={
+    }, None, 200),
+
+    # Booking API
+    ('POST', '/bookings/requests', {
         'addressId': 'addr_123',
         'serviceCategory': 'junk_removal',
         'description': 'Need to remove old furniture',
         'preferredDate': (date.today() + timedelta(days=7)).isoformat(),
         'preferredTimeStart': '10:00',
         'estimatedBudget': 200.00
-    }, expected_status=201):
-        tests_passed += 1
-    
-    tests_total += 1
-    if test_endpoint('GET', '/bookings/requests/request_123/quotes'):
-        tests_passed += 1
-    
-    tests_total += 1
-    if test_endpoint('GET', '/bookings/history', params={'limit': 10}):
-        tests_passed += 1
-    
-    tests_total += 1
-    if test_endpoint('GET', '/bookings/booking_123'):
-        tests_passed += 1
-    
-    # Test User API (from template)
-    print("\n👤 Testing User API")
-    print("-" * 30)
-    
-    tests_total += 1
-    if test_endpoint('GET', '/users'):
-        tests_passed += 1
-    
-    # Print results
-    print("\n" + "=" * 50)
-    print(f"📊 Test Results: {tests_passed}/{tests_total} tests passed")
-    
-    if tests_passed == tests_total:
-        print("🎉 All tests passed! API is working correctly.")
-        return True
-    else:
-        print(f"⚠️  {tests_total - tests_passed} tests failed. Check the output above for details.")
-        return False
+    }, None, 201),
+    ('GET', '/bookings/requests/request_123/quotes', None, None, 200),
+    ('GET', '/bookings/history', None, {'limit': 10}, 200),
+    ('GET', '/bookings/booking_123', None, None, 200),
+    ('POST', '/businesses/business_456/routes/optimize', {
+        'date': (date.today() + timedelta(days=1)).isoformat(),
+        'depot': {'lat': 39.7817, 'lng': -89.6501},
+        'locations': {
+            'addr_123': {'lat': 39.7990, 'lng': -89.6440}
+        }
+    }, None, 200),
+    ('POST', '/bookings/bulk/transitions', {
+        'transitions': [
+            {'bookingId': 'booking_123', 'status': 'completed', 'completionNotes': 'All items removed'}
+        ]
+    }, None, 200),
+
+    # User API (from template)
+    ('GET', '/users', None, None, 200),
+]
 
-if __name__ == "__main__":
-    success = run_tests()
-    sys.exit(0 if success else 1)
+@pytest.mark.parametrize('method, endpoint, data, params, expected_status', ENDPOINTS,
+                         ids=[f'{m} {e}' for m, e, *_ in ENDPOINTS])
+def test_endpoint(client, method, endpoint, data, params, expected_status):
+    response = client.open(f'/api{endpoint}', method=method, json=data, query_string=params)
+    assert response.status_code == expected_status, response.get_data(as_text=True)
+    body = response.get_json()
+    if isinstance(body, dict):
+        assert body['success'] is True
 
+def test_missing_fields_are_reported_together(client):
+    response = client.post('/api/bookings/requests', json={'serviceCategory': 'junk_removal'})
+    assert response.status_code == 400
+    error = response.get_json()['error']
+    assert error['code'] == 'VALIDATION_ERROR'
+    assert {e['field'] for e in error['details']['errors']} == {'addressId', 'description'}
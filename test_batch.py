@@ -0,0 +1,66 @@
+import threading
+import time
+import pytest
+from flask import request
+
+@pytest.fixture
+def batch_client(app):
+    """Client with a counter the sub-requests read and write"""
+    state = {'count': 0, 'threads': set()}
+
+    @app.route('/api/_test/count', methods=['GET'])
+    def read_count():
+        time.sleep(float(request.args.get('delay', 0)))
+        state['threads'].add(threading.get_ident())
+        return {'count': state['count']}
+
+    @app.route('/api/_test/count', methods=['POST'])
+    def increment_count():
+        state['count'] += 1
+        return {'count': state['count']}, 201
+
+    @app.route('/api/_test/fail', methods=['GET'])
+    def fail():
+        raise RuntimeError('boom')
+
+    client = app.test_client()
+    client.state = state
+    return client
+
+def _batch(client, *items):
+    response = client.post('/api/batch', json={'requests': list(items)})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()['data']['responses']
+
+def test_responses_keep_request_order(batch_client):
+    responses = _batch(batch_client, *(
+        {'id': str(n), 'method': 'GET', 'path': f'/api/_test/count?delay={0.04 - n * 0.01}'} for n in range(4)
+    ))
+    assert [item['id'] for item in responses] == ['0', '1', '2', '3']
+    assert len(batch_client.state['threads']) > 1
+
+def test_writes_wait_for_earlier_reads_and_later_reads_see_them(batch_client):
+    responses = _batch(
+        batch_client,
+        {'id': 'before', 'method': 'GET', 'path': '/api/_test/count?delay=0.05'},
+        {'id': 'write', 'method': 'POST', 'path': '/api/_test/count'},
+        {'id': 'after', 'method': 'GET', 'path': '/api/_test/count'},
+    )
+    assert [(item['id'], item['status'], item['body']['count']) for item in responses] == [
+        ('before', 200, 0), ('write', 201, 1), ('after', 200, 1)
+    ]
+
+def test_a_failing_item_is_reported_without_failing_the_batch(batch_client):
+    responses = _batch(
+        batch_client,
+        {'id': 'a', 'method': 'GET', 'path': '/api/_test/fail'},
+        {'id': 'b', 'method': 'GET', 'path': '/api/_test/count'},
+        {'id': 'c', 'method': 'POST', 'path': '/api/_test/count'},
+    )
+    assert responses[0] == {'id': 'a', 'status': 500, 'error': {'code': 'INTERNAL_ERROR', 'message': 'boom'}}
+    assert [(item['id'], item['status']) for item in responses[1:]] == [('b', 200), ('c', 201)]
+
+def test_batch_cannot_nest(batch_client):
+    response = batch_client.post('/api/batch', json={'requests': [{'method': 'POST', 'path': '/api/batch'}]})
+    assert response.status_code == 400
+    assert response.get_json()['error']['code'] == 'INVALID_BATCH_ITEM'
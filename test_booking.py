@@ -0,0 +1,83 @@
+from datetime import date, time
+from src.models.booking import db, ServiceRequest, ServiceQuote, Booking
+from src.models.business import Business
+
+def _business(business_id, user_id='business_user_123'):
+    """The mock acting business user owns business_1 unless told otherwise"""
+    if db.session.get(Business, business_id) is None:
+        db.session.add(Business(id=business_id, user_id=user_id, business_name=business_id,
+                                business_type='junk_removal'))
+
+def _booking(status='confirmed', business_id='business_1', category='junk_removal'):
+    _business(business_id)
+    service_request = ServiceRequest(customer_user_id='user_123', customer_address_id='addr_1',
+                                     service_category=category, service_description='Old sofa')
+    db.session.add(service_request)
+    db.session.flush()
+    quote = ServiceQuote(request_id=service_request.id, business_id=business_id, quote_amount=150,
+                         valid_until=date(2030, 1, 1))
+    db.session.add(quote)
+    db.session.flush()
+    booking = Booking(request_id=service_request.id, quote_id=quote.id, customer_user_id='user_123',
+                      business_id=business_id, booking_reference=f'BK-{service_request.id[:8]}',
+                      scheduled_date=date(2030, 1, 2), scheduled_time_start=time(9, 0), booking_status=status)
+    db.session.add(booking)
+    db.session.commit()
+    return booking
+
+def _transition(client, *transitions):
+    response = client.post('/api/bookings/bulk/transitions', json={'transitions': list(transitions)})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()['data']
+
+def test_bulk_transition_applies_valid_items_and_reports_the_rest(client):
+    running = _booking('in_progress')
+    confirmed = _booking('confirmed')
+    done = _booking('completed')
+
+    data = _transition(
+        client,
+        {'bookingId': running.id, 'status': 'completed', 'completionNotes': 'All items removed'},
+        {'bookingId': confirmed.id, 'status': 'completed'},
+        {'bookingId': done.id, 'status': 'cancelled'},
+        {'bookingId': 'missing', 'status': 'cancelled'},
+        {'bookingId': running.id, 'status': 'cancelled'},
+        {'status': 'cancelled'},
+    )
+
+    assert data['appliedCount'] == 1
+    assert data['failedCount'] == 5
+    codes = [result.get('error', {}).get('code') for result in data['results']]
+    assert codes == [None, 'INVALID_TRANSITION', 'INVALID_TRANSITION', 'BOOKING_NOT_FOUND',
+                     'DUPLICATE_BOOKING', 'VALIDATION_ERROR']
+
+    db.session.expire_all()
+    assert db.session.get(Booking, running.id).booking_status == 'completed'
+    assert db.session.get(Booking, running.id).completion_notes == 'All items removed'
+    assert db.session.get(Booking, confirmed.id).booking_status == 'confirmed'
+
+def test_bulk_transition_rejects_oversized_batches(client):
+    response = client.post('/api/bookings/bulk/transitions', json={
+        'transitions': [{'bookingId': str(k), 'status': 'cancelled'} for k in range(501)]
+    })
+    assert response.status_code == 400
+    assert response.get_json()['error']['code'] == 'TOO_MANY_ITEMS'
+
+def test_bulk_transition_without_a_list_is_rejected(client):
+    response = client.post('/api/bookings/bulk/transitions', json={'transitions': 'all'})
+    assert response.status_code == 400
+    assert response.get_json()['error']['code'] == 'INVALID_JSON'
+
+def test_bulk_transition_only_sees_the_acting_business_bookings(client):
+    _business('business_2', user_id='someone_else')
+    mine = _booking('confirmed')
+    theirs = _booking('confirmed', business_id='business_2')
+
+    data = _transition(
+        client,
+        {'bookingId': mine.id, 'status': 'in_progress'},
+        {'bookingId': theirs.id, 'status': 'in_progress'},
+    )
+    assert [result.get('error', {}).get('code') for result in data['results']] == [None, 'BOOKING_NOT_FOUND']
+    db.session.expire_all()
+    assert db.session.get(Booking, theirs.id).booking_status == 'confirmed'
@@ -0,0 +1,140 @@
+from types import SimpleNamespace
+import random
+import threading
+import time
+from sqlalchemy import event
+from src.catalog import BusinessCatalog, get_catalog
+from src.snapshot import Snapshot
+from src.coverage import ServiceArea, haversine_miles, rebuild_area
+from src.models.business import db, Business, BusinessService
+
+def _row(business_id, lat, lng, rating=4.0):
+    return SimpleNamespace(
+        id=business_id, business_name=business_id, business_address={'lat': lat, 'lng': lng},
+        service_radius_miles=25, rating_average=rating, rating_count=10, total_jobs_completed=5,
+        response_time_hours=24, is_verified=True, is_active=True
+    )
+
+def test_search_filters_by_distance_category_and_rating():
+    catalog = BusinessCatalog()
+    catalog.upsert(_row('near', 39.80, -89.65), ['junk_removal'], 0)
+    catalog.upsert(_row('far', 41.88, -87.63), ['junk_removal'], 0)
+    catalog.upsert(_row('poor', 39.79, -89.64, rating=2.0), ['junk_removal'], 0)
+    catalog.upsert(_row('movers', 39.78, -89.66), ['moving'], 0)
+
+    ids = lambda results: sorted(catalog.ids[row] for row, _ in results)
+    assert ids(catalog.search(39.78, -89.65, 10)) == ['movers', 'near', 'poor']
+    assert ids(catalog.search(39.78, -89.65, 10, category='junk_removal', min_rating=3)) == ['near']
+    assert ids(catalog.search(39.78, -89.65, 10, category='pool_removal')) == []
+    assert ids(catalog.search(category='junk_removal')) == ['far', 'near', 'poor']
+
+def test_categories_are_not_capped_at_64():
+    catalog = BusinessCatalog()
+    categories = [f'category_{n}' for n in range(100)]
+    catalog.upsert(_row('everything', 39.8, -89.6), categories, 0)
+    catalog.upsert(_row('last_only', 39.8, -89.6), categories[-1:], 0)
+
+    assert [catalog.ids[row] for row, _ in catalog.search(category='category_99')] == ['everything', 'last_only']
+    assert catalog.record(0)['services'] == categories
+
+def test_search_wraps_across_the_antimeridian():
+    catalog = BusinessCatalog()
+    catalog.upsert(_row('east', 0.0, 179.95), [], 0)
+    catalog.upsert(_row('west', 0.0, -179.95), [], 0)
+    assert sorted(catalog.ids[row] for row, _ in catalog.search(0.0, -179.99, 20)) == ['east', 'west']
+
+def test_wide_and_narrow_searches_agree_with_a_brute_force_scan():
+    rng = random.Random(7)
+    catalog = BusinessCatalog()
+    points = {}
+    for n in range(2000):
+        lat, lng = rng.uniform(38.0, 42.0), rng.uniform(-92.0, -87.0)
+        points[f'b{n}'] = (lat, lng)
+        catalog.upsert(_row(f'b{n}', lat, lng), [], 0)
+
+    for radius in (5, 100):
+        expected = sorted(b for b, (lat, lng) in points.items() if haversine_miles(40.0, -89.5, lat, lng) <= radius)
+        assert sorted(catalog.ids[row] for row, _ in catalog.search(40.0, -89.5, radius)) == expected
+
+def test_refresh_replaces_the_catalog_instead_of_changing_it(app):
+    business = Business(user_id='u1', business_name='Before', business_type='junk_removal',
+                        business_address={'lat': 39.8, 'lng': -89.6})
+    db.session.add(business)
+    db.session.commit()
+    first = get_catalog()
+    assert first.names == ['Before']
+
+    business.business_name = 'After'
+    db.session.commit()
+    second = get_catalog()
+    assert second is not first
+    assert first.names == ['Before'] and second.names == ['After']
+
+def test_search_radius_is_clamped(client):
+    for name, lat in (('close', 39.80), ('distant', 44.50)):
+        db.session.add(Business(user_id='u1', business_name=name, business_type='junk_removal',
+                                business_address={'lat': lat, 'lng': -89.65}))
+    db.session.commit()
+
+    response = client.get('/api/businesses/search', query_string={'lat': 39.78, 'lng': -89.65, 'radius': 100000})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert [business['name'] for business in response.get_json()['data']['businesses']] == ['close']
+
+def test_catalog_is_preloaded_by_requests_not_by_commands(app):
+    state = app.extensions['business_catalog']
+    assert app.test_cli_runner().invoke(args=['jobs-stats']).exit_code == 0
+    assert state.snapshot.value is None
+
+    app.test_client().get('/api/schedules')
+    assert state.snapshot.value is not None
+
+def test_search_does_not_query_the_database(client):
+    business = Business(user_id='u1', business_name='Haulers', business_type='junk_removal',
+                        business_address={'lat': 39.80, 'lng': -89.65})
+    db.session.add(business)
+    db.session.flush()
+    db.session.add(BusinessService(business_id=business.id, service_category='junk_removal',
+                                   service_name='Pickup', base_price=100, price_unit='flat_rate'))
+    area = ServiceArea(business_id=business.id, name='Downtown', area_type='radius',
+                       center_lat=39.78, center_lng=-89.65, radius_miles=5)
+    db.session.add(area)
+    db.session.flush()
+    rebuild_area(area)
+    db.session.commit()
+    query = {'lat': 39.78, 'lng': -89.65, 'serviceCategory': 'junk_removal'}
+    client.get('/api/businesses/search', query_string=query)
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.get('/api/businesses/search', query_string=query)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert [b['id'] for b in response.get_json()['data']['businesses']] == [business.id]
+    assert statements == []
+
+def test_refresh_runs_in_the_background_and_swaps_when_done(app):
+    release = threading.Event()
+    built = threading.Event()
+
+    def build(current):
+        if current is None:
+            return 'first'
+        release.wait(5)
+        built.set()
+        return 'second'
+
+    snapshot = Snapshot(app, 'test', build, background=True)
+    assert snapshot.get() == 'first'
+    snapshot.refresh()
+    # The caller keeps the published value while the rebuild is blocked
+    assert snapshot.value == 'first'
+    release.set()
+    assert built.wait(5)
+    for _ in range(100):
+        if snapshot.value == 'second':
+            break
+        time.sleep(0.01)
+    assert snapshot.value == 'second'
@@ -0,0 +1,61 @@
+import gzip
+import json
+import pytest
+from flask import Response, stream_with_context
+import src.compression as compression
+
+BODY = {'items': [{'id': n, 'name': f'Business {n}'} for n in range(200)]}
+
+@pytest.fixture
+def compress_client(app):
+    @app.route('/_test/large')
+    def large():
+        return BODY
+
+    @app.route('/_test/small')
+    def small():
+        return {'ok': True}
+
+    @app.route('/_test/events')
+    def events():
+        return Response(stream_with_context(f'data: {n}\n\n' for n in range(3)), mimetype='text/event-stream')
+
+    @app.route('/_test/rows')
+    def rows():
+        return Response((json.dumps(item) + '\n' for item in BODY['items']), mimetype='text/plain')
+
+    return app.test_client()
+
+def test_gzip_is_negotiated_for_large_json(compress_client):
+    response = compress_client.get('/_test/large', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.get_data())) == BODY
+
+    plain = compress_client.get('/_test/large', headers={'Accept-Encoding': 'gzip;q=0'})
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_json() == BODY
+
+def test_brotli_is_preferred_when_available(compress_client):
+    if compression.brotli is None:
+        pytest.skip('brotli is not installed')
+    response = compress_client.get('/_test/large', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(compression.brotli.decompress(response.get_data())) == BODY
+
+def test_small_bodies_are_sent_as_is(compress_client):
+    response = compress_client.get('/_test/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == {'ok': True}
+
+def test_event_streams_are_not_compressed(compress_client):
+    response = compress_client.get('/_test/events', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data(as_text=True) == 'data: 0\n\ndata: 1\n\ndata: 2\n\n'
+
+def test_other_streamed_bodies_are_compressed_incrementally(compress_client):
+    response = compress_client.get('/_test/rows', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    lines = gzip.decompress(response.get_data()).decode().splitlines()
+    assert [json.loads(line) for line in lines] == BODY['items']
@@ -0,0 +1,25 @@
+from sqlalchemy import text
+from src.main import create_app
+from src.models.user import db
+
+def test_memory_database_override_drops_file_pool_options():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'})
+    options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    assert 'pool_size' not in options
+    assert 'max_overflow' not in options
+    with app.app_context():
+        assert db.session.execute(text('SELECT 1')).scalar() == 1
+
+def test_file_database_gets_pool_options_and_directory(tmp_path):
+    path = tmp_path / 'nested' / 'app.db'
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+    assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['max_overflow'] >= 0
+    assert path.parent.is_dir()
+
+def test_explicit_engine_options_win():
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'SQLALCHEMY_ENGINE_OPTIONS': {'pool_pre_ping': False}
+    })
+    assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_pre_ping'] is False
+    assert 'connect_args' in app.config['SQLALCHEMY_ENGINE_OPTIONS']
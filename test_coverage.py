@@ -0,0 +1,85 @@
+import pytest
+from src.models.business import db, Business, BusinessService
+from src.coverage import (ServiceArea, geohash_encode, geohash_bounds, cells_in_bbox, haversine_miles,
+                          covering_areas, rebuild_area)
+import src.routes.booking as booking_routes
+
+def _business(category='junk_removal', **area):
+    business = Business(user_id='business_user_123', business_name='Haulers', business_type='junk_removal')
+    db.session.add(business)
+    db.session.flush()
+    db.session.add(BusinessService(business_id=business.id, service_category=category,
+                                   service_name='Junk pickup', base_price=100, price_unit='flat_rate'))
+    service_area = ServiceArea(business_id=business.id, name='Area', **area)
+    db.session.add(service_area)
+    db.session.flush()
+    rebuild_area(service_area)
+    db.session.commit()
+    return business, service_area
+
+def _request(client, **extra):
+    body = {'addressId': 'addr_1', 'serviceCategory': 'junk_removal', 'description': 'Old sofa'}
+    body.update(extra)
+    return client.post('/api/bookings/requests', json=body)
+
+def test_geohash_matches_the_reference_encoding():
+    assert geohash_encode(57.64911, 10.40744, precision=11) == 'u4pruydqqvj'
+    min_lat, min_lng, max_lat, max_lng = geohash_bounds(geohash_encode(39.7817, -89.6501))
+    assert min_lat <= 39.7817 <= max_lat and min_lng <= -89.6501 <= max_lng
+
+def test_cells_in_bbox_cover_the_box():
+    cells = set(cells_in_bbox(39.70, -89.75, 39.85, -89.55))
+    for lat in (39.70, 39.78, 39.85):
+        for lng in (-89.75, -89.65, -89.55):
+            assert geohash_encode(lat, lng) in cells
+
+def test_haversine_miles():
+    assert haversine_miles(39.0, -89.0, 40.0, -89.0) == pytest.approx(69.09, abs=0.01)
+    assert haversine_miles(39.78, -89.65, 39.78, -89.65) == 0
+
+def test_radius_and_zip_areas_are_found_through_the_grid(app):
+    _, radius = _business(area_type='radius', center_lat=39.78, center_lng=-89.65, radius_miles=5)
+    _, zip_area = _business(area_type='zip', zip_codes=['62701'])
+
+    assert [area for _, area in covering_areas(39.80, -89.66)] == [radius.id]
+    assert covering_areas(39.80, -89.30) == []
+    assert [area for _, area in covering_areas(zip_code='62701')] == [zip_area.id]
+
+def test_service_request_is_routed_to_covering_businesses(client):
+    business, _ = _business(area_type='radius', center_lat=39.78, center_lng=-89.65, radius_miles=5)
+
+    response = _request(client, location={'lat': 39.80, 'lng': -89.66})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    data = response.get_json()['data']
+    assert data['routedBusinessCount'] == 1
+    assert [estimate['businessId'] for estimate in data['priceEstimates']] == [business.id]
+
+    response = _request(client, location={'lat': 39.80, 'lng': -89.30})
+    assert response.get_json()['data']['routedBusinessCount'] == 0
+
+def test_routed_demand_is_counted_under_its_service_area(client):
+    _, area = _business(area_type='radius', center_lat=39.78, center_lng=-89.65, radius_miles=5)
+    _request(client, location={'lat': 39.80, 'lng': -89.66})
+
+    response = client.get('/api/analytics/demand')
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert response.get_json()['data']['demand'] == [
+        {'serviceAreaId': area.id, 'serviceCategory': 'junk_removal', 'requests': 1}
+    ]
+
+def test_service_request_location_is_validated(client):
+    response = _request(client, location={'lat': 120, 'lng': 'east'})
+    assert response.status_code == 400
+    fields = [error['field'] for error in response.get_json()['error']['details']['errors']]
+    assert fields == ['location.lat', 'location.lng']
+
+    assert _request(client, location={'lat': 39.8}).status_code == 400
+
+def test_saved_service_request_survives_a_queue_failure(client, monkeypatch):
+    def enqueue(*args, **kwargs):
+        raise OSError('disk full')
+    monkeypatch.setattr(booking_routes, 'enqueue', enqueue)
+
+    response = _request(client)
+    assert response.status_code == 201
+    assert response.get_json()['data']['request']['id']
@@ -0,0 +1,69 @@
+import threading
+import pytest
+from src.pubsub import InProcessBroker, SQLiteBroker, get_broker
+from src.routes.booking import booking_channel
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def broker(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteBroker(str(tmp_path / 'events.db'), poll_interval=0.01)
+    return InProcessBroker()
+
+def test_every_subscriber_receives_each_event(broker):
+    received = {}
+
+    def subscribe(name):
+        received[name] = broker.wait_for('user:u1', 0, timeout=2)
+
+    subscribers = [threading.Thread(target=subscribe, args=(name,)) for name in ('a', 'b')]
+    for subscriber in subscribers:
+        subscriber.start()
+    broker.publish('user:u2', 'booking.status', {'bookingId': 'other'})
+    event = broker.publish('user:u1', 'booking.status', {'bookingId': 'b1'})
+    for subscriber in subscribers:
+        subscriber.join()
+
+    for events in received.values():
+        assert [(e.id, e.type, e.data) for e in events] == [(event.id, 'booking.status', {'bookingId': 'b1'})]
+    assert broker.wait_for('user:u1', event.id, timeout=0) == []
+
+def test_sqlite_broker_fans_out_across_connections(tmp_path):
+    publisher = SQLiteBroker(str(tmp_path / 'events.db'))
+    subscriber = SQLiteBroker(str(tmp_path / 'events.db'))
+    event = publisher.publish('user:u1', 'booking.status', {'bookingId': 'b1'})
+    assert [e.id for e in subscriber.wait_for('user:u1', 0, timeout=0)] == [event.id]
+
+def _open_stream(client, **params):
+    return client.get('/api/bookings/stream', query_string=params, buffered=False)
+
+def test_stream_sends_published_events(app, client):
+    app.config['SSE_HEARTBEAT_SECONDS'] = 0.05
+    event = get_broker().publish(booking_channel('user_123'), 'booking.status', {'bookingId': 'b1', 'status': 'completed'})
+
+    response = _open_stream(client, lastEventId=0)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = response.response
+    assert next(chunks) == b'retry: 3000\n\n'
+    assert next(chunks).decode() == event.to_sse()
+    assert next(chunks) == b': keep-alive\n\n'
+    response.close()
+
+def test_stream_rejects_a_bad_event_id(client):
+    response = client.get('/api/bookings/stream', headers={'Last-Event-ID': 'latest'})
+    assert response.status_code == 400
+
+def test_open_streams_are_capped(app, client):
+    app.config.update(SSE_MAX_CONNECTIONS=1, SSE_HEARTBEAT_SECONDS=0.05)
+    first = _open_stream(client)
+    assert first.status_code == 200
+
+    refused = _open_stream(client)
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '5'
+    assert refused.get_json()['error']['code'] == 'TOO_MANY_STREAMS'
+
+    first.close()
+    second = _open_stream(client)
+    assert second.status_code == 200
+    second.close()
@@ -0,0 +1,34 @@
+from datetime import datetime
+from src.models.business import db, BusinessReview
+
+def _reviews(client, **params):
+    return client.get('/api/businesses/business_1/reviews', query_string=params)
+
+def _review(rating, created_at):
+    review = BusinessReview(business_id='business_1', reviewer_user_id='user_123', rating=rating,
+                            review_title='Fast pickup', created_at=created_at)
+    db.session.add(review)
+    return review
+
+def test_requested_fields_match_the_full_representation(client):
+    _review(5, datetime(2025, 3, 2, 9, 30))
+    _review(3, datetime(2025, 3, 1, 12, 0))
+    db.session.commit()
+
+    full = _reviews(client).get_json()['data']['reviews']
+    response = _reviews(client, fields='rating,createdAt')
+    assert response.status_code == 200, response.get_data(as_text=True)
+    narrowed = response.get_json()['data']['reviews']
+
+    # The id is always included, and values are formatted exactly as in the full payload
+    assert narrowed == [{'id': r['id'], 'rating': r['rating'], 'createdAt': r['createdAt']} for r in full]
+    assert [list(r) for r in narrowed] == [['id', 'rating', 'createdAt']] * 2
+
+def test_unknown_fields_are_rejected_with_the_allowed_list(client):
+    response = _reviews(client, fields='rating,secret')
+    assert response.status_code == 400
+    error = response.get_json()['error']
+    assert error['code'] == 'INVALID_FIELDS'
+    assert 'secret' in error['message']
+    assert {'id', 'rating', 'createdAt'} <= set(error['details']['allowed'])
+    assert 'secret' not in error['details']['allowed']
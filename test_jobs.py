@@ -0,0 +1,76 @@
+import threading
+import pytest
+from src.jobs import JobQueue, TASKS, task, run_worker, get_queue
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / 'jobs.db'), backoff_base=60)
+
+def _status(queue, job_id):
+    return queue._connection().execute('SELECT status, attempts, locked_by FROM jobs WHERE id = ?', (job_id,)).fetchone()
+
+def test_jobs_are_leased_by_priority_and_completed(queue):
+    low = queue.enqueue('noop', {'n': 1})
+    high = queue.enqueue('noop', {'n': 2}, priority=5)
+    jobs = queue.dequeue('worker-a', limit=1)
+    assert [job.id for job in jobs] == [high]
+    assert queue.complete(jobs[0]) is True
+    assert _status(queue, high)[0] == 'done'
+    assert _status(queue, low)[0] == 'queued'
+
+def test_stale_worker_cannot_finish_a_released_job(queue):
+    job_id = queue.enqueue('noop')
+    [stale] = queue.dequeue('worker-a', visibility_timeout=-1)
+    [current] = queue.dequeue('worker-b')
+    assert current.id == job_id and current.attempts == 2
+
+    assert queue.complete(stale) is False
+    assert queue.fail(stale, 'boom') is False
+    assert _status(queue, job_id) == ('running', 2, 'worker-b')
+
+    assert queue.complete(current) is True
+    assert _status(queue, job_id)[0] == 'done'
+
+def test_same_worker_id_cannot_finish_an_older_lease(queue):
+    queue.enqueue('noop')
+    [first] = queue.dequeue('host:1', visibility_timeout=-1)
+    [second] = queue.dequeue('host:1')
+    assert queue.complete(first) is False
+    assert queue.complete(second) is True
+
+def test_expired_leases_count_as_attempts(queue):
+    job_id = queue.enqueue('crashes', max_attempts=2)
+    assert len(queue.dequeue('worker-a', visibility_timeout=-1)) == 1
+    assert len(queue.dequeue('worker-b', visibility_timeout=-1)) == 1
+    assert queue.dequeue('worker-c') == []
+    status, attempts, locked_by = _status(queue, job_id)
+    assert (status, attempts, locked_by) == ('failed', 2, None)
+
+def test_failed_job_backs_off_then_fails_for_good(queue):
+    job_id = queue.enqueue('flaky', max_attempts=2)
+    [job] = queue.dequeue('worker-a')
+    assert queue.fail(job, 'first') is True
+    assert _status(queue, job_id)[0] == 'queued'
+    assert queue.dequeue('worker-a') == []
+
+    queue._connection().execute('UPDATE jobs SET run_at = 0 WHERE id = ?', (job_id,))
+    [job] = queue.dequeue('worker-a')
+    assert queue.fail(job, 'second') is True
+    assert queue.stats() == {'failed': 1}
+
+def test_worker_runs_registered_tasks(app):
+    stop = threading.Event()
+    seen = []
+
+    @task('tests.record')
+    def record(payload):
+        seen.append(payload['value'])
+        stop.set()
+
+    try:
+        get_queue(app).enqueue('tests.record', {'value': 42})
+        run_worker(app, concurrency=1, poll_interval=0.01, stop_event=stop)
+    finally:
+        TASKS.pop('tests.record', None)
+    assert seen == [42]
+    assert get_queue(app).stats() == {'done': 1}
@@ -0,0 +1,89 @@
+from src.models.business import db, Business
+from src.coverage import ServiceArea, rebuild_area
+from src.map_tiles import MapTile, tile_for, tile_bounds, simplify
+import src.map_tiles as map_tiles
+
+SPRINGFIELD = (39.7817, -89.6501)
+
+def _business(lat, lng, name='Haulers'):
+    business = Business(user_id='business_user_123', business_name=name, business_type='junk_removal',
+                        business_address={'lat': lat, 'lng': lng})
+    db.session.add(business)
+    db.session.commit()
+    return business
+
+def _area(business, lat, lng, radius_miles=3):
+    area = ServiceArea(business_id=business.id, name='Area', area_type='radius',
+                       center_lat=lat, center_lng=lng, radius_miles=radius_miles)
+    db.session.add(area)
+    db.session.flush()
+    rebuild_area(area)
+    db.session.commit()
+    return area
+
+def _tile(client, z, x, y, **kwargs):
+    response = client.get(f'/api/map/tiles/{z}/{x}/{y}', **kwargs)
+    assert response.status_code in (200, 304), response.get_data(as_text=True)
+    return response
+
+def _cached():
+    return {(tile.z, tile.x, tile.y) for tile in MapTile.query.all()}
+
+def test_tile_math_round_trips():
+    z = 12
+    x, y = tile_for(*SPRINGFIELD, z)
+    min_lat, min_lng, max_lat, max_lng = tile_bounds(z, x, y)
+    assert min_lat <= SPRINGFIELD[0] <= max_lat and min_lng <= SPRINGFIELD[1] <= max_lng
+    assert tile_for(0, -200, 3) == (0, 4)
+
+def test_simplify_drops_collinear_points():
+    assert simplify([(0, 0), (1, 0.1), (2, 0), (3, 0), (4, 5)], 0.5) == [0, 3, 4]
+
+def test_tile_holds_only_nearby_providers_and_zones(client):
+    near = _business(*SPRINGFIELD)
+    far = _business(41.88, -87.63, name='Elsewhere')
+    area = _area(near, *SPRINGFIELD)
+    _area(far, 41.88, -87.63)
+
+    z = 10
+    x, y = tile_for(*SPRINGFIELD, z)
+    data = _tile(client, z, x, y).get_json()['data']
+    assert [marker['id'] for marker in data['providers']] == [near.id]
+    assert [zone['id'] for zone in data['zones']] == [area.id]
+
+def test_cached_tiles_revalidate_and_are_dropped_on_edits(client):
+    business = _business(*SPRINGFIELD)
+    z = 8
+    x, y = tile_for(*SPRINGFIELD, z)
+    other = (z, x + 2, y)
+    first = _tile(client, z, x, y)
+    _tile(client, *other)
+    assert _cached() == {(z, x, y), other}
+
+    assert _tile(client, z, x, y, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    business.business_address = {'lat': SPRINGFIELD[0] + 0.01, 'lng': SPRINGFIELD[1]}
+    db.session.commit()
+    assert _cached() == {other}
+
+def test_large_areas_invalidate_by_key_range(client):
+    business = _business(*SPRINGFIELD)
+    z = 12
+    x, y = tile_for(*SPRINGFIELD, z)
+    _tile(client, z, x, y)
+    _tile(client, z, x + 500, y)
+
+    _area(business, *SPRINGFIELD, radius_miles=50)
+    assert _cached() == {(z, x + 500, y)}
+
+def test_failed_cache_write_still_serves_the_tile(client, monkeypatch):
+    def store(*args):
+        raise RuntimeError('database is locked')
+    monkeypatch.setattr(map_tiles, '_store_tile', store)
+    _business(*SPRINGFIELD)
+
+    z = 6
+    response = _tile(client, z, *tile_for(*SPRINGFIELD, z))
+    assert response.status_code == 200
+    assert len(response.get_json()['data']['providers']) == 1
+    assert _cached() == set()
@@ -0,0 +1,40 @@
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from src.models.user import db
+from src.metrics import registry
+from src.query_profiler import QueryProfile, normalize_sql
+
+def test_profiler_reuses_the_metrics_timing(app):
+    with app.test_request_context():
+        g._query_profile = profile = QueryProfile()
+        for value in range(3):
+            db.session.execute(text('SELECT :value'), {'value': value})
+        assert g._db_queries == 3
+        assert profile.count == 3
+        assert profile.total_time == pytest.approx(g._db_time)
+        assert profile.shapes == {'SELECT ?': 3}
+
+def test_failed_statement_does_not_leave_a_start_time(app):
+    with app.test_request_context():
+        with pytest.raises(OperationalError):
+            db.session.execute(text('SELECT * FROM no_such_table'))
+        db.session.rollback()
+        db.session.execute(text('SELECT 1'))
+        assert not db.session.connection().info.get('_query_start')
+        assert g._db_queries == 1
+
+def test_requests_get_server_timing_and_metrics(client):
+    key = ('schedule.get_schedules', 'GET', 200)
+    before = registry.status_counts.get(key, 0)
+    response = client.get('/api/schedules')
+    assert response.status_code == 200
+    assert 'db;dur=' in response.headers['Server-Timing']
+    assert registry.status_counts[key] == before + 1
+    scrape = client.get('/metrics').get_data(as_text=True)
+    assert f'http_requests_total{{endpoint="schedule.get_schedules",method="GET",status="200"}} {before + 1}' in scrape
+
+def test_normalize_sql_collapses_literals_and_in_lists():
+    assert normalize_sql("SELECT * FROM t WHERE id IN (?, ?, ?) AND name = 'x' AND n = 5") == \
+        'SELECT * FROM t WHERE id IN (?) AND name = ? AND n = ?'
@@ -0,0 +1,25 @@
+from sqlalchemy import text
+from src.models.user import db
+from src.migrations import MIGRATIONS, migrate, applied_versions, check_indexes
+
+def test_migrate_is_idempotent(app):
+    # AUTO_CREATE_SCHEMA already applied everything
+    assert migrate(db.engine) == []
+    with db.engine.connect() as connection:
+        assert applied_versions(connection) == {migration.version for migration in MIGRATIONS}
+
+    # Re-running after the bookkeeping is lost only re-issues IF NOT EXISTS statements
+    with db.engine.begin() as connection:
+        connection.execute(text('DELETE FROM schema_migrations'))
+    assert [migration.version for migration in migrate(db.engine)] == [m.version for m in MIGRATIONS]
+    assert migrate(db.engine) == []
+
+def test_check_indexes_uses_every_expected_index(app):
+    results = check_indexes()
+    assert results and all(result['used'] for result in results), results
+
+def test_check_indexes_reports_a_missing_index(app):
+    with db.engine.begin() as connection:
+        connection.execute(text('DROP INDEX ix_payments_status_id'))
+    missing = [result['description'] for result in check_indexes() if not result['used']]
+    assert missing == ['unsettled payments chunk']
@@ -0,0 +1,90 @@
+from collections import namedtuple
+from src.models.business import db, BusinessService
+from src.coverage import ServiceArea
+from src.pricing import PriceTable, AreaPriceRule, get_price_table
+
+Service = namedtuple('Service', 'business_id service_category base_price minimum_charge price_unit')
+Area = namedtuple('Area', 'id business_id')
+
+def _table(services, areas=(), rules=()):
+    return PriceTable([Service(*s) for s in services], [Area(*a) for a in areas], rules)
+
+def test_services_in_one_category_give_a_range():
+    table = _table([
+        ('b1', 'junk_removal', 150, 75, 'flat_rate'),
+        ('b1', 'junk_removal', 300, 100, 'flat_rate'),
+        ('b1', 'junk_removal', 40, 0, 'per_item'),
+    ])
+    assert table.price_ranges(['b1'], 'junk_removal')['b1'] == {
+        'min': 40.0, 'max': 40.0, 'unit': 'per_item', 'minimumCharge': 0.0, 'tier': '$'
+    }
+
+    table = _table([('b1', 'junk_removal', 150, 75, 'flat_rate'), ('b1', 'junk_removal', 300, 100, 'flat_rate')])
+    price = table.price_ranges(['b1'], 'junk_removal')['b1']
+    assert (price['min'], price['max'], price['minimumCharge']) == (150.0, 300.0, 75.0)
+
+def test_range_without_a_category_keeps_to_one_unit():
+    table = _table([
+        ('b1', 'junk_removal', 150, 0, 'flat_rate'),
+        ('b1', 'moving', 90, 0, 'per_hour'),
+        ('b1', 'cleanup', 120, 0, 'per_hour'),
+    ])
+    price = table.price_ranges(['b1'])['b1']
+    assert (price['min'], price['max'], price['unit']) == (90.0, 120.0, 'per_hour')
+    assert table.price_ranges(['b1', 'b2'], 'pool_removal') == {'b1': None, 'b2': None}
+
+def test_area_multipliers_narrow_the_range_once_the_area_is_known():
+    rules = [AreaPriceRule(service_area_id='a2', service_category='', business_id='b1', multiplier=1.5)]
+    table = _table([('b1', 'junk_removal', 100, 0, 'flat_rate')], areas=[('a1', 'b1'), ('a2', 'b1')], rules=rules)
+    spanned = table.price_ranges(['b1'], 'junk_removal')['b1']
+    assert (spanned['min'], spanned['max']) == (100.0, 150.0)
+    located = table.price_ranges(['b1'], 'junk_removal', areas={'b1': 'a2'})['b1']
+    assert (located['min'], located['max']) == (150.0, 150.0)
+
+def test_areas_at_locates_the_point_without_the_grid():
+    Located = namedtuple('Located', 'id business_id area_type center_lat center_lng radius_miles polygon')
+    table = PriceTable([], [
+        Located('zip_area', 'b1', 'zip', None, None, None, None),
+        Located('far', 'b1', 'radius', 41.88, -87.63, 5, None),
+        Located('near', 'b1', 'radius', 39.78, -89.65, 5, None),
+        Located('box', 'b2', 'polygon', None, None, None, [[39.7, -89.7], [39.7, -89.6], [39.9, -89.6], [39.9, -89.7]]),
+    ], [])
+    assert table.areas_at(['b1', 'b2', 'b3'], 39.80, -89.66) == {'b1': 'near', 'b2': 'box'}
+    assert table.areas_at(['b1', 'b2'], 40.5, -89.66) == {}
+
+def _service(business_id, price):
+    service = BusinessService(business_id=business_id, service_category='junk_removal', service_name='Pickup',
+                              base_price=price, price_unit='flat_rate')
+    db.session.add(service)
+    return service
+
+def test_table_is_rebuilt_only_after_a_commit(app):
+    _service('b1', 100)
+    db.session.commit()
+    table = get_price_table()
+    assert table.price_ranges(['b1'], 'junk_removal')['b1']['min'] == 100.0
+
+    _service('b2', 200)
+    db.session.flush()
+    assert get_price_table() is table
+    db.session.rollback()
+    assert get_price_table() is table
+
+    _service('b2', 200)
+    db.session.flush()
+    assert get_price_table() is table
+    db.session.commit()
+    assert get_price_table().price_ranges(['b2'], 'junk_removal')['b2']['min'] == 200.0
+
+def test_area_pricing_route_updates_estimates(client):
+    _service('b1', 100)
+    area = ServiceArea(business_id='b1', name='Downtown', area_type='zip', zip_codes=['62701'])
+    db.session.add(area)
+    db.session.commit()
+    get_price_table()
+
+    response = client.put(f'/api/businesses/b1/service-areas/{area.id}/pricing',
+                          json={'multipliers': {'default': 1.2}})
+    assert response.status_code == 200, response.get_data(as_text=True)
+    price = get_price_table().price_ranges(['b1'], 'junk_removal', areas={'b1': area.id})['b1']
+    assert price['min'] == 120.0
@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import text
+from src.models.user import db
+from src.query_profiler import NPlusOneError, normalize_sql
+
+def test_statements_reduce_to_their_shape():
+    assert normalize_sql("SELECT * FROM bookings WHERE id = 'b1' AND total > 10.5") == \
+        'SELECT * FROM bookings WHERE id = ? AND total > ?'
+    assert normalize_sql('SELECT * FROM bookings WHERE id IN (?, ?,\n ?)') == 'SELECT * FROM bookings WHERE id IN (?)'
+
+def _route(app, rule, queries):
+    @app.route(rule, endpoint=rule)
+    def view():
+        for n in range(queries):
+            db.session.execute(text('SELECT :n'), {'n': n})
+        return {'ok': True}
+
+def test_repeated_statements_raise_under_testing(app):
+    _route(app, '/_test/per-row', 10)
+    with pytest.raises(NPlusOneError, match='10x SELECT ?'):
+        app.test_client().get('/_test/per-row')
+
+def test_statements_under_the_threshold_pass(app):
+    _route(app, '/_test/batched', 9)
+    assert app.test_client().get('/_test/batched').status_code == 200
@@ -0,0 +1,54 @@
+import pytest
+from src.main import create_app
+from src.rate_limit import parse_limit, MemoryBucketStore, SQLiteBucketStore
+
+def test_parse_limit():
+    assert parse_limit('60/minute') == (1.0, 60.0)
+    assert parse_limit('120/minute;burst=30') == (2.0, 30.0)
+    assert parse_limit('10/second') == (10.0, 10.0)
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'sqlite':
+        return SQLiteBucketStore(str(tmp_path / 'ratelimit.db'))
+    return MemoryBucketStore()
+
+def test_bucket_allows_a_burst_then_refills(store):
+    rate, capacity = parse_limit('60/minute;burst=3')
+    results = [store.consume('ip:test:1', rate, capacity, now=100.0)[0] for _ in range(4)]
+    assert results == [True, True, True, False]
+
+    allowed, _, retry_after = store.consume('ip:test:1', rate, capacity, now=100.0)
+    assert not allowed
+    assert retry_after == pytest.approx(1.0)
+
+    # One token per second comes back
+    assert store.consume('ip:test:1', rate, capacity, now=101.0)[0]
+    assert not store.consume('ip:test:1', rate, capacity, now=101.0)[0]
+
+def test_buckets_are_per_key(store):
+    rate, capacity = parse_limit('1/minute')
+    assert store.consume('ip:test:1', rate, capacity, now=0.0)[0]
+    assert not store.consume('ip:test:1', rate, capacity, now=0.0)[0]
+    assert store.consume('ip:test:2', rate, capacity, now=0.0)[0]
+
+def test_memory_store_evicts_when_full():
+    store = MemoryBucketStore(max_keys=10)
+    for k in range(25):
+        store.consume(f'ip:test:{k}', 1.0, 1.0, now=float(k))
+    assert len(store._buckets) <= 10
+
+def test_route_returns_429_with_retry_after():
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+        'RATE_LIMIT_ENABLED': True,
+        'RATE_LIMITS': {'schedule_lookup': '2/minute'}
+    })
+    client = app.test_client()
+    statuses = [client.get('/api/schedules/lookup', query_string={'zipCode': '62701'}).status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+
+    response = client.get('/api/schedules/lookup', query_string={'zipCode': '62701'})
+    assert response.get_json()['error']['code'] == 'RATE_LIMITED'
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.headers['X-RateLimit-Limit'] == '2'
@@ -0,0 +1,71 @@
+from datetime import date, time
+import pytest
+from src.models.booking import db, ServiceRequest, ServiceQuote, Booking, Payment
+from src.change_log import ChangeLog
+from src.reconciliation import (PaymentProcessorClient, FakePaymentProcessor, PaymentDiscrepancy,
+                                reconcile_payments)
+
+def _payment(n, amount=150, currency='USD', status='pending'):
+    service_request = ServiceRequest(customer_user_id='user_123', customer_address_id='addr_1',
+                                     service_category='junk_removal', service_description='Old sofa')
+    db.session.add(service_request)
+    db.session.flush()
+    quote = ServiceQuote(request_id=service_request.id, business_id='business_1', quote_amount=amount,
+                         valid_until=date(2030, 1, 1))
+    db.session.add(quote)
+    db.session.flush()
+    booking = Booking(request_id=service_request.id, quote_id=quote.id, customer_user_id='user_123',
+                      business_id='business_1', booking_reference=f'BK-{service_request.id[:8]}',
+                      scheduled_date=date(2030, 1, 2), scheduled_time_start=time(9, 0), payment_status='pending')
+    db.session.add(booking)
+    db.session.flush()
+    payment = Payment(booking_id=booking.id, payment_intent_id=f'pi_{n}', amount=amount, currency=currency,
+                      payment_method='card', payment_status=status)
+    db.session.add(payment)
+    return payment
+
+def test_processor_client_requires_fetch_payments():
+    with pytest.raises(TypeError):
+        PaymentProcessorClient()
+
+def test_unsettled_payments_are_walked_in_keyset_chunks(app):
+    payments = [_payment(n) for n in range(7)]
+    _payment(99, status='succeeded')
+    db.session.commit()
+    processor = FakePaymentProcessor()
+    for payment in payments:
+        processor.set_payment(payment.payment_intent_id, 'pending', payment.amount)
+
+    summary = reconcile_payments(processor, chunk_size=3, batch_size=2)
+    assert (summary['checked'], summary['unchanged'], summary['updated']) == (7, 7, 0)
+    # 3 + 3 + 1 rows, each chunk split into processor batches of 2
+    assert [len(call) for call in processor.calls] == [2, 1, 2, 1, 1]
+    assert sorted(pid for call in processor.calls for pid in call) == sorted(f'pi_{n}' for n in range(7))
+
+def test_settled_payments_update_their_bookings_through_the_orm(app):
+    payment = _payment(1)
+    db.session.commit()
+    processor = FakePaymentProcessor()
+    processor.set_payment('pi_1', 'succeeded', 150, charge_id='ch_1')
+
+    assert reconcile_payments(processor)['updated'] == 1
+    payment = db.session.get(Payment, payment.id)
+    assert (payment.payment_status, payment.stripe_charge_id) == ('succeeded', 'ch_1')
+    assert db.session.get(Booking, payment.booking_id).payment_status == 'paid'
+    # The flush hooks saw the booking change
+    assert ChangeLog.query.filter_by(entity_id=payment.booking_id).count() >= 2
+
+def test_mismatches_are_recorded_once_per_payment_and_kind(app):
+    _payment(1, amount=150, currency='USD')
+    _payment(2)
+    db.session.commit()
+    processor = FakePaymentProcessor()
+    processor.set_payment('pi_1', 'pending', 175, currency='EUR')
+
+    first = reconcile_payments(processor)
+    assert first['discrepancies'] == 3
+    kinds = sorted((d.payment_intent_id, d.discrepancy_type) for d in PaymentDiscrepancy.query)
+    assert kinds == [('pi_1', 'amount_mismatch'), ('pi_1', 'currency_mismatch'), ('pi_2', 'missing_at_processor')]
+
+    assert reconcile_payments(processor)['discrepancies'] == 0
+    assert PaymentDiscrepancy.query.count() == 3
@@ -0,0 +1,107 @@
+from datetime import date, time
+from src.models.booking import db, ServiceRequest, ServiceQuote, Booking
+from src.models.business import Business
+from src.coverage import LeadAssignment
+from src.rollups import ServiceAreaDailyStats, backfill, _upsert_statement, _update_then_insert
+
+def _booking(business_id='business_1', area_id='area_1', category='junk_removal'):
+    if db.session.get(Business, business_id) is None:
+        db.session.add(Business(id=business_id, user_id='business_user_123', business_name=business_id,
+                                business_type='junk_removal'))
+    service_request = ServiceRequest(customer_user_id='user_123', customer_address_id='addr_1',
+                                     service_category=category, service_description='Old sofa')
+    db.session.add(service_request)
+    db.session.flush()
+    db.session.add(LeadAssignment(request_id=service_request.id, business_id=business_id, service_area_id=area_id))
+    quote = ServiceQuote(request_id=service_request.id, business_id=business_id, quote_amount=150,
+                         valid_until=date(2030, 1, 1))
+    db.session.add(quote)
+    db.session.flush()
+    booking = Booking(request_id=service_request.id, quote_id=quote.id, customer_user_id='user_123',
+                      business_id=business_id, booking_reference=f'BK-{service_request.id[:8]}',
+                      scheduled_date=date(2030, 1, 2), scheduled_time_start=time(9, 0),
+                      booking_status='in_progress', final_amount=100)
+    db.session.add(booking)
+    return booking
+
+def _stats(business_id='business_1'):
+    db.session.expire_all()
+    return {
+        (row.service_area_id, row.service_category): row
+        for row in ServiceAreaDailyStats.query.filter_by(business_id=business_id)
+    }
+
+def test_writes_are_counted_per_area_and_category(app):
+    _booking(area_id='area_1')
+    _booking(area_id='area_2', category='appliance_removal')
+    db.session.commit()
+
+    stats = _stats()
+    assert set(stats) == {('area_1', 'junk_removal'), ('area_2', 'appliance_removal')}
+    row = stats[('area_1', 'junk_removal')]
+    assert (row.requests, row.quotes, row.bookings, row.completed) == (1, 1, 1, 0)
+    # Area-wide demand is kept on the unassigned business row, under the area the lead was routed through
+    demand = _stats('')
+    assert {key: row.requests for key, row in demand.items()} == {
+        ('area_1', 'junk_removal'): 1, ('area_2', 'appliance_removal'): 1
+    }
+
+def test_demand_without_a_routed_lead_stays_unassigned(client):
+    response = client.post('/api/bookings/requests', json={
+        'addressId': 'addr_1', 'serviceCategory': 'junk_removal', 'description': 'Old sofa',
+        'location': {'lat': 39.78, 'lng': -89.65}, 'zipCode': '62701'
+    })
+    assert response.status_code == 201, response.get_data(as_text=True)
+    assert {key: row.requests for key, row in _stats('').items()} == {('', 'junk_removal'): 1}
+
+def test_backfill_matches_the_live_demand_rows(app):
+    _booking(area_id='area_2')
+    db.session.flush()
+    db.session.add(LeadAssignment(request_id=db.session.query(ServiceRequest.id).scalar(),
+                                  business_id='business_2', service_area_id='area_1'))
+    db.session.commit()
+    live = {key: row.requests for key, row in _stats('').items()}
+    assert live == {('area_1', 'junk_removal'): 1}
+
+    backfill()
+    assert {key: row.requests for key, row in _stats('').items()} == live
+
+def test_bulk_completions_are_counted_without_per_row_queries(client):
+    bookings = [_booking(area_id=f'area_{k % 3}') for k in range(30)]
+    db.session.commit()
+
+    response = client.post('/api/bookings/bulk/transitions', json={
+        'transitions': [{'bookingId': booking.id, 'status': 'completed'} for booking in bookings]
+    })
+    assert response.status_code == 200, response.get_data(as_text=True)
+    assert response.get_json()['data']['appliedCount'] == 30
+
+    stats = _stats()
+    assert sum(row.completed for row in stats.values()) == 30
+    assert stats[('area_0', 'junk_removal')].completed == 10
+    assert float(stats[('area_0', 'junk_removal')].revenue) == 1000
+
+def _connection(dialect_name):
+    class Connection:
+        class dialect:
+            name = dialect_name
+    return Connection()
+
+def test_mysql_upserts_add_on_duplicate_keys():
+    from sqlalchemy.dialects import mysql
+    sql = str(_upsert_statement(_connection('mysql')).compile(dialect=mysql.dialect()))
+    assert 'ON DUPLICATE KEY UPDATE requests = (service_area_daily_stats.requests + VALUES(requests))' in sql
+
+def test_other_dialects_update_then_insert(app):
+    assert _upsert_statement(_connection('mssql')) is None
+    row = {'day': date(2030, 1, 2), 'business_id': 'business_1', 'service_area_id': 'area_1',
+           'service_category': 'junk_removal', 'requests': 2, 'quotes': 1, 'bookings': 0, 'completed': 0,
+           'cancelled': 0, 'revenue': 50}
+    other = dict(row, service_area_id='area_2')
+    _update_then_insert(db.session.connection(), [row])
+    _update_then_insert(db.session.connection(), [row, other])
+    db.session.commit()
+
+    stats = _stats()
+    assert (stats[('area_1', 'junk_removal')].requests, float(stats[('area_1', 'junk_removal')].revenue)) == (4, 100)
+    assert stats[('area_2', 'junk_removal')].requests == 2
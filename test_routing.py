@@ -0,0 +1,140 @@
+import random
+from datetime import date, time
+from src.models.booking import db, ServiceRequest, ServiceQuote, Booking
+from src.routes import routing
+from src.routes.routing import build_distance_matrix, nearest_neighbour, two_opt, optimize_route, optimize_routes, _schedule
+
+def _instance(points, windows=None, service_minutes=30):
+    matrix = build_distance_matrix([(39.78, -89.65)] + points)
+    windows = [(0, None)] + (windows or [(0, None)] * len(points))
+    service = [0] + [service_minutes] * len(points)
+    return matrix, windows, service
+
+def test_two_opt_untangles_a_line():
+    rng = random.Random(7)
+    points = [(39.78, -89.65 + 0.01 * k) for k in range(1, 13)]
+    rng.shuffle(points)
+    matrix, windows, service = _instance(points)
+    order = two_opt(list(range(1, len(points) + 1)), matrix, windows, service, 480)
+    lngs = [points[node - 1][1] for node in order]
+    assert lngs == sorted(lngs)
+
+def test_two_opt_never_adds_miles_without_windows():
+    rng = random.Random(3)
+    points = [(39.78 + rng.uniform(-0.1, 0.1), -89.65 + rng.uniform(-0.1, 0.1)) for _ in range(60)]
+    matrix, windows, service = _instance(points)
+    start = nearest_neighbour(matrix, windows, service, 480)
+    improved = two_opt(start, matrix, windows, service, 480)
+    assert sorted(improved) == sorted(start)
+    assert _schedule(improved, matrix, windows, service, 480)[2] <= _schedule(start, matrix, windows, service, 480)[2]
+
+def test_two_opt_keeps_a_feasible_route_on_time():
+    # The far stop must be served first; the nearer ones only open later
+    points = [(39.78, -89.55), (39.78, -89.64), (39.78, -89.63)]
+    windows = [(480, 500), (600, 660), (600, 660)]
+    matrix, windows, service = _instance(points, windows)
+    order = two_opt([2, 3, 1], matrix, windows, service, 480)
+    _, lateness, _ = _schedule(order, matrix, windows, service, 480)
+    assert order[0] == 1
+    assert lateness == 0
+
+def test_optimize_route_reports_late_stops():
+    stops = [
+        {'id': 'a', 'lat': 39.78, 'lng': -89.64, 'windowStart': time(8, 0), 'windowEnd': time(8, 5)},
+        {'id': 'b', 'lat': 39.78, 'lng': -89.40, 'windowStart': time(8, 0), 'windowEnd': time(8, 10)},
+    ]
+    route = optimize_route(stops, depot=(39.78, -89.65), start_time=time(8, 0))
+    assert [stop['bookingId'] for stop in route['stops']] == ['a', 'b']
+    assert [stop['late'] for stop in route['stops']] == [False, True]
+    assert route['totalLatenessMinutes'] > 0
+
+def test_large_crew_goes_to_the_pool(monkeypatch):
+    submitted = []
+
+    class InlinePool:
+        def submit(self, fn, job):
+            submitted.append(len(job[0]))
+            result = fn(job)
+            return type('Done', (), {'result': lambda self: result})()
+
+    monkeypatch.setattr(routing, 'PROCESS_POOL_MIN_STOPS', 5)
+    monkeypatch.setattr(routing, '_get_pool', InlinePool)
+    crews = [
+        [{'id': f'big{k}', 'lat': 39.78, 'lng': -89.65 + 0.01 * k} for k in range(6)],
+        [{'id': 'small', 'lat': 39.79, 'lng': -89.65}],
+    ]
+    routes = optimize_routes(crews)
+    assert submitted == [6]
+    assert [len(route['stops']) for route in routes] == [6, 1]
+
+def _booking(reference, address_id, start, end, hours=None):
+    service_request = ServiceRequest(customer_user_id='user_1', customer_address_id=address_id,
+                                     service_category='junk_removal', service_description='Old sofa')
+    db.session.add(service_request)
+    db.session.flush()
+    quote = ServiceQuote(request_id=service_request.id, business_id='business_1', quote_amount=100,
+                         estimated_duration_hours=hours, valid_until=date(2030, 1, 1))
+    db.session.add(quote)
+    db.session.flush()
+    booking = Booking(request_id=service_request.id, quote_id=quote.id, customer_user_id='user_1',
+                      business_id='business_1', booking_reference=reference, scheduled_date=date(2030, 1, 2),
+                      scheduled_time_start=start, scheduled_time_end=end, booking_status='confirmed')
+    db.session.add(booking)
+    return booking
+
+def test_route_endpoint_returns_unassigned_bookings(client):
+    first = _booking('BK-1', 'addr_1', time(8, 0), time(10, 0), hours=2)
+    second = _booking('BK-2', 'addr_2', time(8, 0), time(12, 0))
+    db.session.commit()
+
+    response = client.post('/api/businesses/business_1/routes/optimize', json={
+        'date': '2030-01-02',
+        'depot': {'lat': 39.78, 'lng': -89.65},
+        'locations': {'addr_1': {'lat': 39.79, 'lng': -89.64}, 'addr_2': {'lat': 39.80, 'lng': -89.63}},
+        'crews': [[first.id]]
+    })
+    data = response.get_json()['data']
+    assert response.status_code == 200
+    assert [stop['bookingId'] for stop in data['routes'][0]['stops']] == [first.id]
+    assert data['unassignedBookings'] == [second.id]
+
+def test_route_is_never_later_than_the_greedy_start():
+    rng = random.Random(11)
+    for _ in range(20):
+        points = [(39.78 + rng.uniform(-0.2, 0.2), -89.65 + rng.uniform(-0.2, 0.2)) for _ in range(12)]
+        windows = []
+        for _ in points:
+            opens = rng.randrange(480, 900, 15)
+            windows.append((opens, opens + rng.choice((30, 60, 120))))
+        matrix, windows, service = _instance(points, windows)
+        greedy = nearest_neighbour(matrix, windows, service, 480)
+        stops = [
+            {'id': str(k), 'lat': lat, 'lng': lng, 'windowStart': time(w[0] // 60, w[0] % 60),
+             'windowEnd': time(w[1] // 60, w[1] % 60), 'serviceMinutes': 30}
+            for k, ((lat, lng), w) in enumerate(zip(points, windows[1:]))
+        ]
+        route = optimize_route(stops, depot=(39.78, -89.65), start_time=time(8, 0))
+        assert route['totalLatenessMinutes'] <= round(_schedule(greedy, matrix, windows, service, 480)[1], 1)
+        assert route['totalTimeWarpMinutes'] <= route['totalLatenessMinutes'] + 1e-9
+
+def test_route_endpoint_validates_crews(client):
+    body = {'date': '2030-01-02', 'locations': {}}
+    response = client.post('/api/businesses/business_1/routes/optimize', json=dict(body, crews=['b1']))
+    assert response.status_code == 400
+    assert response.get_json()['error']['details']['errors'][0]['field'] == 'crews[0]'
+
+    response = client.post('/api/businesses/business_1/routes/optimize', json=dict(body, crews=[['b1', 'b2'], ['b2']]))
+    assert response.status_code == 400
+    assert response.get_json()['error']['details']['bookingIds'] == ['b2']
+
+def test_pool_is_shut_down_at_exit(monkeypatch):
+    calls = []
+
+    class Pool:
+        def shutdown(self, **kwargs):
+            calls.append(kwargs)
+
+    monkeypatch.setattr(routing, '_pool', Pool())
+    routing._shutdown_pool()
+    assert calls == [{'wait': False, 'cancel_futures': True}]
+    assert routing._pool is None
@@ -0,0 +1,81 @@
+from datetime import date, time
+import pytest
+from src.schemas import (Schema, ValidationError, String, Integer, Number, Boolean, Date, Time, Object, List,
+                         parse_date, parse_time)
+
+ITEM_SCHEMA = Schema({
+    'name': String(required=True),
+    'quantity': Integer(minimum=1, default=1)
+})
+
+ORDER_SCHEMA = Schema({
+    'customer': String(required=True),
+    'size': String(choices=('small', 'large'), default='small'),
+    'budget': Number(minimum=0),
+    'rush': Boolean(default=False),
+    'date': Date(),
+    'start': Time(),
+    'items': List(schema=ITEM_SCHEMA, default=[]),
+    'location': Object(schema=Schema({'lat': Number(required=True)}))
+})
+
+def _fields(data):
+    with pytest.raises(ValidationError) as excinfo:
+        ORDER_SCHEMA.load(data)
+    return [(error['field'], error['code']) for error in excinfo.value.errors]
+
+def test_dates_and_times_accept_the_strptime_formats():
+    assert parse_date('2025-03-09') == date(2025, 3, 9)
+    assert parse_date('2025-3-9') == date(2025, 3, 9)
+    assert parse_time('09:30') == time(9, 30)
+    assert parse_time('9:30') == time(9, 30)
+
+@pytest.mark.parametrize('parse, value, message', [
+    (parse_date, '2025-02-30', 'must be a valid date'),
+    (parse_date, 'March 9', 'must be in YYYY-MM-DD format'),
+    (parse_date, 20250309, 'must be in YYYY-MM-DD format'),
+    (parse_time, '24:00', 'must be a valid time'),
+    (parse_time, '9.30am', 'must be in HH:MM format'),
+])
+def test_bad_dates_and_times_are_rejected(parse, value, message):
+    with pytest.raises(ValueError, match=message):
+        parse(value)
+
+def test_load_parses_values_and_fills_defaults():
+    values = ORDER_SCHEMA.load({'customer': 'c1', 'date': '2025-03-09', 'start': '', 'items': [{'name': 'sofa'}]})
+    assert values == {
+        'customer': 'c1', 'size': 'small', 'budget': None, 'rush': False, 'date': date(2025, 3, 9),
+        'start': None, 'items': [{'name': 'sofa', 'quantity': 1}], 'location': None
+    }
+    # Mutable defaults are copied per load
+    ORDER_SCHEMA.load({'customer': 'c1'})['items'].append('x')
+    assert ORDER_SCHEMA.load({'customer': 'c1'})['items'] == []
+
+def test_every_bad_field_is_reported_once():
+    assert _fields({
+        'size': 'medium', 'budget': -1, 'rush': 'yes', 'date': '2025-13-01',
+        'items': [{'quantity': 0}, 'sofa'], 'location': {'lat': 'north'}
+    }) == [
+        ('customer', 'MISSING_FIELD'),
+        ('size', 'INVALID_VALUE'),
+        ('budget', 'INVALID_VALUE'),
+        ('rush', 'INVALID_TYPE'),
+        ('date', 'INVALID_FORMAT'),
+        ('items[0].name', 'MISSING_FIELD'),
+        ('items[0].quantity', 'INVALID_VALUE'),
+        ('items[1]', 'INVALID_TYPE'),
+        ('location.lat', 'INVALID_TYPE'),
+    ]
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), float('-inf'), True])
+def test_numbers_must_be_finite_and_not_booleans(value):
+    assert _fields({'customer': 'c1', 'budget': value})[0][0] == 'budget'
+
+def test_large_integers_are_still_numbers():
+    assert ORDER_SCHEMA.load({'customer': 'c1', 'budget': 10 ** 400})['budget'] == 10 ** 400
+
+def test_validate_many_returns_one_result_per_item():
+    results = ITEM_SCHEMA.validate_many([{'name': 'sofa'}, {}, None])
+    assert results[0] == ({'name': 'sofa', 'quantity': 1}, None)
+    assert results[1][0] is None and results[1][1][0]['field'] == 'name'
+    assert results[2][1][0] == {'field': 'body', 'code': 'INVALID_TYPE', 'message': 'Field body must be an object'}
@@ -0,0 +1,23 @@
+from datetime import date
+from src.models.user import db
+from src.models.booking import ServiceRequest
+from src.change_log import head_seq
+from src.rollups import ServiceAreaDailyStats
+from src.seed_data import seed
+
+def test_seeding_rebuilds_rollups_and_expires_sync_cursors(client):
+    cursor = client.get('/api/sync/changes').get_json()['data']['cursor']
+
+    counts = seed('small', as_of=date(2025, 6, 30), municipalities=1, zones_per_schedule=2, residents=40,
+                  businesses=5, service_requests=30)
+    assert counts['service_requests'] == ServiceRequest.query.count() == 30
+
+    requests = db.session.query(db.func.sum(ServiceAreaDailyStats.requests)).filter(
+        ServiceAreaDailyStats.business_id == ''
+    ).scalar()
+    assert requests == 30
+
+    response = client.get('/api/sync/changes', query_string={'cursor': cursor})
+    assert response.status_code == 410
+    # A fresh cursor from after the load syncs normally
+    assert client.get('/api/sync/changes', query_string={'cursor': head_seq()}).status_code == 200
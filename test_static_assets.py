@@ -0,0 +1,40 @@
+import gzip
+import pytest
+from src.static_assets import IMMUTABLE_CACHE_CONTROL, INDEX_CACHE_CONTROL
+
+@pytest.fixture
+def static_client(app, tmp_path):
+    """Client serving a small build output from tmp_path"""
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'index.html').write_text('<html></html>')
+    (tmp_path / 'favicon.ico').write_bytes(b'icon')
+    (tmp_path / 'app.3f9a2b1c.js').write_text('console.log(1)')
+    (tmp_path / 'assets' / 'logo.svg').write_text('<svg/>')
+    (tmp_path / 'app.3f9a2b1c.js.gz').write_bytes(gzip.compress(b'console.log(1)'))
+    manifest = app.extensions['static_manifest']
+    manifest.root = str(tmp_path)
+    manifest.refresh()
+    return app.test_client()
+
+@pytest.mark.parametrize('path', ['/app.3f9a2b1c.js', '/assets/logo.svg'])
+def test_fingerprinted_assets_are_immutable(static_client, path):
+    response = static_client.get(path)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+
+def test_other_files_revalidate(static_client):
+    assert static_client.get('/favicon.ico').headers['Cache-Control'] == 'public, max-age=3600'
+    for path in ('/', '/index.html', '/bookings/123'):
+        response = static_client.get(path)
+        assert response.get_data(as_text=True) == '<html></html>'
+        assert response.headers['Cache-Control'] == INDEX_CACHE_CONTROL
+
+def test_precompressed_variant_is_negotiated(static_client):
+    response = static_client.get('/app.3f9a2b1c.js', headers={'Accept-Encoding': 'gzip, br;q=0'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == b'console.log(1)'
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+    plain = static_client.get('/app.3f9a2b1c.js', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_data() == b'console.log(1)'
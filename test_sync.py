@@ -0,0 +1,82 @@
+from datetime import date, time
+from src.models.booking import db, ServiceRequest, ServiceQuote, Booking
+from src.change_log import ChangeLog, head_seq
+
+def _booking(customer_user_id='user_123'):
+    service_request = ServiceRequest(customer_user_id=customer_user_id, customer_address_id='addr_1',
+                                     service_category='junk_removal', service_description='Old sofa')
+    db.session.add(service_request)
+    db.session.flush()
+    quote = ServiceQuote(request_id=service_request.id, business_id='business_1', quote_amount=150,
+                         valid_until=date(2030, 1, 1))
+    db.session.add(quote)
+    db.session.flush()
+    booking = Booking(request_id=service_request.id, quote_id=quote.id, customer_user_id=customer_user_id,
+                      business_id='business_1', booking_reference=f'BK-{service_request.id[:8]}',
+                      scheduled_date=date(2030, 1, 2), scheduled_time_start=time(9, 0))
+    db.session.add(booking)
+    db.session.commit()
+    return booking
+
+def _changes(client, **params):
+    response = client.get('/api/sync/changes', query_string=params)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return response.get_json()['data']
+
+def test_first_sync_returns_the_head_cursor(client):
+    _booking()
+    data = _changes(client)
+    assert data == {'changes': [], 'cursor': str(head_seq()), 'hasMore': False, 'reset': True}
+
+def test_changes_after_the_cursor_collapse_per_entity(client):
+    cursor = _changes(client)['cursor']
+    booking = _booking()
+    booking.booking_status = 'in_progress'
+    db.session.commit()
+    booking.booking_status = 'completed'
+    db.session.commit()
+    _booking(customer_user_id='someone_else')
+
+    data = _changes(client, cursor=cursor)
+    assert data['reset'] is False and data['hasMore'] is False
+    assert [(c['type'], c['id'], c['op']) for c in data['changes']] == [('booking', booking.id, 'upsert')]
+    assert data['changes'][0]['data'] is not None
+
+    # Nothing new since the returned cursor
+    assert _changes(client, cursor=data['cursor'])['changes'] == []
+
+def test_deleted_rows_come_back_as_tombstones(client):
+    booking = _booking()
+    cursor = _changes(client)['cursor']
+    db.session.delete(booking)
+    db.session.commit()
+
+    [change] = _changes(client, cursor=cursor)['changes']
+    assert (change['id'], change['op'], change['data']) == (booking.id, 'delete', None)
+
+def test_changes_page_through_the_limit(client):
+    cursor = _changes(client)['cursor']
+    ids = [_booking().id for _ in range(3)]
+
+    seen = []
+    for _ in range(3):
+        data = _changes(client, cursor=cursor, limit=1)
+        seen += [change['id'] for change in data['changes']]
+        cursor = data['cursor']
+    assert seen == ids
+    assert data['hasMore'] is False
+
+def test_bad_and_expired_cursors_are_rejected(client):
+    response = client.get('/api/sync/changes', query_string={'cursor': 'abc'})
+    assert response.status_code == 400
+    assert response.get_json()['error']['code'] == 'INVALID_CURSOR'
+
+    for _ in range(3):
+        _booking()
+    ChangeLog.query.filter(ChangeLog.seq <= 4).delete()
+    db.session.commit()
+
+    response = client.get('/api/sync/changes', query_string={'cursor': '1'})
+    assert response.status_code == 410
+    assert response.get_json()['error']['code'] == 'CURSOR_EXPIRED'
+    assert client.get('/api/sync/changes', query_string={'cursor': '4'}).status_code == 200